@@ -0,0 +1,72 @@
+"""Micro-benchmark do cálculo de média/status: chamada por aluno vs. lote.
+
+Uso:
+    python scripts/bench_notas.py [quantidade] [repeticoes] [backend]
+
+O backend do lote é ``backend_padrao()`` (NumPy ou Python puro) se não for
+informado; ``c`` mede o caminho ctypes, que ainda chama a biblioteca por aluno.
+"""
+import os
+import random
+import sys
+import timeit
+from array import array
+from pathlib import Path
+
+import django
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROJECT_DIR = BASE_DIR / 'sistema_academico'
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sistema_academico.settings')
+sys.path.insert(0, str(PROJECT_DIR))
+os.environ['DATABASE_ENGINE'] = 'sqlite3'
+django.setup()
+
+from sistema.notas import MEDIA_APROVACAO, backend_padrao, calcular_medias_lote
+
+
+def media_status_por_chamada():
+    """Caminho antigo: uma chamada ao wrapper C (ou ao fallback) por aluno."""
+    try:
+        from c.notas_avaliacao_wrapper import calcular_media_status
+        return calcular_media_status, 'C (ctypes)'
+    except Exception:
+        def calcular_media_status(n1, n2, corte):
+            media = (n1 + n2) / 2.0
+            return {'media': media, 'status': 'aprovado' if media >= corte else 'reprovado'}
+        return calcular_media_status, 'Python'
+
+
+def main() -> None:
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    backend = sys.argv[3] if len(sys.argv) > 3 else backend_padrao()
+
+    rnd = random.Random(42)
+    p1 = array('d', (round(rnd.uniform(0, 10), 2) for _ in range(quantidade)))
+    p2 = array('d', (round(rnd.uniform(0, 10), 2) for _ in range(quantidade)))
+    por_chamada, origem = media_status_por_chamada()
+
+    def individual():
+        return [por_chamada(a, b, MEDIA_APROVACAO) for a, b in zip(p1, p2)]
+
+    def lote():
+        return calcular_medias_lote(p1, p2, MEDIA_APROVACAO, backend=backend)
+
+    medias, _ = lote()
+    if any(r['media'] != m for r, m in zip(individual(), medias)):
+        print('ATENÇÃO: médias do lote diferem das chamadas individuais!')
+        sys.exit(1)
+
+    t_ind = min(timeit.repeat(individual, number=1, repeat=repeticoes))
+    t_lote = min(timeit.repeat(lote, number=1, repeat=repeticoes))
+
+    print(f'Alunos: {quantidade}  (melhor de {repeticoes})')
+    print(f'  por chamada [{origem}]: {t_ind * 1000:8.2f} ms  ({quantidade / t_ind:,.0f} alunos/s)')
+    print(f'  em lote [{backend}]: {t_lote * 1000:8.2f} ms  ({quantidade / t_lote:,.0f} alunos/s)')
+    print(f'  ganho: {t_ind / t_lote:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,27 @@
+"""Confere o dump (``dumpdata.json``) contra o banco SQLite atual.
+
+O dump é lido em fluxo (um registro por vez, UTF-16 por padrão), então a
+memória não cresce com o tamanho do arquivo. As contagens do banco saem de
+uma única consulta ``UNION ALL``.
+
+Com ``--pks`` também compara os conjuntos de chaves e, com ``--checksum``, o
+conteúdo de cada registro. Os dois lados são resumidos em faixas de pk
+(``TAMANHO_FAIXA`` chaves consecutivas; chaves não numéricas vão para baldes
+por hash) com contagem e soma de hashes; só as faixas que divergem são
+relidas, na segunda passada, para listar os registros faltantes ou diferentes.
+
+Uso:
+    python scripts/verify_dumpdata.py [dump] [--encoding utf-16] [--pks] [--checksum]
+                                      [--modelos auth.user,sistema.aluno] [--max-divergencias 20]
+"""
+import argparse
+import hashlib
 import json
 import os
 import sys
+import zlib
 from collections import Counter
+from itertools import islice
 from pathlib import Path
 
 import django
@@ -15,57 +35,264 @@ os.environ['DATABASE_ENGINE'] = 'sqlite3'
 django.setup()
 
 from django.apps import apps
+from django.core import serializers
+from django.db import connection
+from django.db.models import Q
+
+from sistema.fluxo_json import iterar_array_json
+
+
+MODELOS_PADRAO = [
+    'auth.user',
+    'auth.group',
+    'admin.logentry',
+    'sessions.session',
+    'sistema.coordenador',
+    'sistema.professor',
+    'sistema.aluno',
+    'sistema.disciplina',
+    'sistema.turma',
+    'sistema.turmadisciplina',
+    'sistema.alunomodulo',
+    'sistema.atividade',
+    'sistema.alunoatividade',
+    'sistema.aula',
+]
+
+BLOCO = 64 * 1024
+TAMANHO_FAIXA = 1024
+BALDES_TEXTO = 4096
+MAX_FAIXAS_DETALHADAS = 50
+LOTE = 2000
+MASCARA = (1 << 64) - 1
+
+
+def ler_dump(caminho, encoding):
+    with caminho.open('rb') as handle:
+        yield from iterar_array_json(iter(lambda: handle.read(BLOCO), b''), encoding)
+
 
+def _hash(valor):
+    texto = json.dumps(valor, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return int.from_bytes(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def _balde(chave):
+    if isinstance(chave, int):
+        return chave // TAMANHO_FAIXA
+    return ('hash', zlib.crc32(json.dumps(chave).encode('utf-8')) % BALDES_TEXTO)
+
+
+def _faixas(chaves):
+    """Compacta chaves ordenadas em faixas legíveis: [1, 2, 3, 7] -> '1-3, 7'."""
+    partes, inicio, anterior = [], None, None
+    for chave in sorted(chaves, key=lambda c: (not isinstance(c, int), c if isinstance(c, int) else str(c))):
+        if isinstance(chave, int) and anterior is not None and isinstance(anterior, int) and chave == anterior + 1:
+            anterior = chave
+            continue
+        if inicio is not None:
+            partes.append(str(inicio) if inicio == anterior else f'{inicio}-{anterior}')
+        inicio = anterior = chave
+    if inicio is not None:
+        partes.append(str(inicio) if inicio == anterior else f'{inicio}-{anterior}')
+    return ', '.join(partes)
+
+
+class Comparador:
+    """Resume registros (do dump ou do banco) por modelo e faixa de chaves."""
+
+    def __init__(self, modelos, conteudo):
+        self.modelos = {label: apps.get_model(label) for label in modelos}
+        self.conteudo = conteudo
+        self._m2m = {
+            label: {f.name for f in modelo._meta.many_to_many}
+            for label, modelo in self.modelos.items()
+        }
+
+    def chave(self, label, registro):
+        """pk do registro ou, quando o dump usa chave natural primária, a chave natural."""
+        if 'pk' in registro:
+            return registro['pk']
+        modelo = self.modelos[label]
+        simples = {f.name for f in modelo._meta.concrete_fields if not f.is_relation}
+        try:
+            instancia = modelo(**{k: v for k, v in registro['fields'].items() if k in simples})
+            return list(instancia.natural_key())
+        except Exception:
+            return ['#', _hash(registro['fields'])]
 
-def load_dump_counts():
-    dump_path = PROJECT_DIR / 'dumpdata.json'
-    if not dump_path.exists():
-        raise FileNotFoundError(f'Fixture não encontrada: {dump_path}')
+    def resumo(self, label, registro):
+        """``(chave, balde, hash)``; o hash cobre só a chave, ou também os campos com ``conteudo``."""
+        chave = self.chave(label, registro)
+        if not self.conteudo:
+            return chave, _balde(chave), _hash([label, chave])
+        campos = dict(registro['fields'])
+        for nome in self._m2m[label] & campos.keys():
+            campos[nome] = sorted(campos[nome], key=json.dumps)
+        return chave, _balde(chave), _hash([label, chave, campos])
 
-    with dump_path.open(encoding='utf-16') as handle:
-        payload = json.load(handle)
 
-    return Counter(item['model'] for item in payload)
+def acumular(baldes, balde, valor):
+    qtd, soma = baldes.get(balde, (0, 0))
+    baldes[balde] = (qtd + 1, (soma + valor) & MASCARA)
+
+
+def resumir_dump(caminho, encoding, comparador):
+    """Primeira passada no dump: contagens de todos os modelos e, se pedido, baldes por modelo."""
+    contagens = Counter()
+    baldes = {label: {} for label in comparador.modelos} if comparador else {}
+    naturais = False
+    for item in ler_dump(caminho, encoding):
+        label = item['model']
+        contagens[label] += 1
+        if 'pk' not in item:
+            naturais = True
+        if label in baldes:
+            _, balde, valor = comparador.resumo(label, item)
+            acumular(baldes[label], balde, valor)
+    return contagens, baldes, naturais
+
+
+def contar_banco(labels, tabelas):
+    """Contagem das tabelas existentes em uma única consulta UNION ALL."""
+    partes, parametros = [], []
+    for label in labels:
+        tabela = apps.get_model(label)._meta.db_table
+        if tabela in tabelas:
+            partes.append(f'SELECT %s, COUNT(*) FROM {connection.ops.quote_name(tabela)}')
+            parametros.append(label)
+    if not partes:
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(' UNION ALL '.join(partes), parametros)
+        return dict(cursor.fetchall())
+
+
+def registros_banco(modelo, naturais, filtro=None):
+    """Registros do banco no mesmo formato do dumpdata, lidos em lotes ordenados por pk."""
+    consulta = modelo._default_manager.order_by('pk')
+    m2m = [f.name for f in modelo._meta.many_to_many]
+    if m2m:
+        consulta = consulta.prefetch_related(*m2m)
+    if filtro is not None:
+        consulta = consulta.filter(filtro)
+    objetos = consulta.iterator(chunk_size=LOTE)
+    while lote := list(islice(objetos, LOTE)):
+        yield from json.loads(serializers.serialize(
+            'json', lote, use_natural_foreign_keys=naturais, use_natural_primary_keys=naturais,
+        ))
+
+
+def resumir_banco(label, comparador, naturais):
+    baldes = {}
+    for registro in registros_banco(comparador.modelos[label], naturais):
+        _, balde, valor = comparador.resumo(label, registro)
+        acumular(baldes, balde, valor)
+    return baldes
+
+
+def _filtro_baldes(baldes):
+    """Filtro de pk para as faixas numéricas divergentes; ``None`` se houver baldes por hash."""
+    if any(isinstance(b, tuple) for b in baldes):
+        return None
+    filtro = Q()
+    for balde in baldes:
+        filtro |= Q(pk__gte=balde * TAMANHO_FAIXA, pk__lt=(balde + 1) * TAMANHO_FAIXA)
+    return filtro
+
+
+def detalhar(caminho, encoding, comparador, divergentes, naturais):
+    """Segunda passada: só os registros das faixas divergentes, dos dois lados."""
+    do_dump = {label: {} for label in divergentes}
+    for item in ler_dump(caminho, encoding):
+        label = item['model']
+        if label in divergentes:
+            chave, balde, valor = comparador.resumo(label, item)
+            if balde in divergentes[label]:
+                do_dump[label][json.dumps(chave)] = valor
+
+    resultado = {}
+    for label, baldes in divergentes.items():
+        do_banco = {}
+        for registro in registros_banco(comparador.modelos[label], naturais, _filtro_baldes(baldes)):
+            chave, balde, valor = comparador.resumo(label, registro)
+            if balde in baldes:
+                do_banco[json.dumps(chave)] = valor
+        dump = do_dump[label]
+        resultado[label] = {
+            'faltando no banco': [json.loads(c) for c in dump.keys() - do_banco.keys()],
+            'faltando no dump': [json.loads(c) for c in do_banco.keys() - dump.keys()],
+            'conteúdo diferente': [json.loads(c) for c in dump.keys() & do_banco.keys() if dump[c] != do_banco[c]],
+        }
+    return resultado
 
 
 def main() -> None:
-    dump_counts = load_dump_counts()
-    interesting_models = [
-        'auth.user',
-        'auth.group',
-        'admin.logentry',
-        'sessions.session',
-        'sistema.coordenador',
-        'sistema.professor',
-        'sistema.aluno',
-        'sistema.disciplina',
-        'sistema.turma',
-        'sistema.turmadisciplina',
-        'sistema.alunomodulo',
-        'sistema.atividade',
-        'sistema.alunoatividade',
-        'sistema.aula',
-    ]
+    parser = argparse.ArgumentParser(description='Confere o dumpdata.json contra o banco SQLite.')
+    parser.add_argument('dump', nargs='?', type=Path, default=PROJECT_DIR / 'dumpdata.json')
+    parser.add_argument('--encoding', default='utf-16')
+    parser.add_argument('--pks', action='store_true', help='Compara também os conjuntos de chaves.')
+    parser.add_argument('--checksum', action='store_true', help='Compara também o conteúdo (implica --pks).')
+    parser.add_argument('--modelos', help='Lista separada por vírgulas (padrão: modelos do projeto).')
+    parser.add_argument('--max-divergencias', type=int, default=20,
+                        help='Máximo de faixas de chaves listadas por tipo de divergência.')
+    args = parser.parse_args()
 
-    issues = []
+    if not args.dump.exists():
+        raise FileNotFoundError(f'Fixture não encontrada: {args.dump}')
 
-    print('Comparando registros exportados com o banco SQLite atual:')
-    for label in interesting_models:
+    issues = []
+    modelos = []
+    for label in (args.modelos.split(',') if args.modelos else MODELOS_PADRAO):
         try:
-            model = apps.get_model(label)
+            apps.get_model(label)
         except LookupError:
             issues.append(f'Modelo ausente no projeto: {label}')
             continue
+        modelos.append(label)
+
+    detalhado = args.pks or args.checksum
+    comparador = Comparador(modelos, conteudo=args.checksum) if detalhado else None
+    dump_counts, baldes_dump, naturais = resumir_dump(args.dump, args.encoding, comparador)
+    tabelas = set(connection.introspection.table_names())
+    db_counts = contar_banco(modelos, tabelas)
 
+    divergentes = {}
+    print('Comparando registros exportados com o banco SQLite atual:')
+    for label in modelos:
         exported = dump_counts.get(label, 0)
-        actual = model.objects.count()
+        actual = db_counts.get(label, 0)
         status = 'OK' if actual == exported else 'MISMATCH'
+        tabela = apps.get_model(label)._meta.db_table
+        if tabela not in tabelas:
+            # Sem tabela não há o que resumir nem detalhar: só a contagem do dump
+            status = 'TABELA AUSENTE'
+            issues.append(f'{label}: tabela {tabela} ausente no banco')
+        elif detalhado:
+            baldes_db = resumir_banco(label, comparador, naturais)
+            diferentes = {
+                b for b in baldes_dump[label].keys() | baldes_db.keys()
+                if baldes_dump[label].get(b) != baldes_db.get(b)
+            }
+            if diferentes:
+                status = 'MISMATCH'
+                divergentes[label] = set(islice(sorted(diferentes, key=str), MAX_FAIXAS_DETALHADAS))
+                issues.append(f'{label}: {len(diferentes)} faixa(s) de chaves divergente(s)')
         padding = ' ' * max(1, 35 - len(label))
         print(f'  {label}{padding}DB={actual:<4} dump={exported:<4} {status}')
 
-        if actual != exported:
+        if tabela in tabelas and actual != exported:
             issues.append(f'{label}: banco {actual} vs dump {exported}')
 
+    if divergentes:
+        print('\nRegistros divergentes:')
+        for label, tipos in detalhar(args.dump, args.encoding, comparador, divergentes, naturais).items():
+            for tipo, chaves in tipos.items():
+                if chaves:
+                    faixas = _faixas(chaves).split(', ')
+                    resto = f' ... (+{len(faixas) - args.max_divergencias} faixas)' if len(faixas) > args.max_divergencias else ''
+                    print(f'  {label} {tipo}: {", ".join(faixas[:args.max_divergencias])}{resto}')
+
     if issues:
         print('\nInconsistências encontradas:')
         for issue in issues:
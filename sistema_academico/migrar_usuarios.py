@@ -2,89 +2,190 @@
 Script para migrar dados de Usuario customizado para User nativo do Django.
 Execute ANTES de rodar a migração 0006.
 
+A tabela antiga é lida em lotes (por faixa de id), os ids e usernames já
+existentes ficam em memória (sem uma consulta por usuário), os hashes de senha
+são calculados em paralelo num pool de processos e os usuários são inseridos
+com bulk_create, tudo dentro de uma única transação.
+
 Uso:
-    python migrar_usuarios.py
+    python migrar_usuarios.py [--dry-run] [--sem-senha] [--lote 1000] [--processos N]
+
+    --dry-run    mostra o que seria feito, sem gravar nada
+    --sem-senha  cria os usuários com senha inutilizável (reset obrigatório)
+                 em vez da senha padrão; dispensa o custo do hash
 """
 
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
 import django
 
 # Setup Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sistema_academico.settings')
 django.setup()
 
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from django.db import connection
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+TABELA_ANTIGA = 'sistema_usuario'
+SENHA_PADRAO = 'senha123'
+LOTE = 1000
+
+
+def _hash_senha(senha):
+    """Executado nos processos do pool (PBKDF2 é CPU-bound, threads não ajudam)."""
+    return make_password(senha)
+
+
+def ler_usuarios_antigos(lote):
+    """Itera os registros da tabela antiga em lotes ordenados por id (memória constante)."""
+    ultimo = None
+    with connection.cursor() as cursor:
+        while True:
+            if ultimo is None:
+                cursor.execute(
+                    f"SELECT id, nome, email, criado_em FROM {TABELA_ANTIGA} ORDER BY id LIMIT %s", [lote]
+                )
+            else:
+                cursor.execute(
+                    f"SELECT id, nome, email, criado_em FROM {TABELA_ANTIGA} WHERE id > %s ORDER BY id LIMIT %s",
+                    [ultimo, lote],
+                )
+            linhas = cursor.fetchall()
+            if not linhas:
+                return
+            yield linhas
+            ultimo = linhas[-1][0]
+
+
+class GeradorUsernames:
+    """Resolve colisões de username em memória (base, base1, base2, ...)."""
+
+    def __init__(self, existentes):
+        self.usados = set(existentes)
+        self._sufixo = {}
+
+    def novo(self, base):
+        base = base[:140] or 'usuario'
+        username = base
+        contador = self._sufixo.get(base, 1)
+        while username in self.usados:
+            username = f"{base}{contador}"
+            contador += 1
+        self._sufixo[base] = contador
+        self.usados.add(username)
+        return username
+
+
+def montar_usuario(user_id, nome, email, usernames):
+    # Separar nome em first_name e last_name
+    partes_nome = (nome or '').split(' ', 1)
+    first_name = partes_nome[0] if partes_nome else ''
+    last_name = partes_nome[1] if len(partes_nome) > 1 else ''
 
-def migrar_usuarios():
+    # Criar username a partir do email (com sufixo se já existir)
+    username = usernames.novo((email or '').split('@')[0] or f"usuario{user_id}")
+
+    return User(
+        id=user_id,
+        username=username,
+        email=email or '',
+        first_name=first_name[:150],
+        last_name=last_name[:150],
+        is_active=True,
+        is_staff=False,
+        is_superuser=False,
+    )
+
+
+def migrar_usuarios(dry_run=False, sem_senha=False, lote=LOTE, processos=None):
     """Migra registros da tabela sistema_usuario para auth_user"""
-    
+
+    # Verificar se a tabela antiga existe
+    if TABELA_ANTIGA not in connection.introspection.table_names():
+        print(" Tabela sistema_usuario não encontrada. Já foi migrada?")
+        return
+
     with connection.cursor() as cursor:
-        # Verificar se a tabela antiga existe
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='sistema_usuario'
-        """)
-        
-        if not cursor.fetchone():
-            print(" Tabela sistema_usuario não encontrada. Já foi migrada?")
-            return
-        
-        # Buscar todos os usuários antigos
-        cursor.execute("SELECT id, nome, email, criado_em FROM sistema_usuario")
-        usuarios_antigos = cursor.fetchall()
-        
-        if not usuarios_antigos:
-            print(" Nenhum usuário para migrar.")
-            return
-    
-        print(f"📋 Encontrados {len(usuarios_antigos)} usuários para migrar...")
-        
-        migrados = 0
-        for user_id, nome, email, criado_em in usuarios_antigos:
-            # Verificar se já existe
-            if User.objects.filter(id=user_id).exists():
-                print(f"⏭️  User ID {user_id} já existe, pulando...")
-                continue
-            
-            # Separar nome em first_name e last_name
-            partes_nome = nome.split(' ', 1)
-            first_name = partes_nome[0] if partes_nome else ''
-            last_name = partes_nome[1] if len(partes_nome) > 1 else ''
-            
-            # Criar username a partir do email
-            username = email.split('@')[0]
-            
-            # Se username já existe, adicionar sufixo
-            base_username = username
-            counter = 1
-            while User.objects.filter(username=username).exists():
-                username = f"{base_username}{counter}"
-                counter += 1
-            
-            # Criar o User com o mesmo ID
-            user = User.objects.create(
-                id=user_id,
-                username=username,
-                email=email,
-                first_name=first_name,
-                last_name=last_name,
-                is_active=True,
-                is_staff=False,
-                is_superuser=False,
-            )
-            
-            # Definir uma senha padrão (DEVE SER ALTERADA!)
-            user.set_password('senha123')
-            user.save()
-            
-            print(f"✅ Migrado: {nome} -> username: {username}")
-            migrados += 1
-        
-        print(f"\n🎉 Migração concluída! {migrados} usuários migrados.")
-        print("\n⚠️  IMPORTANTE: Todos os usuários foram criados com senha padrão 'senha123'")
+        cursor.execute(f"SELECT COUNT(*) FROM {TABELA_ANTIGA}")
+        total = cursor.fetchone()[0]
+
+    if not total:
+        print(" Nenhum usuário para migrar.")
+        return
+
+    print(f"📋 Encontrados {total} usuários para migrar...")
+
+    ids_existentes = set(User.objects.values_list('id', flat=True))
+    usernames = GeradorUsernames(User.objects.values_list('username', flat=True))
+
+    inicio = time.perf_counter()
+    lidos = migrados = pulados = 0
+    pool = None if (dry_run or sem_senha) else ProcessPoolExecutor(max_workers=processos)
+    try:
+        with transaction.atomic():
+            for linhas in ler_usuarios_antigos(lote):
+                lidos += len(linhas)
+                novos = []
+                for user_id, nome, email, _criado_em in linhas:
+                    if user_id in ids_existentes:
+                        pulados += 1
+                        continue
+                    ids_existentes.add(user_id)
+                    novos.append(montar_usuario(user_id, nome, email, usernames))
+
+                if novos and not dry_run:
+                    if sem_senha:
+                        senhas = [make_password(None) for _ in novos]
+                    else:
+                        blocos = max(1, len(novos) // ((processos or os.cpu_count() or 1) * 4))
+                        senhas = pool.map(_hash_senha, repeat(SENHA_PADRAO, len(novos)), chunksize=blocos)
+                    for user, senha in zip(novos, senhas):
+                        user.password = senha
+                    User.objects.bulk_create(novos, batch_size=lote)
+                migrados += len(novos)
+
+                decorrido = time.perf_counter() - inicio
+                print(f"   {lidos}/{total} lidos, {migrados} migrados, {pulados} já existiam "
+                      f"({lidos / max(decorrido, 1e-9):,.0f} usuários/s)")
+
+            if migrados and not dry_run:
+                # Ids explícitos não avançam a sequência no PostgreSQL
+                with connection.cursor() as cursor:
+                    for sql in connection.ops.sequence_reset_sql(no_style(), [User]):
+                        cursor.execute(sql)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    duracao = time.perf_counter() - inicio
+    if dry_run:
+        print(f"\n🔎 Dry-run: {migrados} usuários seriam migrados ({pulados} já existem). Nada foi gravado.")
+        return
+    print(f"\n🎉 Migração concluída! {migrados} usuários migrados em {duracao:.1f}s "
+          f"({pulados} já existiam).")
+    if sem_senha:
+        print("\n⚠️  IMPORTANTE: Os usuários foram criados sem senha utilizável.")
+        print("   Eles devem definir uma senha pelo fluxo de redefinição de senha.")
+    else:
+        print(f"\n⚠️  IMPORTANTE: Todos os usuários foram criados com senha padrão '{SENHA_PADRAO}'")
         print("   Oriente os usuários a alterarem suas senhas!")
 
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migra sistema_usuario para auth_user em lotes.')
+    parser.add_argument('--dry-run', action='store_true', help='Não grava nada, apenas relata.')
+    parser.add_argument('--sem-senha', action='store_true',
+                        help='Senha inutilizável (reset obrigatório) em vez da senha padrão.')
+    parser.add_argument('--lote', type=int, default=LOTE, help='Usuários por lote de leitura/INSERT.')
+    parser.add_argument('--processos', type=int, default=None,
+                        help='Processos para o hash de senhas (padrão: número de CPUs).')
+    args = parser.parse_args()
+
     print("🚀 Iniciando migração de usuários...\n")
-    migrar_usuarios()
+    migrar_usuarios(dry_run=args.dry_run, sem_senha=args.sem_senha, lote=args.lote, processos=args.processos)
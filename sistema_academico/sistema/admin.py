@@ -12,11 +12,39 @@ from .models import (
 	Atividade,
 	AlunoAtividade,
 	Aula,
+	ArquivoArmazenado,
 )
 from .forms import AlunoAdminForm
+from .paginacao import PaginatorEstimado
 
 # Configurações básicas de listagem para facilitar busca no admin.
 
+# Relações percorridas pelos __str__ (usadas nas colunas de FK e no autocomplete)
+STR_USUARIO = ("usuario",)
+STR_MODULO = ("id_turma_disciplina__id_turma", "id_turma_disciplina__id_disciplina")
+
+
+class AdminOtimizado(admin.ModelAdmin):
+	"""Base dos admins do sistema: número fixo de consultas por página.
+
+	``list_select_related`` deve cobrir as relações de ``list_display`` e dos
+	``__str__`` exibidos; ele também é aplicado em ``get_queryset``, então o
+	autocomplete (que mostra ``str(obj)``) não faz uma consulta por resultado.
+	A contagem total sem filtros é estimada em tabelas grandes e a contagem
+	completa ao filtrar não é feita. Os admins usados como destino de
+	``autocomplete_fields`` definem ``ordering``: a busca é paginada e, sem
+	ordem total, repetiria ou pularia resultados entre as páginas.
+	"""
+	show_full_result_count = False
+	paginator = PaginatorEstimado
+
+	def get_queryset(self, request):
+		queryset = super().get_queryset(request)
+		if isinstance(self.list_select_related, (list, tuple)):
+			queryset = queryset.select_related(*self.list_select_related)
+		return queryset
+
+
 class AlunoInline(admin.StackedInline):
 	model = Aluno
 	extra = 0
@@ -41,66 +69,97 @@ admin.site.unregister(User)
 admin.site.register(User, UsuarioAdmin)
 
 @admin.register(Coordenador)
-class CoordenadorAdmin(admin.ModelAdmin):
+class CoordenadorAdmin(AdminOtimizado):
 	list_display = ("usuario","usuario__email" , "telefone", "data_de_contratacao")
 	search_fields = ("usuario__username","usuario__email", "usuario__first_name", "usuario__last_name")
+	ordering = ("usuario__username",)
 	list_filter = ("data_de_contratacao",)
-	raw_id_fields = ["usuario"]
+	autocomplete_fields = ["usuario"]
+	list_select_related = STR_USUARIO
 
 @admin.register(Professor)
-class ProfessorAdmin(admin.ModelAdmin):
+class ProfessorAdmin(AdminOtimizado):
 	list_display = ("usuario","usuario__email" , "matricula", "titulacao", "data_de_contratacao")
 	search_fields = ("usuario__username","usuario__email", "usuario__first_name", "usuario__last_name", "matricula")
+	ordering = ("matricula",)
 	list_filter = ("titulacao", "data_de_contratacao")
-	raw_id_fields = ["usuario"]
+	autocomplete_fields = ["usuario"]
+	list_select_related = STR_USUARIO
 
 @admin.register(Aluno)
-class AlunoAdmin(admin.ModelAdmin):
+class AlunoAdmin(AdminOtimizado):
 	form = AlunoAdminForm
 	list_display = ("usuario", "matricula", "cpf", "data_de_nascimento")
 	search_fields = ("usuario__username", "usuario__email", "usuario__first_name", "usuario__last_name", "matricula", "cpf")
+	ordering = ("matricula",)
 	list_filter = ("data_de_nascimento",)
-	raw_id_fields = ["usuario"]
+	autocomplete_fields = ["usuario"]
+	list_select_related = STR_USUARIO
 
 @admin.register(Disciplina)
-class DisciplinaAdmin(admin.ModelAdmin):
+class DisciplinaAdmin(AdminOtimizado):
 	list_display = ("nome", "carga_horaria")
 	search_fields = ("nome",)
 	ordering = ("nome",)
 
 @admin.register(ProfessorDisciplina)
-class ProfessorDisciplinaAdmin(admin.ModelAdmin):
+class ProfessorDisciplinaAdmin(AdminOtimizado):
 	list_display = ("id_professor", "id_disciplina")
 	search_fields = ("id_professor__usuario__username", "id_professor__usuario__first_name", "id_professor__usuario__last_name", "id_disciplina__nome")
 	list_filter = ("id_disciplina",)
+	autocomplete_fields = ["id_professor", "id_disciplina"]
+	list_select_related = ("id_professor__usuario", "id_disciplina")
 
 @admin.register(Turma)
-class TurmaAdmin(admin.ModelAdmin):
+class TurmaAdmin(AdminOtimizado):
 	list_display = ("nome", "curso", "semestre", "id_coordenador")
 	search_fields = ("nome", "curso", "semestre")
+	ordering = ("-semestre", "nome", "pk")
 	list_filter = ("semestre", "curso")
+	autocomplete_fields = ["id_coordenador", "alunos"]
+	list_select_related = ("id_coordenador__usuario",)
 
 @admin.register(TurmaDisciplina)
-class TurmaDisciplinaAdmin(admin.ModelAdmin):
+class TurmaDisciplinaAdmin(AdminOtimizado):
 	list_display = ("id_turma", "id_disciplina", "id_professor", "data_inicio", "data_fim")
 	search_fields = ("id_turma__nome", "id_disciplina__nome", "id_professor__usuario__username", "id_professor__usuario__first_name", "id_professor__usuario__last_name")
+	ordering = ("-pk",)
 	list_filter = ("data_inicio", "data_fim")
+	autocomplete_fields = ["id_turma", "id_disciplina", "id_professor"]
+	list_select_related = ("id_turma", "id_disciplina", "id_professor__usuario")
 
 @admin.register(Atividade)
-class AtividadeAdmin(admin.ModelAdmin):
+class AtividadeAdmin(AdminOtimizado):
 	list_display = ("id_turma_disciplina", "data", "descricao")
 	search_fields = ("descricao", "id_turma_disciplina__id_disciplina__nome")
+	ordering = ("-data", "-pk")
 	list_filter = ("data",)
+	autocomplete_fields = ["id_turma_disciplina"]
+	list_select_related = STR_MODULO
 
 @admin.register(AlunoAtividade)
-class AlunoAtividadeAdmin(admin.ModelAdmin):
+class AlunoAtividadeAdmin(AdminOtimizado):
 	list_display = ("id_aluno", "id_atividade", "nota", "data_entrega")
 	search_fields = ("id_aluno__usuario__username", "id_aluno__usuario__first_name", "id_aluno__usuario__last_name", "id_atividade__id_turma_disciplina__id_disciplina__nome")
 	list_filter = ("data_entrega", "nota")
+	autocomplete_fields = ["id_aluno", "id_atividade"]
+	list_select_related = ("id_aluno__usuario", "id_atividade__id_turma_disciplina__id_turma", "id_atividade__id_turma_disciplina__id_disciplina")
 
 @admin.register(Aula)
-class AulaAdmin(admin.ModelAdmin):
+class AulaAdmin(AdminOtimizado):
 	list_display = ("id_turma_disciplina", "data", "conteudo")
 	search_fields = ("id_turma_disciplina__id_disciplina__nome", "conteudo")
 	list_filter = ("data",)
-
+	autocomplete_fields = ["id_turma_disciplina"]
+	list_select_related = STR_MODULO
+
+@admin.register(ArquivoArmazenado)
+class ArquivoArmazenadoAdmin(AdminOtimizado):
+	list_display = ("nome", "tamanho", "referencias", "ultimo_uso")
+	search_fields = ("nome", "sha256")
+	list_filter = ("ultimo_uso",)
+	readonly_fields = ("nome", "sha256", "tamanho", "referencias", "ultimo_uso")
+
+	def has_add_permission(self, request):
+		# Criados pelo armazenamento a cada upload; apagados por limpar_arquivos_orfaos
+		return False
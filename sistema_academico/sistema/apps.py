@@ -5,3 +5,8 @@ class SistemaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sistema'
 
+    def ready(self):
+        from . import armazenamento, checks, contadores, perfis  # noqa: F401 (checks registra as verificações)
+        armazenamento.conectar_sinais()
+        contadores.conectar_sinais()
+        perfis.conectar_sinais()
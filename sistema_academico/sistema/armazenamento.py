@@ -0,0 +1,327 @@
+"""Armazenamento das entregas endereçado por conteúdo (SHA-256).
+
+``UploadVerificadoHandler`` recebe o upload em blocos, calcula o SHA-256 e
+aplica os limites de tamanho e de extensão enquanto o corpo chega: arquivos
+proibidos são descartados sem gravação e um corpo maior que o limite é
+recusado antes de ser lido. É instalado só na view de entrega (os demais
+uploads, como importações CSV e o admin, usam os handlers padrão).
+
+``ArmazenamentoDeduplicado`` grava cada conteúdo uma única vez em
+``entregas/sha256/ab/cd/<hash><ext>``; reenvios do mesmo arquivo apenas
+reaproveitam o existente. As referências de cada arquivo ficam em
+``ArquivoArmazenado.referencias`` (mantidas pelos sinais de
+``AlunoAtividade``) e o comando ``limpar_arquivos_orfaos`` apaga os que não
+são mais usados.
+
+``servir_arquivo`` envia um arquivo já autorizado pela view: delega ao
+servidor web (``X-Accel-Redirect``/``X-Sendfile``) quando configurado ou
+responde com ``Range`` (downloads retomáveis), ``ETag`` e 304.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import SkipFile, StopUpload, TemporaryFileUploadHandler
+from django.db.models import Count, F
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_etags
+
+PREFIXO = 'entregas/sha256'
+BLOCO = 64 * 1024
+# Folga para os cabeçalhos multipart e demais campos do formulário
+MARGEM_CORPO = 64 * 1024
+_NAO_CARREGADO = object()
+
+
+def tamanho_maximo():
+    return settings.UPLOAD_TAMANHO_MAXIMO
+
+
+def validar_arquivo(nome, tamanho=None):
+    """Mensagem de erro se o arquivo violar os limites de extensão/tamanho; ``None`` se ok."""
+    extensao = os.path.splitext(nome or '')[1].lower()
+    if extensao not in settings.UPLOAD_EXTENSOES:
+        permitidas = ', '.join(sorted(settings.UPLOAD_EXTENSOES))
+        return f'Tipo de arquivo não permitido ({extensao or "sem extensão"}). Use: {permitidas}.'
+    if tamanho is not None and tamanho > tamanho_maximo():
+        return f'Arquivo maior que o limite de {tamanho_maximo() // (1024 * 1024)} MB.'
+    return None
+
+
+def _registrar_erro(request, erro):
+    if not hasattr(request, 'erros_upload'):
+        request.erros_upload = []
+    request.erros_upload.append(erro)
+
+
+class UploadVerificadoHandler(TemporaryFileUploadHandler):
+    """Upload em arquivo temporário com SHA-256 e limites verificados durante a leitura.
+
+    Os erros ficam em ``request.erros_upload`` para a view repassar ao formulário.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.tamanho_corpo = content_length
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        erro = validar_arquivo(file_name)
+        if erro:
+            _registrar_erro(self.request, erro)
+            raise SkipFile()
+        if (self.tamanho_corpo or 0) > tamanho_maximo() + MARGEM_CORPO:
+            _registrar_erro(self.request, validar_arquivo(file_name, self.tamanho_corpo))
+            # Recusa sem ler o restante do corpo
+            raise StopUpload(connection_reset=True)
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.recebido = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.recebido += len(raw_data)
+        if self.recebido > tamanho_maximo():
+            _registrar_erro(self.request, validar_arquivo(self.file_name, self.recebido))
+            self.file.close()
+            raise SkipFile()
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        arquivo = super().file_complete(file_size)
+        arquivo.sha256 = self.sha256.hexdigest()
+        return arquivo
+
+
+def _sha256(conteudo):
+    digest = hashlib.sha256()
+    if hasattr(conteudo, 'seek'):
+        conteudo.seek(0)
+    for bloco in conteudo.chunks(BLOCO):
+        digest.update(bloco)
+    if hasattr(conteudo, 'seek'):
+        conteudo.seek(0)
+    return digest.hexdigest()
+
+
+def nome_por_conteudo(digest, nome_original):
+    extensao = os.path.splitext(nome_original)[1].lower()[:10]
+    return f'{PREFIXO}/{digest[:2]}/{digest[2:4]}/{digest}{extensao}'
+
+
+def eh_deduplicado(nome):
+    return bool(nome) and nome.startswith(PREFIXO + '/')
+
+
+class ArmazenamentoDeduplicado(FileSystemStorage):
+    """``FileSystemStorage`` que grava cada conteúdo uma vez, sob o próprio hash.
+
+    Arquivos antigos (fora de ``PREFIXO``) continuam sendo lidos normalmente.
+    """
+
+    def __init__(self, **kwargs):
+        # Dois envios simultâneos do mesmo conteúdo escrevem bytes idênticos no mesmo nome
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    def _save(self, name, content):
+        ArquivoArmazenado = apps.get_model('sistema', 'ArquivoArmazenado')
+        digest = getattr(content, 'sha256', None) or _sha256(content)
+        nome = nome_por_conteudo(digest, name)
+        if self.exists(nome):
+            # Reaproveitado: renova o uso para a limpeza de órfãos não apagá-lo agora
+            atualizados = ArquivoArmazenado.objects.filter(nome=nome).update(ultimo_uso=timezone.now())
+            if atualizados:
+                return nome
+        nome = super()._save(nome, content)
+        ArquivoArmazenado.objects.update_or_create(
+            nome=nome, defaults={'sha256': digest, 'tamanho': content.size, 'ultimo_uso': timezone.now()},
+        )
+        return nome
+
+
+def armazenamento_entregas():
+    return ArmazenamentoDeduplicado()
+
+
+def registrar_descartado(nome):
+    """Registra, sem referências, um arquivo gravado por um INSERT que foi desfeito.
+
+    O registro criado em ``_save`` volta junto com o rollback e o arquivo só
+    sairia com ``--varrer-disco``; registrado, sai na limpeza normal após a
+    carência. Apagar na hora não é seguro: um envio simultâneo do mesmo
+    conteúdo pode estar gravando o mesmo nome.
+    """
+    storage = armazenamento_entregas()
+    if not eh_deduplicado(nome) or not storage.exists(nome):
+        return
+    apps.get_model('sistema', 'ArquivoArmazenado').objects.get_or_create(nome=nome, defaults={
+        'sha256': os.path.splitext(os.path.basename(nome))[0],
+        'tamanho': storage.size(nome),
+        'ultimo_uso': timezone.now(),
+    })
+
+
+# ==================== Envio de arquivos ====================
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def etag_arquivo(storage, nome):
+    """ETag forte para arquivos deduplicados (o nome é o hash); fraca por data/tamanho nos antigos."""
+    if eh_deduplicado(nome):
+        return '"%s"' % os.path.splitext(os.path.basename(nome))[0]
+    return 'W/"%x-%x"' % (int(storage.get_modified_time(nome).timestamp()), storage.size(nome))
+
+
+def _intervalo(cabecalho, tamanho):
+    """``(inicio, fim)`` inclusivo de um ``Range`` simples; ``None`` se ausente/múltiplo; ``False`` se insatisfazível."""
+    encontrado = _RANGE.match((cabecalho or '').replace(' ', ''))
+    if not encontrado or encontrado.groups() == ('', ''):
+        return None
+    inicio, fim = encontrado.groups()
+    if not inicio:
+        # bytes=-N: os últimos N bytes
+        inicio, fim = max(0, tamanho - int(fim)), tamanho - 1
+    else:
+        inicio, fim = int(inicio), min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio >= tamanho or inicio > fim:
+        return False
+    return inicio, fim
+
+
+def _trecho(arquivo, inicio, quantidade):
+    try:
+        arquivo.seek(inicio)
+        while quantidade > 0:
+            bloco = arquivo.read(min(BLOCO, quantidade))
+            if not bloco:
+                break
+            quantidade -= len(bloco)
+            yield bloco
+    finally:
+        arquivo.close()
+
+
+def servir_arquivo(request, storage, nome, nome_download):
+    """Resposta com o arquivo ``nome`` do ``storage`` (a permissão já foi verificada)."""
+    content_type = mimetypes.guess_type(nome_download)[0] or 'application/octet-stream'
+    disposicao = content_disposition_header(True, nome_download)
+
+    modo = settings.ARQUIVOS_ENVIO
+    if modo:
+        response = HttpResponse(content_type=content_type)
+        if modo == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = quote(settings.ARQUIVOS_ENVIO_PREFIXO.rstrip('/') + '/' + nome)
+        else:
+            response['X-Sendfile'] = storage.path(nome)
+        response['Content-Disposition'] = disposicao
+        return response
+
+    etag = etag_arquivo(storage, nome)
+    modificado = storage.get_modified_time(nome).timestamp()
+    nao_modificado = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if nao_modificado is not None:
+        return nao_modificado
+
+    tamanho = storage.size(nome)
+    intervalo = _intervalo(request.headers.get('Range'), tamanho)
+    if_range = request.headers.get('If-Range')
+    if intervalo is not None and if_range and if_range not in parse_etags(etag) and if_range != http_date(modificado):
+        # O arquivo mudou desde o download parcial: envia inteiro
+        intervalo = None
+
+    if intervalo is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{tamanho}'
+    elif intervalo is None:
+        response = FileResponse(storage.open(nome, 'rb'), content_type=content_type)
+        response['Content-Length'] = tamanho
+    else:
+        inicio, fim = intervalo
+        response = StreamingHttpResponse(
+            _trecho(storage.open(nome, 'rb'), inicio, fim - inicio + 1), status=206, content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+        response['Content-Length'] = fim - inicio + 1
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modificado)
+    response['Content-Disposition'] = disposicao
+    # Só o dono/professor pode ver: nada de caches compartilhados
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+# ==================== Contagem de referências ====================
+
+def _ajustar_referencias(nome, delta):
+    if eh_deduplicado(nome):
+        apps.get_model('sistema', 'ArquivoArmazenado').objects.filter(nome=nome).update(
+            referencias=F('referencias') + delta
+        )
+
+
+def _lembrar_arquivo(sender, instance, **kwargs):
+    # Nome carregado do banco: o pre_save compara com ele em vez de consultar
+    valor = instance.__dict__.get('arquivo', _NAO_CARREGADO)
+    instance._arquivo_salvo = getattr(valor, 'name', valor)
+
+
+def _guardar_anterior(sender, instance, update_fields=None, **kwargs):
+    instance._arquivo_anterior = None
+    if instance.pk is None or (update_fields is not None and 'arquivo' not in update_fields):
+        return
+    salvo = getattr(instance, '_arquivo_salvo', _NAO_CARREGADO)
+    if instance._state.adding or salvo is _NAO_CARREGADO:
+        # pk atribuído à mão ou campo adiado (only/defer): só o banco sabe o nome anterior
+        salvo = sender.objects.filter(pk=instance.pk).values_list('arquivo', flat=True).first()
+    instance._arquivo_anterior = salvo
+
+
+def _referenciar(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'arquivo' not in update_fields:
+        return
+    anterior = getattr(instance, '_arquivo_anterior', None) or ''
+    atual = instance.arquivo.name or ''
+    if anterior != atual:
+        _ajustar_referencias(atual, 1)
+        _ajustar_referencias(anterior, -1)
+    instance._arquivo_salvo = atual
+
+
+def _liberar(sender, instance, **kwargs):
+    _ajustar_referencias(instance.arquivo.name, -1)
+
+
+def reconciliar_referencias():
+    """Recalcula ``referencias`` a partir das entregas (corrige desvios de updates em massa)."""
+    ArquivoArmazenado = apps.get_model('sistema', 'ArquivoArmazenado')
+    AlunoAtividade = apps.get_model('sistema', 'AlunoAtividade')
+    contagens = dict(
+        AlunoAtividade.objects.filter(arquivo__startswith=PREFIXO + '/')
+        .values('arquivo').annotate(total=Count('pk')).values_list('arquivo', 'total')
+    )
+    alterados = []
+    for arquivo in ArquivoArmazenado.objects.only('nome', 'referencias').iterator():
+        total = contagens.get(arquivo.nome, 0)
+        if arquivo.referencias != total:
+            arquivo.referencias = total
+            alterados.append(arquivo)
+    ArquivoArmazenado.objects.bulk_update(alterados, ['referencias'], batch_size=500)
+    return len(alterados)
+
+
+def conectar_sinais():
+    AlunoAtividade = apps.get_model('sistema', 'AlunoAtividade')
+    post_init.connect(_lembrar_arquivo, sender=AlunoAtividade, dispatch_uid='armazenamento_post_init')
+    pre_save.connect(_guardar_anterior, sender=AlunoAtividade, dispatch_uid='armazenamento_pre_save')
+    post_save.connect(_referenciar, sender=AlunoAtividade, dispatch_uid='armazenamento_post_save')
+    post_delete.connect(_liberar, sender=AlunoAtividade, dispatch_uid='armazenamento_post_delete')
@@ -0,0 +1,74 @@
+"""Verificações de inicialização (``manage.py check``/``runserver``): conexão com o banco e cache de perfis."""
+
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+
+def _usa_pool(config):
+    return bool(config.get('OPTIONS', {}).get('pool'))
+
+
+@register()
+def verificar_conexoes(app_configs, **kwargs):
+    """Confere a configuração de reaproveitamento de conexões de cada banco PostgreSQL."""
+    problemas = []
+    for alias, config in settings.DATABASES.items():
+        if config.get('ENGINE') != 'django.db.backends.postgresql':
+            continue
+        if _usa_pool(config):
+            if find_spec('psycopg') is None or find_spec('psycopg_pool') is None:
+                problemas.append(Error(
+                    f'O banco "{alias}" usa pool de conexões, mas psycopg 3 / psycopg_pool não estão instalados.',
+                    hint='pip install "psycopg[binary,pool]" ou defina DATABASE_POOL=False.',
+                    id='sistema.E001',
+                ))
+            if config.get('CONN_MAX_AGE'):
+                problemas.append(Error(
+                    f'O banco "{alias}" usa pool de conexões com CONN_MAX_AGE diferente de 0.',
+                    hint='Com o pool, as conexões não são persistentes: use CONN_MAX_AGE=0.',
+                    id='sistema.E002',
+                ))
+        elif not config.get('CONN_MAX_AGE'):
+            problemas.append(Warning(
+                f'O banco "{alias}" abre uma conexão nova a cada requisição.',
+                hint='Defina DATABASE_CONN_MAX_AGE (segundos) ou DATABASE_POOL=True.',
+                id='sistema.W001',
+            ))
+    return problemas
+
+
+# Maior validade aceitável dos perfis em um cache que não é compartilhado entre processos
+MAX_PERFIS_CACHE_LOCAL = 60
+
+
+@register()
+def verificar_cache_perfis(app_configs, **kwargs):
+    """Avisa quando os perfis (usados em permissões) ficam muito tempo num cache por processo."""
+    backend = settings.CACHES['default']['BACKEND']
+    timeout = getattr(settings, 'PERFIS_CACHE_TIMEOUT', 3600)
+    if backend.endswith('LocMemCache') and (timeout is None or timeout > MAX_PERFIS_CACHE_LOCAL):
+        return [Warning(
+            f'Perfis em cache local por {timeout}s: com vários processos, uma mudança de papel só '
+            'vale nos outros workers quando a entrada expira.',
+            hint=f'Use um cache compartilhado (CACHE_URL) ou PERFIS_CACHE_TIMEOUT <= {MAX_PERFIS_CACHE_LOCAL}.',
+            id='sistema.W002',
+        )]
+    return []
+
+
+def estatisticas_conexao(connection):
+    """Configuração e métricas da conexão/pool de ``connection`` (para monitoramento)."""
+    config = connection.settings_dict
+    dados = {
+        'banco': connection.vendor,
+        'alias': connection.alias,
+        'conn_max_age': config.get('CONN_MAX_AGE'),
+        'conn_health_checks': config.get('CONN_HEALTH_CHECKS'),
+        'pool': None,
+    }
+    if _usa_pool(config) and getattr(connection, 'pool', None) is not None:
+        # psycopg_pool: pool_size, pool_available, requests_waiting, requests_wait_ms, ...
+        dados['pool'] = connection.pool.get_stats()
+    return dados
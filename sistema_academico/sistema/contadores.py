@@ -0,0 +1,77 @@
+"""Contadores do painel inicial (home) mantidos em cache.
+
+Os totais de alunos, professores, turmas e disciplinas ficam no cache do
+Django e são ajustados incrementalmente pelos sinais ``post_save`` /
+``post_delete`` dos modelos, de modo que a home não consulta o banco em regime
+normal. Operações que não disparam sinais (``bulk_create``, ``QuerySet.delete``
+em massa, SQL direto) e caches por processo (locmem) podem divergir; por isso
+as chaves expiram após ``CONTADORES_CACHE_TIMEOUT`` segundos e o comando
+``manage.py reconciliar_contadores`` recalcula tudo a partir do banco.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import Aluno, Disciplina, Professor, Turma
+
+CONTADORES = {
+    'total_alunos': Aluno,
+    'total_professores': Professor,
+    'total_turmas': Turma,
+    'total_disciplinas': Disciplina,
+}
+PREFIXO = 'sistema:contador:'
+
+
+def _timeout():
+    return getattr(settings, 'CONTADORES_CACHE_TIMEOUT', 300)
+
+
+def obter_contadores():
+    """Devolve ``{nome: total}``; só consulta o banco para chaves ausentes no cache."""
+    chaves = {PREFIXO + nome: nome for nome in CONTADORES}
+    em_cache = cache.get_many(chaves)
+    totais = {chaves[chave]: valor for chave, valor in em_cache.items()}
+
+    faltantes = {nome: CONTADORES[nome].objects.count() for nome in CONTADORES if nome not in totais}
+    if faltantes:
+        cache.set_many({PREFIXO + nome: total for nome, total in faltantes.items()}, _timeout())
+        totais.update(faltantes)
+    return totais
+
+
+def reconciliar_contadores():
+    """Recalcula todos os contadores a partir do banco e regrava o cache."""
+    totais = {nome: modelo.objects.count() for nome, modelo in CONTADORES.items()}
+    cache.set_many({PREFIXO + nome: total for nome, total in totais.items()}, _timeout())
+    return totais
+
+
+def _ajustar(nome, delta):
+    try:
+        cache.incr(PREFIXO + nome, delta)
+    except ValueError:
+        # Chave ausente/expirada: a próxima leitura recalcula pelo banco.
+        pass
+
+
+def _ao_salvar(sender, created, raw=False, **kwargs):
+    if created and not raw:
+        nome = _NOMES[sender]
+        transaction.on_commit(lambda: _ajustar(nome, 1))
+
+
+def _ao_excluir(sender, **kwargs):
+    nome = _NOMES[sender]
+    transaction.on_commit(lambda: _ajustar(nome, -1))
+
+
+_NOMES = {modelo: nome for nome, modelo in CONTADORES.items()}
+
+
+def conectar_sinais():
+    for modelo in CONTADORES.values():
+        post_save.connect(_ao_salvar, sender=modelo, dispatch_uid=f'contadores_save_{modelo.__name__}')
+        post_delete.connect(_ao_excluir, sender=modelo, dispatch_uid=f'contadores_delete_{modelo.__name__}')
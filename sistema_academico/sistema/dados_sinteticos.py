@@ -0,0 +1,224 @@
+"""Gerador de dados sintéticos para testes de desempenho e benchmarks.
+
+Cria coordenadores, professores, alunos (com CPF em formato válido e
+matrícula única), disciplinas, turmas, módulos (``TurmaDisciplina``),
+matrículas nos módulos (``AlunoModulo``), atividades, entregas e aulas. Os
+objetos são gerados sob demanda e inseridos com ``bulk_create`` em lotes, de
+modo que a memória não cresce com o volume (apenas os ids de alunos e
+atividades são mantidos). A geração é determinística para uma mesma ``seed``
+e ``prefixo``; prefixos diferentes podem coexistir no mesmo banco (os CPFs
+continuam a partir do maior já cadastrado, sem colidir com lotes anteriores).
+"""
+
+import random
+import re
+from datetime import date, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+
+from .contadores import reconciliar_contadores
+from .models import (
+    Aluno,
+    AlunoAtividade,
+    AlunoModulo,
+    Atividade,
+    Aula,
+    Coordenador,
+    Disciplina,
+    Professor,
+    Turma,
+    TurmaDisciplina,
+)
+
+SENHA_PADRAO = 'senha123'
+LOTE = 1000
+INICIO_SEMESTRE = date(2025, 3, 1)
+
+
+def gerar_cpf(numero):
+    """CPF formatado (XXX.XXX.XXX-XX) com dígitos verificadores válidos para ``numero``."""
+    digitos = [int(c) for c in f'{numero % 10 ** 9:09d}']
+    for _ in range(2):
+        soma = sum(d * peso for d, peso in zip(digitos, range(len(digitos) + 1, 1, -1)))
+        resto = soma * 10 % 11
+        digitos.append(0 if resto == 10 else resto)
+    s = ''.join(map(str, digitos))
+    return f'{s[:3]}.{s[3:6]}.{s[6:9]}-{s[9:]}'
+
+
+def _lotes(iteravel, tamanho):
+    iterador = iter(iteravel)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+def _maior_cpf():
+    """Base (9 primeiros dígitos) do maior CPF já cadastrado em qualquer perfil; 0 se nenhum.
+
+    O formato XXX.XXX.XXX-XX tem largura fixa, então o maior texto é o maior número.
+    """
+    maiores = (
+        modelo.objects.aggregate(maior=Max('cpf'))['maior'] for modelo in (Coordenador, Professor, Aluno)
+    )
+    return max((int(re.sub(r'\D', '', cpf)[:9] or 0) for cpf in maiores if cpf), default=0)
+
+
+class _Gerador:
+    def __init__(self, seed, prefixo, lote, progresso):
+        self.rnd = random.Random(seed)
+        self.prefixo = prefixo
+        self.lote = lote
+        self.progresso = progresso
+        self.senha = make_password(SENHA_PADRAO)
+        self.totais = {}
+        self._proximo_cpf = _maior_cpf()
+
+    def inserir(self, modelo, objetos, guardar_ids=False):
+        """Insere ``objetos`` (iterável preguiçoso) em lotes; opcionalmente devolve os pks."""
+        ids = []
+        tabela = modelo._meta.db_table
+        for lote in _lotes(objetos, self.lote):
+            criados = modelo.objects.bulk_create(lote)
+            if guardar_ids:
+                ids.extend(obj.pk for obj in criados)
+            self.totais[tabela] = self.totais.get(tabela, 0) + len(criados)
+            if self.progresso:
+                self.progresso(tabela, self.totais[tabela])
+        return ids
+
+    def cpf(self):
+        self._proximo_cpf += 1
+        if self._proximo_cpf >= 10 ** 9:
+            raise ValueError('Faixa de CPFs sintéticos esgotada')
+        return gerar_cpf(self._proximo_cpf)
+
+    def usuarios(self, papel, quantidade):
+        return self.inserir(User, (
+            User(username=f'{self.prefixo}_{papel}{i}', first_name=papel.capitalize(), last_name=str(i),
+                 email=f'{self.prefixo}_{papel}{i}@exemplo.edu.br', password=self.senha)
+            for i in range(quantidade)
+        ), guardar_ids=True)
+
+    def nota(self):
+        return round(self.rnd.uniform(0, 10), 1)
+
+
+@transaction.atomic
+def gerar_dados(turmas=2, alunos_por_turma=10, modulos_por_turma=2, atividades_por_modulo=3,
+                taxa_entrega=0.8, seed=42, prefixo='sint', coordenadores=1, professores=None,
+                aulas_por_modulo=0, lote=LOTE, progresso=None):
+    """Gera um conjunto de dados coerente e devolve um resumo.
+
+    Cada turma recebe ``alunos_por_turma`` alunos próprios e os mesmos
+    ``modulos_por_turma`` disciplinas, com professores distribuídos em rodízio
+    (``professores`` padrão = ``modulos_por_turma``). Todos os usuários recebem
+    a senha ``SENHA_PADRAO`` (hash calculado uma vez). ``progresso(nome, total)``
+    é chamado após cada lote inserido.
+
+    O resumo traz uma instância de exemplo de cada modelo (para testes) e
+    ``totais`` com o número de linhas inseridas por tabela.
+    """
+    professores = modulos_por_turma if professores is None else professores
+    if turmas > 0 and modulos_por_turma > 0 and professores < 1:
+        raise ValueError('É preciso ao menos um professor para gerar módulos.')
+    g = _Gerador(seed, prefixo, lote, progresso)
+    rnd = g.rnd
+
+    ids_coord = g.inserir(Coordenador, (
+        Coordenador(usuario_id=pk, cpf=g.cpf(), data_de_contratacao=INICIO_SEMESTRE)
+        for pk in g.usuarios('coordenador', coordenadores)
+    ), guardar_ids=True)
+    ids_prof = g.inserir(Professor, (
+        Professor(usuario_id=pk, matricula=f'{prefixo}P{i:07d}', cpf=g.cpf(),
+                  data_de_contratacao=INICIO_SEMESTRE, titulacao=rnd.choice(['Especialista', 'Mestre', 'Doutor']))
+        for i, pk in enumerate(g.usuarios('professor', professores))
+    ), guardar_ids=True)
+    ids_disc = g.inserir(Disciplina, (
+        Disciplina(nome=f'{prefixo} Disciplina {i}', carga_horaria=rnd.choice([40, 60, 80]))
+        for i in range(modulos_por_turma)
+    ), guardar_ids=True)
+    ids_aluno = g.inserir(Aluno, (
+        Aluno(usuario_id=pk, matricula=f'{prefixo}A{i:08d}', cpf=g.cpf(),
+              data_de_nascimento=date(1995, 1, 1) + timedelta(days=i % 3650))
+        for i, pk in enumerate(g.usuarios('aluno', turmas * alunos_por_turma))
+    ), guardar_ids=True)
+    ids_turma = g.inserir(Turma, (
+        Turma(nome=f'{prefixo} Turma {i}', semestre=f'{2024 + i % 2}.{1 + i % 2}',
+              curso=rnd.choice(['ADS', 'Direito', 'Engenharia']),
+              id_coordenador_id=ids_coord[i % len(ids_coord)] if ids_coord else None)
+        for i in range(turmas)
+    ), guardar_ids=True)
+
+    def alunos_da_turma(t):
+        return ids_aluno[t * alunos_por_turma:(t + 1) * alunos_por_turma]
+
+    Through = Turma.alunos.through
+    g.inserir(Through, (
+        Through(turma_id=turma_id, aluno_id=aluno_id)
+        for t, turma_id in enumerate(ids_turma) for aluno_id in alunos_da_turma(t)
+    ))
+
+    # Índice da turma de cada módulo/atividade, para não depender de buscas em lista
+    turma_do_modulo = [t for t in range(len(ids_turma)) for _ in ids_disc]
+    ids_modulo = g.inserir(TurmaDisciplina, (
+        TurmaDisciplina(id_turma_id=turma_id, id_disciplina_id=disc_id,
+                        id_professor_id=ids_prof[(t * len(ids_disc) + d) % len(ids_prof)],
+                        data_inicio=INICIO_SEMESTRE, data_fim=INICIO_SEMESTRE + timedelta(days=120))
+        for t, turma_id in enumerate(ids_turma) for d, disc_id in enumerate(ids_disc)
+    ), guardar_ids=True)
+
+    def matriculas():
+        for modulo_id, t in zip(ids_modulo, turma_do_modulo):
+            for aluno_id in alunos_da_turma(t):
+                p1, p2 = g.nota(), g.nota()
+                media = round((p1 + p2) / 2, 2)
+                yield AlunoModulo(
+                    id_aluno_id=aluno_id, id_turma_disciplina_id=modulo_id, nota_prova1=p1, nota_prova2=p2,
+                    media_final=media, status='aprovado' if media >= 7 else 'reprovado',
+                )
+    g.inserir(AlunoModulo, matriculas())
+
+    turma_da_atividade = [t for t in turma_do_modulo for _ in range(atividades_por_modulo)]
+    ids_atividade = g.inserir(Atividade, (
+        Atividade(data=INICIO_SEMESTRE + timedelta(days=7 * i), descricao=f'Atividade {i}',
+                  id_turma_disciplina_id=modulo_id)
+        for modulo_id in ids_modulo for i in range(atividades_por_modulo)
+    ), guardar_ids=True)
+
+    def entregas():
+        for atividade_id, t in zip(ids_atividade, turma_da_atividade):
+            for aluno_id in alunos_da_turma(t):
+                if rnd.random() < taxa_entrega:
+                    yield AlunoAtividade(
+                        id_aluno_id=aluno_id, id_atividade_id=atividade_id, resposta_texto='Resposta',
+                        nota=g.nota() if rnd.random() < 0.5 else None,
+                    )
+    g.inserir(AlunoAtividade, entregas())
+
+    g.inserir(Aula, (
+        Aula(id_turma_disciplina_id=modulo_id, data=INICIO_SEMESTRE + timedelta(days=2 * i),
+             conteudo=f'Aula {i + 1}')
+        for modulo_id in ids_modulo for i in range(aulas_por_modulo)
+    ))
+
+    # bulk_create não dispara sinais: recalcula os contadores da home
+    transaction.on_commit(reconciliar_contadores)
+
+    def exemplo(modelo, ids):
+        return modelo.objects.get(pk=ids[0]) if ids else None
+
+    return {
+        'coordenador': exemplo(Coordenador, ids_coord),
+        'professor': exemplo(Professor, ids_prof),
+        'aluno': exemplo(Aluno, ids_aluno),
+        'turma': exemplo(Turma, ids_turma),
+        'modulo': exemplo(TurmaDisciplina, ids_modulo),
+        'atividade': exemplo(Atividade, ids_atividade),
+        'entrega': AlunoAtividade.objects.filter(id_atividade_id__in=ids_atividade[:1]).order_by('pk').first(),
+        'disciplina': exemplo(Disciplina, ids_disc),
+        'totais': g.totais,
+    }
@@ -0,0 +1,283 @@
+"""Estatísticas de notas calculadas em uma única passada.
+
+``EstatisticasNotas`` acumula contagem, média, mínimo, máximo e variância
+(algoritmo de Welford) e um histograma compacto para percentis, sem guardar
+a lista de notas. Os leitores ``ler_notas_json`` e ``ler_notas_texto``
+extraem as notas de um corpo HTTP lido em blocos, de modo que a memória usada
+não cresce com o tamanho da entrada.
+
+``estatisticas_banco`` faz o caminho inverso: agrega as notas já gravadas
+(``AlunoModulo`` / ``AlunoAtividade``) direto no banco, em uma única consulta.
+"""
+
+import json
+import math
+
+from django.db.models import Avg, Count, FloatField, Max, Min, Q
+from django.db.models.functions import Cast
+
+from .fluxo_json import LeitorJSON, decodificar_blocos
+from .models import AlunoAtividade, AlunoModulo
+
+BLOCO = 64 * 1024
+PERCENTIS = (25, 50, 75, 90)
+
+
+class NotaInvalida(ValueError):
+    """Valor da entrada que não pode ser interpretado como nota."""
+
+
+class EstatisticasNotas:
+    """Acumulador incremental de estatísticas de notas.
+
+    Os percentis vêm de um histograma com baldes de largura ``0.01`` (exato
+    para notas com duas casas decimais). O balde ``k`` cobre
+    ``[k * largura, (k + 1) * largura)``. Se o número de baldes passar de
+    ``max_baldes``, a largura dobra e cada par ``2j, 2j + 1`` é fundido no
+    balde ``j``, mantendo a memória limitada ao custo de precisão nos
+    percentis.
+    """
+
+    def __init__(self, max_baldes=4096):
+        self.quantidade = 0
+        self.media = 0.0
+        self._m2 = 0.0
+        self.minimo = None
+        self.maximo = None
+        self.largura = 0.01
+        self.max_baldes = max_baldes
+        self._baldes = {}
+
+    def adicionar(self, valor):
+        valor = float(valor)
+        if not math.isfinite(valor):
+            raise NotaInvalida(valor)
+        self.quantidade += 1
+        delta = valor - self.media
+        self.media += delta / self.quantidade
+        self._m2 += delta * (valor - self.media)
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+        if self.maximo is None or valor > self.maximo:
+            self.maximo = valor
+
+        chave = self._chave(valor)
+        self._baldes[chave] = self._baldes.get(chave, 0) + 1
+        if len(self._baldes) > self.max_baldes:
+            self._compactar()
+
+    def _chave(self, valor):
+        # Arredonda antes do piso para 7.5 / 0.01 (= 749.999...) cair no balde 750
+        return math.floor(round(valor / self.largura, 9))
+
+    def _compactar(self):
+        baldes = {}
+        for chave, qtd in self._baldes.items():
+            baldes[chave // 2] = baldes.get(chave // 2, 0) + qtd
+        self._baldes = baldes
+        self.largura *= 2
+
+    @property
+    def variancia(self):
+        """Variância populacional."""
+        if not self.quantidade:
+            return None
+        return self._m2 / self.quantidade
+
+    @property
+    def desvio_padrao(self):
+        variancia = self.variancia
+        return None if variancia is None else math.sqrt(variancia)
+
+    def percentil(self, p):
+        """Percentil ``p`` (0-100) pelo método nearest-rank sobre o histograma."""
+        if not self.quantidade:
+            return None
+        alvo = max(1, math.ceil(p / 100 * self.quantidade))
+        acumulado = 0
+        for chave in sorted(self._baldes):
+            acumulado += self._baldes[chave]
+            if acumulado >= alvo:
+                # Exato enquanto a largura é 0.01; depois, o centro do balde
+                inicio = chave if self.largura == 0.01 else chave + 0.5
+                valor = round(inicio * self.largura, 10)
+                return min(max(valor, self.minimo), self.maximo)
+        return self.maximo
+
+    def como_dict(self):
+        return {
+            'media': self.media if self.quantidade else None,
+            'minimo': self.minimo,
+            'maximo': self.maximo,
+            'quantidade': self.quantidade,
+            'variancia': self.variancia,
+            'desvio_padrao': self.desvio_padrao,
+            'percentis': {f'p{p}': self.percentil(p) for p in PERCENTIS},
+        }
+
+
+def _nota(valor):
+    """Converte um elemento da entrada em float; ``None`` indica valor a ignorar."""
+    if valor is None:
+        return None
+    if isinstance(valor, bool) or isinstance(valor, (list, dict)):
+        raise NotaInvalida(valor)
+    if isinstance(valor, str):
+        valor = valor.strip().replace(',', '.')
+        if valor == '':
+            return None
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise NotaInvalida(valor)
+    if not math.isfinite(numero):
+        raise NotaInvalida(valor)
+    return numero
+
+
+def ler_notas_json(blocos, campo='notas'):
+    """Itera as notas de ``{"notas": [...]}`` ou de um array JSON no topo.
+
+    Levanta ``json.JSONDecodeError`` para JSON malformado e ``KeyError`` se o
+    campo não existir ou não for uma lista.
+    """
+    leitor = LeitorJSON(decodificar_blocos(blocos))
+    inicio = leitor.proximo_caractere()
+    if inicio == '[':
+        elementos = leitor.elementos()
+    elif inicio == '{':
+        leitor.consumir('{')
+        while True:
+            if leitor.proximo_caractere() == '}':
+                raise KeyError(campo)
+            chave = leitor.valor()
+            leitor.consumir(':')
+            if chave == campo:
+                if leitor.proximo_caractere() != '[':
+                    raise KeyError(campo)
+                elementos = leitor.elementos()
+                break
+            leitor.valor()
+            if leitor.proximo_caractere() == ',':
+                leitor.consumir(',')
+    else:
+        raise json.JSONDecodeError('Esperado objeto ou array', '', 0)
+
+    for elemento in elementos:
+        nota = _nota(elemento)
+        if nota is not None:
+            yield nota
+
+
+def ler_notas_texto(blocos):
+    """Itera as notas de um corpo CSV ou de uma nota por linha (NDJSON numérico).
+
+    Aceita ``,`` ou ``;`` como separador (com ``;`` a vírgula é decimal) e
+    ignora uma linha de cabeçalho não numérica no início.
+    """
+    resto = ''
+    primeira = True
+    for texto in decodificar_blocos(blocos):
+        linhas = (resto + texto).split('\n')
+        resto = linhas.pop()
+        for linha in linhas:
+            yield from _notas_da_linha(linha, primeira)
+            primeira = False
+    yield from _notas_da_linha(resto, primeira)
+
+
+def _notas_da_linha(linha, cabecalho_permitido):
+    linha = linha.strip()
+    if not linha:
+        return
+    campos = linha.split(';') if ';' in linha else linha.split(',')
+    notas = []
+    for campo in campos:
+        campo = campo.strip().strip('"')
+        if campo.lower() == 'null':
+            continue
+        try:
+            nota = _nota(campo)
+        except NotaInvalida:
+            if cabecalho_permitido:
+                return
+            raise
+        if nota is not None:
+            notas.append(nota)
+    yield from notas
+
+
+def calcular_estatisticas(notas):
+    """Consome um iterável de notas e devolve o dicionário de estatísticas."""
+    acumulador = EstatisticasNotas()
+    for nota in notas:
+        acumulador.adicionar(nota)
+    return acumulador.como_dict()
+
+
+# ==================== Estatísticas agregadas no banco ====================
+
+# Fonte -> (queryset base, campo da nota, caminho até o módulo)
+FONTES = {
+    'modulo': (AlunoModulo.objects, 'media_final', 'id_turma_disciplina'),
+    'atividades': (AlunoAtividade.objects, 'nota', 'id_atividade__id_turma_disciplina'),
+}
+
+# Escopo -> (lookup a partir do módulo, conversor do valor da URL)
+ESCOPOS = {
+    'modulo': ('', int),
+    'turma': ('__id_turma', int),
+    'disciplina': ('__id_disciplina', int),
+    'semestre': ('__id_turma__semestre', str),
+}
+
+FAIXAS_HISTOGRAMA = 10
+NOTA_APROVACAO = 7.0
+
+
+def estatisticas_banco(escopo, valor, fonte='modulo', corte=NOTA_APROVACAO):
+    """Agrega as notas de um escopo em SQL, com uma única consulta.
+
+    Retorna quantidade, média, mínimo, máximo, desvio padrão (populacional),
+    taxa de aprovação (nota >= ``corte``) e histograma em faixas de 1 ponto
+    (a última faixa inclui o 10). Levanta ``KeyError`` para escopo/fonte
+    desconhecidos e ``ValueError`` se o valor não for do tipo esperado.
+    """
+    manager, campo, caminho = FONTES[fonte]
+    lookup, conversor = ESCOPOS[escopo]
+    valor = conversor(valor)
+    filtro = {f'{caminho}{lookup}': valor}
+
+    nota = Cast(campo, FloatField())
+    agregados = {
+        'quantidade': Count(campo),
+        'sem_nota': Count('pk', filter=Q(**{f'{campo}__isnull': True})),
+        'media': Avg(nota),
+        'minimo': Min(nota),
+        'maximo': Max(nota),
+        'media_quadrados': Avg(nota * nota),
+        'aprovados': Count('pk', filter=Q(**{f'{campo}__gte': corte})),
+    }
+    for i in range(FAIXAS_HISTOGRAMA):
+        faixa = Q(**{f'{campo}__gte': i})
+        if i < FAIXAS_HISTOGRAMA - 1:
+            faixa &= Q(**{f'{campo}__lt': i + 1})
+        agregados[f'faixa_{i}'] = Count('pk', filter=faixa)
+
+    dados = manager.filter(**filtro).aggregate(**agregados)
+
+    histograma = {}
+    for i in range(FAIXAS_HISTOGRAMA):
+        histograma[f'{i}-{i + 1}'] = dados.pop(f'faixa_{i}')
+    # Desvio padrão por E[x²] - E[x]²: o STDDEV_POP do SQLite (função Python do
+    # Django) falha com NULLs, e AVG nativo funciona igual nos dois bancos.
+    media_quadrados = dados.pop('media_quadrados')
+    if dados['media'] is None:
+        dados['desvio_padrao'] = None
+    else:
+        dados['desvio_padrao'] = math.sqrt(max(media_quadrados - dados['media'] ** 2, 0.0))
+    quantidade = dados['quantidade']
+    dados['taxa_aprovacao'] = dados.pop('aprovados') / quantidade if quantidade else None
+    dados['histograma'] = histograma
+    dados.update(escopo=escopo, valor=valor, fonte=fonte)
+    return dados
@@ -0,0 +1,282 @@
+"""Exportação de notas em CSV/XLSX gerada em fluxo (streaming).
+
+As linhas vêm do banco com ``values_list(...).iterator(chunk_size=...)`` (cursor
+do lado do servidor no PostgreSQL) e são convertidas em bytes bloco a bloco,
+de modo que mesmo a exportação da instituição inteira usa memória constante e
+começa a ser enviada imediatamente. O XLSX é montado à mão (SpreadsheetML
+mínimo com strings inline) dentro de um ZIP também gerado em fluxo por
+``zip_em_fluxo``, que também monta o pacote com todas as entregas de uma
+atividade ou módulo (``entregas_em_zip``).
+"""
+
+import csv
+import io
+import os
+import re
+import time
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.utils.text import get_valid_filename
+
+from .estatisticas import ESCOPOS
+from .models import AlunoAtividade, AlunoModulo
+
+CHUNK = 2000
+LINHAS_POR_BLOCO = 500
+# Início de célula que planilhas interpretam como fórmula
+INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+# Fonte -> (manager, caminho até o módulo, [(cabeçalho, campo)], ordenação)
+EXPORTACOES = {
+    'modulo': (AlunoModulo.objects, 'id_turma_disciplina', [
+        ('Turma', 'id_turma_disciplina__id_turma__nome'),
+        ('Semestre', 'id_turma_disciplina__id_turma__semestre'),
+        ('Disciplina', 'id_turma_disciplina__id_disciplina__nome'),
+        ('Matrícula', 'id_aluno__matricula'),
+        ('Nome', 'id_aluno__usuario__first_name'),
+        ('Sobrenome', 'id_aluno__usuario__last_name'),
+        ('P1', 'nota_prova1'),
+        ('P2', 'nota_prova2'),
+        ('Média', 'media_final'),
+        ('Status', 'status'),
+    ], ('id_turma_disciplina', 'id_aluno__matricula')),
+    'atividades': (AlunoAtividade.objects, 'id_atividade__id_turma_disciplina', [
+        ('Turma', 'id_atividade__id_turma_disciplina__id_turma__nome'),
+        ('Semestre', 'id_atividade__id_turma_disciplina__id_turma__semestre'),
+        ('Disciplina', 'id_atividade__id_turma_disciplina__id_disciplina__nome'),
+        ('Atividade', 'id_atividade_id'),
+        ('Data da atividade', 'id_atividade__data'),
+        ('Matrícula', 'id_aluno__matricula'),
+        ('Nome', 'id_aluno__usuario__first_name'),
+        ('Sobrenome', 'id_aluno__usuario__last_name'),
+        ('Nota', 'nota'),
+        ('Entregue em', 'data_entrega'),
+    ], ('id_atividade', 'id_aluno__matricula')),
+}
+
+
+def linhas_exportacao(fonte, escopo, valor):
+    """Devolve ``(cabecalho, linhas)``; ``linhas`` é um iterador preguiçoso de tuplas.
+
+    Levanta ``KeyError`` para fonte/escopo desconhecidos e ``ValueError`` se o
+    valor não for do tipo esperado pelo escopo.
+    """
+    manager, caminho, colunas, ordem = EXPORTACOES[fonte]
+    lookup, conversor = ESCOPOS[escopo]
+    linhas = (
+        manager.filter(**{f'{caminho}{lookup}': conversor(valor)})
+        .order_by(*ordem)
+        .values_list(*[campo for _, campo in colunas])
+        .iterator(chunk_size=CHUNK)
+    )
+    return [cabecalho for cabecalho, _ in colunas], linhas
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat(sep=' ', timespec='seconds') if hasattr(valor, 'hour') else valor.isoformat()
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        # Texto digitado por usuários (nomes, respostas) não vira fórmula no Excel
+        return "'" + valor
+    return str(valor)
+
+
+def csv_em_fluxo(cabecalho, linhas):
+    """Gera o CSV (UTF-8 com BOM, para abrir direto no Excel) em blocos de bytes."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write('\ufeff')
+    escritor.writerow(cabecalho)
+    for i, linha in enumerate(linhas, 1):
+        escritor.writerow([_texto(v) for v in linha])
+        if i % LINHAS_POR_BLOCO == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+# ==================== ZIP em fluxo ====================
+
+class _SaidaZip:
+    """Destino não posicionável para ``zipfile``: acumula bytes até serem drenados."""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        dados = b''.join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def zip_em_fluxo(arquivos, compressao=zipfile.ZIP_DEFLATED):
+    """Gera um ZIP em blocos de bytes a partir de ``(nome, iterável de bytes)``.
+
+    Nada é montado em memória ou disco: cada bloco de entrada é comprimido e
+    repassado logo em seguida (o ``zipfile`` usa data descriptors quando a
+    saída não é posicionável). Uma entrada ``(nome, conteudo, compressao)``
+    troca a compressão só daquele arquivo.
+    """
+    saida = _SaidaZip()
+    with zipfile.ZipFile(saida, 'w', compression=compressao) as zf:
+        for nome, conteudo, *opcoes in arquivos:
+            info = zipfile.ZipInfo(nome, date_time=time.localtime()[:6])
+            info.compress_type = opcoes[0] if opcoes else compressao
+            with zf.open(info, 'w', force_zip64=True) as destino:
+                for bloco in conteudo:
+                    destino.write(bloco)
+                    dados = saida.drenar()
+                    if dados:
+                        yield dados
+            dados = saida.drenar()
+            if dados:
+                yield dados
+    yield saida.drenar()
+
+
+# ==================== Entregas em ZIP ====================
+
+# Formatos já comprimidos: recomprimir só gasta CPU
+EXTENSOES_COMPRIMIDAS = {
+    '.zip', '.png', '.jpg', '.jpeg', '.gif', '.mp3', '.mp4', '.docx', '.xlsx', '.pptx', '.odt', '.pdf',
+}
+BLOCO_ARQUIVO = 64 * 1024
+CABECALHO_MANIFESTO = [
+    'Atividade', 'Data da atividade', 'Matrícula', 'Nome', 'Sobrenome', 'Nota', 'Entregue em', 'Arquivo', 'Resposta',
+]
+
+
+def _nome_no_zip(entrega, por_atividade):
+    """``<matrícula><ext>`` (ou ``atividade_<id>/<matrícula><ext>``): o nome gravado é o hash do conteúdo."""
+    extensao = os.path.splitext(entrega['arquivo'])[1].lower()
+    nome = get_valid_filename(entrega['id_aluno__matricula']) + extensao
+    return nome if por_atividade else f"atividade_{entrega['id_atividade_id']}/{nome}"
+
+
+def entregas_em_zip(entregas, storage, por_atividade=True):
+    """ZIP em fluxo com os arquivos de ``entregas`` e um ``entregas.csv`` de manifesto.
+
+    Os arquivos são lidos do ``storage`` em blocos; o manifesto vai por último
+    e indica em "Arquivo" o nome de cada um dentro do ZIP (vazio quando não há
+    arquivo ou ele não foi encontrado). ``entregas`` é um queryset de
+    ``AlunoAtividade``, percorrido duas vezes com ``iterator()``.
+    """
+    entregas = entregas.order_by('id_atividade', 'id_aluno__matricula')
+    incluidos = set()
+
+    def conteudo(nome):
+        with storage.open(nome, 'rb') as arquivo:
+            yield from arquivo.chunks(BLOCO_ARQUIVO)
+
+    def arquivos():
+        campos = ('pk', 'id_atividade_id', 'id_aluno__matricula', 'arquivo')
+        for entrega in entregas.exclude(arquivo='').exclude(arquivo=None).values(*campos).iterator(chunk_size=CHUNK):
+            if not storage.exists(entrega['arquivo']):
+                continue
+            nome = _nome_no_zip(entrega, por_atividade)
+            incluidos.add(entrega['pk'])
+            extensao = os.path.splitext(nome)[1]
+            compressao = zipfile.ZIP_STORED if extensao in EXTENSOES_COMPRIMIDAS else zipfile.ZIP_DEFLATED
+            yield nome, conteudo(entrega['arquivo']), compressao
+
+    def manifesto():
+        campos = (
+            'pk', 'id_atividade_id', 'id_atividade__data', 'id_aluno__matricula', 'id_aluno__usuario__first_name',
+            'id_aluno__usuario__last_name', 'nota', 'data_entrega', 'arquivo', 'resposta_texto',
+        )
+        for entrega in entregas.values(*campos).iterator(chunk_size=CHUNK):
+            yield (
+                entrega['id_atividade_id'], entrega['id_atividade__data'], entrega['id_aluno__matricula'],
+                entrega['id_aluno__usuario__first_name'], entrega['id_aluno__usuario__last_name'],
+                entrega['nota'], entrega['data_entrega'],
+                _nome_no_zip(entrega, por_atividade) if entrega['pk'] in incluidos else '',
+                entrega['resposta_texto'],
+            )
+
+    def partes():
+        yield from arquivos()
+        yield 'entregas.csv', csv_em_fluxo(CABECALHO_MANIFESTO, manifesto())
+
+    return zip_em_fluxo(partes())
+
+
+# ==================== XLSX (SpreadsheetML mínimo) ====================
+
+_NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_CARACTERES_INVALIDOS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_PARTES_FIXAS = {
+    '[Content_Types].xml': (
+        _XML + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        _XML + f'<Relationships xmlns="{_NS_PKG_REL}">'
+        f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        _XML + f'<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">'
+        '<sheets><sheet name="Notas" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        _XML + f'<Relationships xmlns="{_NS_PKG_REL}">'
+        f'<Relationship Id="rId1" Type="{_NS_REL}/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _celula(valor):
+    if isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool):
+        return f'<c><v>{valor}</v></c>'
+    texto = _CARACTERES_INVALIDOS.sub('', _texto(valor))
+    if not texto:
+        return '<c/>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(texto)}</t></is></c>'
+
+
+def _planilha(cabecalho, linhas):
+    partes = [_XML, f'<worksheet xmlns="{_NS_MAIN}"><sheetData>',
+              '<row>' + ''.join(_celula(v) for v in cabecalho) + '</row>']
+    for i, linha in enumerate(linhas, 1):
+        partes.append('<row>' + ''.join(_celula(v) for v in linha) + '</row>')
+        if i % LINHAS_POR_BLOCO == 0:
+            yield ''.join(partes).encode('utf-8')
+            partes.clear()
+    partes.append('</sheetData></worksheet>')
+    yield ''.join(partes).encode('utf-8')
+
+
+def xlsx_em_fluxo(cabecalho, linhas):
+    """Gera um XLSX de uma planilha em blocos de bytes."""
+    arquivos = [(nome, [conteudo.encode('utf-8')]) for nome, conteudo in _PARTES_FIXAS.items()]
+    arquivos.append(('xl/worksheets/sheet1.xml', _planilha(cabecalho, linhas)))
+    return zip_em_fluxo(arquivos)
+
+
+FORMATOS = {
+    'csv': (csv_em_fluxo, 'text/csv; charset=utf-8'),
+    'xlsx': (xlsx_em_fluxo, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
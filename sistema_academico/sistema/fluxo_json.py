@@ -0,0 +1,127 @@
+"""Leitura incremental de JSON a partir de blocos de bytes.
+
+``LeitorJSON`` decodifica um valor por vez de um fluxo de texto, lendo mais
+blocos só quando o valor atual está incompleto. Usado pelas estatísticas de
+notas (corpo HTTP) e pelo ``scripts/verify_dumpdata.py`` (fixtures grandes).
+"""
+
+import codecs
+import json
+
+# Maior valor JSON isolado aceito: entrada malformada/truncada não acumula o corpo inteiro
+MAX_VALOR_JSON = 1024 * 1024
+# Caracteres que, logo após um número decodificado, podem ser a continuação dele
+CONTINUACAO_NUMERO = frozenset('0123456789.eE+-')
+
+
+def decodificar_blocos(blocos, encoding='utf-8'):
+    """Decodifica blocos de bytes em textos, sem quebrar caracteres multibyte entre blocos."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for bloco in blocos:
+        texto = decoder.decode(bloco)
+        if texto:
+            yield texto
+    resto = decoder.decode(b'', final=True)
+    if resto:
+        yield resto
+
+
+class LeitorJSON:
+    """Lê valores JSON consecutivos de um fluxo de texto sem carregá-lo inteiro."""
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, textos, max_valor=None):
+        self._textos = iter(textos)
+        self.max_valor = MAX_VALOR_JSON if max_valor is None else max_valor
+        self._buf = ''
+        self._pos = 0
+        self._fim = False
+
+    def _ler_mais(self):
+        if self._fim:
+            return False
+        try:
+            texto = next(self._textos)
+        except StopIteration:
+            self._fim = True
+            return False
+        self._buf = self._buf[self._pos:] + texto
+        self._pos = 0
+        return True
+
+    def proximo_caractere(self):
+        """Pula espaços e devolve o próximo caractere significativo (sem consumir)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._ler_mais():
+                return ''
+
+    def consumir(self, esperado):
+        if self.proximo_caractere() != esperado:
+            raise json.JSONDecodeError(f'Esperado {esperado!r}', self._buf, self._pos)
+        self._pos += 1
+
+    def valor(self):
+        """Decodifica o próximo valor JSON, lendo mais blocos se ele estiver incompleto.
+
+        Um valor que termina no fim do buffer, ou um número seguido de um
+        caractere que poderia continuá-lo (``8.`` antes de ``25``, ``1e``
+        antes de ``0``), só é aceito depois de um delimitador ou no fim do
+        fluxo.
+        """
+        self.proximo_caractere()
+        while True:
+            try:
+                valor, fim = self.decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                self._verificar_limite()
+                if self._ler_mais():
+                    continue
+                raise
+            if self._pode_continuar(valor, fim):
+                self._verificar_limite()
+                if self._ler_mais():
+                    continue
+            self._pos = fim
+            return valor
+
+    def _pode_continuar(self, valor, fim):
+        if fim >= len(self._buf):
+            return True
+        numero = isinstance(valor, (int, float)) and not isinstance(valor, bool)
+        return numero and self._buf[fim] in CONTINUACAO_NUMERO
+
+    def _verificar_limite(self):
+        if len(self._buf) - self._pos > self.max_valor:
+            raise json.JSONDecodeError('Valor JSON maior que o limite', self._buf[:100], self._pos)
+
+    def elementos(self):
+        """Itera os elementos do array que começa na posição atual."""
+        self.consumir('[')
+        if self.proximo_caractere() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.valor()
+            separador = self.proximo_caractere()
+            self._pos += 1
+            if separador == ']':
+                return
+            if separador != ',':
+                raise json.JSONDecodeError('Esperado "," ou "]"', self._buf, self._pos)
+
+
+def iterar_array_json(blocos, encoding='utf-8'):
+    """Itera os elementos de um array JSON no topo, lendo ``blocos`` (bytes) sob demanda.
+
+    Só um elemento por vez fica em memória (serve também para fixtures grandes
+    do ``dumpdata``). Levanta ``json.JSONDecodeError`` se o topo não for array.
+    """
+    leitor = LeitorJSON(decodificar_blocos(blocos, encoding))
+    if leitor.proximo_caractere() != '[':
+        raise json.JSONDecodeError('Esperado array', '', 0)
+    yield from leitor.elementos()
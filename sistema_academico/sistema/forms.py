@@ -1,5 +1,6 @@
 from django import forms
 from .models import Aluno, Atividade, AlunoAtividade, Turma, Coordenador
+from .armazenamento import validar_arquivo
 
 class AlunoAdminForm(forms.ModelForm):
     class Meta:
@@ -41,6 +42,21 @@ class EntregaAtividadeForm(forms.ModelForm):
             'resposta_texto': 'Resposta textual',
         }
 
+    def __init__(self, *args, erros_upload=(), **kwargs):
+        # Erros detectados pelo UploadVerificadoHandler (o arquivo nem chega em FILES)
+        self.erros_upload = list(erros_upload)
+        super().__init__(*args, **kwargs)
+
+    def clean_arquivo(self):
+        for erro in self.erros_upload:
+            self.add_error('arquivo', erro)
+        arquivo = self.cleaned_data.get('arquivo')
+        if arquivo and hasattr(arquivo, 'size'):
+            erro = validar_arquivo(arquivo.name, arquivo.size)
+            if erro:
+                raise forms.ValidationError(erro)
+        return arquivo
+
 class CorrecaoForm(forms.ModelForm):
     """Form para professor corrigir entrega"""
     class Meta:
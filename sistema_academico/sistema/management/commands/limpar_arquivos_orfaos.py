@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sistema.armazenamento import PREFIXO, armazenamento_entregas, reconciliar_referencias
+from sistema.models import ArquivoArmazenado
+
+
+class Command(BaseCommand):
+    help = (
+        'Apaga os arquivos de entregas que nenhuma entrega referencia mais (após um período de carência), '
+        'opcionalmente recalculando antes as referências e varrendo o disco atrás de arquivos sem registro.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--carencia', type=float, default=24,
+                            help='Horas sem uso antes de um arquivo órfão poder ser apagado (padrão: 24).')
+        parser.add_argument('--reconciliar', action='store_true',
+                            help='Recalcula as referências a partir das entregas antes de limpar.')
+        parser.add_argument('--varrer-disco', action='store_true',
+                            help='Também apaga arquivos do diretório de entregas que não têm registro.')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas lista o que seria apagado.')
+
+    def handle(self, *args, **options):
+        storage = armazenamento_entregas()
+        limite = timezone.now() - timedelta(hours=options['carencia'])
+        dry_run = options['dry_run']
+
+        if options['reconciliar']:
+            self.stdout.write(f'Referências corrigidas: {reconciliar_referencias()}')
+
+        apagados = liberados = 0
+        orfaos = ArquivoArmazenado.objects.filter(referencias__lte=0, ultimo_uso__lt=limite)
+        for arquivo in orfaos.iterator():
+            self.stdout.write(f'  {arquivo.nome}', ending='\n' if options['verbosity'] > 1 else '\r')
+            if not dry_run:
+                # Reconfere: pode ter sido reaproveitado depois da consulta
+                if ArquivoArmazenado.objects.filter(pk=arquivo.pk, referencias__lte=0,
+                                                    ultimo_uso__lt=limite).delete()[0]:
+                    storage.delete(arquivo.nome)
+            apagados += 1
+            liberados += arquivo.tamanho
+
+        if options['varrer_disco']:
+            conhecidos = set(ArquivoArmazenado.objects.values_list('nome', flat=True))
+            for nome in _arquivos(storage, PREFIXO):
+                if nome not in conhecidos and storage.get_modified_time(nome) < limite:
+                    self.stdout.write(f'  sem registro: {nome}')
+                    liberados += storage.size(nome)
+                    apagados += 1
+                    if not dry_run:
+                        storage.delete(nome)
+
+        acao = 'seriam apagados' if dry_run else 'apagados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{apagados} arquivos {acao} ({liberados / (1024 * 1024):.1f} MB).'
+        ))
+
+
+def _arquivos(storage, pasta):
+    if not storage.exists(pasta):
+        return
+    diretorios, arquivos = storage.listdir(pasta)
+    for nome in arquivos:
+        yield f'{pasta}/{nome}'
+    for diretorio in diretorios:
+        yield from _arquivos(storage, f'{pasta}/{diretorio}')
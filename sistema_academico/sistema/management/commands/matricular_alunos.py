@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistema.matriculas import ler_matriculas, matricular_alunos
+from sistema.models import Turma
+
+
+class Command(BaseCommand):
+    help = (
+        'Matricula em uma turma os alunos listados em um arquivo (uma matrícula por linha ou CSV com a '
+        'matrícula na 1ª coluna) e cria os registros de AlunoModulo de todos os módulos da turma.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('turma_id', type=int)
+        parser.add_argument('arquivo', nargs='?', default='-', help='Caminho do arquivo ou "-" para stdin.')
+
+    def handle(self, *args, **options):
+        try:
+            turma = Turma.objects.get(pk=options['turma_id'])
+        except Turma.DoesNotExist:
+            raise CommandError(f'Turma {options["turma_id"]} não encontrada.')
+
+        if options['arquivo'] == '-':
+            resumo = matricular_alunos(turma, ler_matriculas(sys.stdin))
+        else:
+            try:
+                with open(options['arquivo'], encoding='utf-8-sig') as arquivo:
+                    resumo = matricular_alunos(turma, ler_matriculas(arquivo))
+            except OSError as e:
+                raise CommandError(f'Não foi possível ler o arquivo: {e}')
+
+        for matricula in resumo['nao_encontradas']:
+            self.stderr.write(f'Matrícula não encontrada: {matricula}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{turma}: {resumo["matriculados"]} alunos matriculados, {resumo["ja_matriculados"]} já estavam na turma, '
+            f'{len(resumo["nao_encontradas"])} não encontrados; {resumo["modulos"]} matrículas em módulos criadas.'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from sistema.contadores import reconciliar_contadores
+
+
+class Command(BaseCommand):
+    help = 'Recalcula pelo banco os contadores da página inicial mantidos em cache.'
+
+    def handle(self, *args, **options):
+        totais = reconciliar_contadores()
+        for nome, total in totais.items():
+            self.stdout.write(f'{nome}: {total}')
+        self.stdout.write(self.style.SUCCESS('Contadores reconciliados.'))
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sistema.dados_sinteticos import LOTE, SENHA_PADRAO, gerar_dados
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera dados sintéticos em volume (coordenadores, professores, alunos, turmas, módulos, '
+        'notas, atividades, entregas e aulas) com bulk_create em lotes, de forma determinística pela seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--turmas', type=int, default=10)
+        parser.add_argument('--alunos-por-turma', type=int, default=40)
+        parser.add_argument('--modulos-por-turma', type=int, default=5)
+        parser.add_argument('--atividades-por-modulo', type=int, default=8)
+        parser.add_argument('--aulas-por-modulo', type=int, default=20)
+        parser.add_argument('--coordenadores', type=int, default=2)
+        parser.add_argument('--professores', type=int, default=None,
+                            help='Padrão: um por disciplina (--modulos-por-turma).')
+        parser.add_argument('--taxa-entrega', type=float, default=0.8,
+                            help='Fração de alunos que entregam cada atividade (0 a 1).')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefixo', default='seed',
+                            help='Prefixo de usernames/matrículas; use outro para gerar um segundo lote no mesmo banco.')
+        parser.add_argument('--lote', type=int, default=LOTE, help='Linhas por INSERT.')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        verbosidade = options['verbosity']
+
+        def progresso(tabela, total):
+            if verbosidade > 1:
+                self.stdout.write(f'  {tabela}: {total}', ending='\r')
+
+        try:
+            resumo = gerar_dados(
+                turmas=options['turmas'],
+                alunos_por_turma=options['alunos_por_turma'],
+                modulos_por_turma=options['modulos_por_turma'],
+                atividades_por_modulo=options['atividades_por_modulo'],
+                aulas_por_modulo=options['aulas_por_modulo'],
+                coordenadores=options['coordenadores'],
+                professores=options['professores'],
+                taxa_entrega=options['taxa_entrega'],
+                seed=options['seed'],
+                prefixo=options['prefixo'],
+                lote=options['lote'],
+                progresso=progresso,
+            )
+        except ValueError as erro:
+            raise CommandError(str(erro))
+        duracao = time.perf_counter() - inicio
+
+        total = sum(resumo['totais'].values())
+        for tabela, quantidade in resumo['totais'].items():
+            self.stdout.write(f'{tabela:<30} {quantidade:>10}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} linhas em {duracao:.1f}s ({total / max(duracao, 1e-9):,.0f} linhas/s). '
+            f'Senha de todos os usuários: {SENHA_PADRAO}'
+        ))
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import environ
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sistema.transferencia import LOTE, DestinoPostgres, DestinoSQLite, TransferenciaErro, transferir
+
+
+class Command(BaseCommand):
+    help = (
+        'Copia os dados do banco SQLite para o PostgreSQL (credenciais DATABASE_* do .env) tabela a tabela, '
+        'na ordem das chaves estrangeiras, com leitura em lotes e COPY. Rode "migrate" no destino antes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--origem', default=str(Path(settings.BASE_DIR) / 'db.sqlite3'),
+                            help='Arquivo SQLite de origem (padrão: db.sqlite3 do projeto).')
+        parser.add_argument('--destino-sqlite', metavar='ARQUIVO',
+                            help='Copia para outro arquivo SQLite já migrado em vez do PostgreSQL (modo de teste).')
+        parser.add_argument('--limpar', action='store_true',
+                            help='Esvazia as tabelas do destino antes de copiar (necessário após o migrate, '
+                                 'que já cria tipos de conteúdo e permissões).')
+        parser.add_argument('--lote', type=int, default=LOTE, help='Linhas por leitura/COPY.')
+        parser.add_argument('--processos', type=int, default=4,
+                            help='Tabelas independentes copiadas em paralelo (só PostgreSQL).')
+
+    def handle(self, *args, **options):
+        if not Path(options['origem']).exists():
+            raise CommandError(f'Banco de origem não encontrado: {options["origem"]}')
+
+        if options['destino_sqlite']:
+            destino = DestinoSQLite(options['destino_sqlite'])
+            descricao = options['destino_sqlite']
+        else:
+            env = environ.Env()
+            destino = DestinoPostgres(
+                dbname=env('DATABASE_NAME'),
+                user=env('DATABASE_USER'),
+                password=env('DATABASE_PASSWORD'),
+                host=env('DATABASE_HOST', default='localhost'),
+                port=env('DATABASE_PORT', default='5432'),
+            )
+            descricao = f'PostgreSQL {env("DATABASE_NAME")}'
+
+        def progresso(tabela, linhas, segundos):
+            self.stdout.write(f'  {tabela:<40} {linhas:>10} linhas  {linhas / max(segundos, 1e-9):>12,.0f}/s')
+
+        self.stdout.write(f'Copiando {options["origem"]} -> {descricao}')
+        try:
+            resultado = transferir(
+                options['origem'], destino, limpar=options['limpar'], lote=options['lote'],
+                processos=options['processos'], progresso=progresso,
+            )
+        except TransferenciaErro as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(resultado.values())} linhas copiadas em {len(resultado)} tabelas; sequências ajustadas.'
+        ))
@@ -0,0 +1,75 @@
+"""Matrícula de alunos em turmas em volume.
+
+Substitui a edição aluno a aluno de ``Turma.alunos`` no admin: as matrículas
+informadas são resolvidas em uma única consulta, as linhas da tabela de
+ligação são inseridas com ``bulk_create(ignore_conflicts=True)`` e os
+``AlunoModulo`` de todos os módulos da turma são criados junto, em lote.
+
+Como ``bulk_create`` na tabela de ligação não dispara ``m2m_changed``,
+nenhum receptor desse sinal é notificado.
+"""
+
+import re
+
+from django.db import transaction
+
+from .models import Aluno, AlunoModulo, Turma, TurmaDisciplina
+
+LOTE = 1000
+CABECALHOS = {'matricula', 'matrícula'}
+
+
+def ler_matriculas(linhas):
+    """Itera as matrículas de uma lista (uma por linha ou CSV com a matrícula na 1ª coluna).
+
+    Aceita bytes ou texto, separador ``,`` ou ``;``, e ignora linhas vazias e
+    um cabeçalho "matricula".
+    """
+    for linha in linhas:
+        if isinstance(linha, bytes):
+            linha = linha.decode('utf-8', errors='replace')
+        matricula = re.split('[,;]', linha.lstrip('\ufeff'), maxsplit=1)[0].strip().strip('"').strip()
+        if matricula and matricula.lower() not in CABECALHOS:
+            yield matricula
+
+
+@transaction.atomic
+def matricular_alunos(turma, matriculas, lote=LOTE):
+    """Matricula na ``turma`` os alunos das ``matriculas`` e cria seus ``AlunoModulo``.
+
+    Executa um número fixo de consultas, independente da quantidade de alunos
+    (além dos INSERTs em lotes de ``lote``). Alunos já matriculados são
+    ignorados. Devolve um resumo com ``matriculados``, ``ja_matriculados``,
+    ``nao_encontradas`` (lista) e ``modulos`` (``AlunoModulo`` criados).
+    """
+    turma_id = turma.pk if isinstance(turma, Turma) else turma
+    matriculas = list(dict.fromkeys(matriculas))
+    ids = dict(Aluno.objects.filter(matricula__in=matriculas).values_list('matricula', 'pk'))
+
+    Through = Turma.alunos.through
+    existentes = set(
+        Through.objects.filter(turma_id=turma_id, aluno_id__in=ids.values()).values_list('aluno_id', flat=True)
+    )
+    novos = [pk for pk in ids.values() if pk not in existentes]
+
+    criados_modulo = 0
+    if novos:
+        Through.objects.bulk_create(
+            [Through(turma_id=turma_id, aluno_id=pk) for pk in novos],
+            batch_size=lote,
+            ignore_conflicts=True,
+        )
+        modulos = list(TurmaDisciplina.objects.filter(id_turma_id=turma_id).values_list('pk', flat=True))
+        registros = [
+            AlunoModulo(id_aluno_id=pk, id_turma_disciplina_id=modulo_id)
+            for modulo_id in modulos for pk in novos
+        ]
+        AlunoModulo.objects.bulk_create(registros, batch_size=lote, ignore_conflicts=True)
+        criados_modulo = len(registros)
+
+    return {
+        'matriculados': len(novos),
+        'ja_matriculados': len(existentes),
+        'nao_encontradas': [m for m in matriculas if m not in ids],
+        'modulos': criados_modulo,
+    }
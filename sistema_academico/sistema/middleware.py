@@ -0,0 +1,17 @@
+from django.utils.functional import SimpleLazyObject
+
+from .perfis import obter_perfil
+
+
+class PerfilMiddleware:
+    """Disponibiliza ``request.perfil`` (perfis do usuário logado), resolvido sob demanda.
+
+    Deve vir depois de ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.perfil = SimpleLazyObject(lambda: obter_perfil(request.user))
+        return self.get_response(request)
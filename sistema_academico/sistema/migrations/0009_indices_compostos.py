@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistema', '0008_alunomodulo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alunoatividade',
+            index=models.Index(fields=['id_atividade', 'nota'], name='entrega_atividade_nota_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alunoatividade',
+            index=models.Index(fields=['data_entrega'], name='entrega_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alunomodulo',
+            index=models.Index(fields=['id_turma_disciplina', 'status'], name='alunomodulo_modulo_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='atividade',
+            index=models.Index(fields=['id_turma_disciplina', 'data'], name='atividade_modulo_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aula',
+            index=models.Index(fields=['id_turma_disciplina', 'data'], name='aula_modulo_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turma',
+            index=models.Index(fields=['semestre', 'curso'], name='turma_semestre_curso_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:09
+
+import sistema.armazenamento
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sistema', '0009_indices_compostos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArquivoArmazenado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('tamanho', models.BigIntegerField()),
+                ('referencias', models.IntegerField(default=0)),
+                ('ultimo_uso', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Arquivo armazenado',
+                'verbose_name_plural': 'Arquivos armazenados',
+            },
+        ),
+        migrations.AlterField(
+            model_name='alunoatividade',
+            name='arquivo',
+            field=models.FileField(blank=True, null=True, storage=sistema.armazenamento.armazenamento_entregas, upload_to='entregas/%Y/%m/'),
+        ),
+    ]
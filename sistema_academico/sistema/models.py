@@ -1,6 +1,9 @@
 from django.db import models
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import User
+from django.urls import reverse
+
+from .armazenamento import armazenamento_entregas
 
 """Modelos do sistema acadêmico.
 
@@ -99,6 +102,12 @@ class Turma(models.Model):
     # Relacionamento M:N com Aluno
     alunos = models.ManyToManyField(Aluno, related_name='turmas')
 
+    class Meta:
+        indexes = [
+            # Filtros por semestre/curso (listagens e list_filter do admin)
+            models.Index(fields=['semestre', 'curso'], name='turma_semestre_curso_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nome} ({self.curso} - {self.semestre})"
         
@@ -147,6 +156,10 @@ class AlunoModulo(models.Model):
 
     class Meta:
         unique_together = ('id_aluno', 'id_turma_disciplina')
+        indexes = [
+            # Alunos de um módulo filtrados por situação (estatísticas, aprovados/reprovados)
+            models.Index(fields=['id_turma_disciplina', 'status'], name='alunomodulo_modulo_status_idx'),
+        ]
         verbose_name = 'Aluno no Módulo'
         verbose_name_plural = 'Alunos no Módulo'
 
@@ -158,6 +171,12 @@ class Atividade(models.Model):
     descricao = models.TextField()
     id_turma_disciplina = models.ForeignKey(TurmaDisciplina, on_delete=models.CASCADE, related_name='atividades')
 
+    class Meta:
+        indexes = [
+            # Atividades de um módulo ordenadas por data, sem ordenação em memória
+            models.Index(fields=['id_turma_disciplina', 'data'], name='atividade_modulo_data_idx'),
+        ]
+
     def __str__(self):
         return f"Atividade em {self.id_turma_disciplina} - {self.data}"
 
@@ -166,7 +185,8 @@ class AlunoAtividade(models.Model):
     id_aluno = models.ForeignKey(Aluno, on_delete=models.CASCADE, related_name='atividades_entregues')
     id_atividade = models.ForeignKey(Atividade, on_delete=models.CASCADE, related_name='entregas')
     # Campos de entrega
-    arquivo = models.FileField(upload_to='entregas/%Y/%m/', null=True, blank=True)
+    # Gravado uma única vez por conteúdo (SHA-256), ver sistema/armazenamento.py
+    arquivo = models.FileField(upload_to='entregas/%Y/%m/', storage=armazenamento_entregas, null=True, blank=True)
     resposta_texto = models.TextField(null=True, blank=True)
     nota = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     data_entrega = models.DateTimeField(auto_now_add=True)
@@ -174,12 +194,36 @@ class AlunoAtividade(models.Model):
     class Meta:
         # Garante que um aluno só pode entregar uma vez a mesma atividade
         unique_together = ('id_aluno', 'id_atividade')
+        indexes = [
+            # Entregas de uma atividade por nota (correção, estatísticas) e por data de entrega
+            models.Index(fields=['id_atividade', 'nota'], name='entrega_atividade_nota_idx'),
+            models.Index(fields=['data_entrega'], name='entrega_data_idx'),
+        ]
         verbose_name = 'Entrega de Atividade'
         verbose_name_plural = 'Entregas de Atividades'
 
+    def get_arquivo_url(self):
+        """URL do arquivo pela view com permissão (``arquivo.url`` não é servido)."""
+        return reverse('baixar_arquivo_entrega', args=[self.pk]) if self.arquivo else ''
+
     def __str__(self):
         return f"Entrega de {self.id_atividade} por {self.id_aluno.usuario.get_full_name() or self.id_aluno.usuario.username}"
 
+class ArquivoArmazenado(models.Model):
+    """Arquivo de entrega gravado uma vez por conteúdo, com o número de entregas que o usam."""
+    nome = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    tamanho = models.BigIntegerField()
+    referencias = models.IntegerField(default=0)
+    ultimo_uso = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Arquivo armazenado'
+        verbose_name_plural = 'Arquivos armazenados'
+
+    def __str__(self):
+        return f"{self.nome} ({self.referencias} ref.)"
+
 # 7. Aula
 
 class Aula(models.Model):
@@ -187,5 +231,10 @@ class Aula(models.Model):
     data = models.DateField()
     conteudo = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['id_turma_disciplina', 'data'], name='aula_modulo_data_idx'),
+        ]
+
     def __str__(self):
         return f"Aula de {self.id_turma_disciplina} em {self.data}"
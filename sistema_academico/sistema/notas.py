@@ -0,0 +1,299 @@
+"""Lançamento de notas de provas (P1/P2) dos módulos.
+
+Concentra as regras que antes ficavam espalhadas em ``professor_lancar_notas``:
+leitura das notas digitadas, cálculo de média/status da turma inteira e
+gravação em lote dos registros de ``AlunoModulo`` que realmente mudaram.
+"""
+
+import csv
+from array import array
+from decimal import Decimal, InvalidOperation
+from itertools import chain
+from math import nan as NAN
+
+from django.db import transaction
+
+from .models import Aluno, AlunoModulo
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional; sem ele o cálculo em lote usa Python puro
+    np = None
+
+MEDIA_APROVACAO = 7.0
+CASAS = Decimal('0.01')
+CAMPOS_NOTAS = ['nota_prova1', 'nota_prova2', 'media_final', 'status']
+LOTE = 500
+MAX_ERROS_IMPORTACAO = 50
+
+
+def parse_nota(valor):
+    """Converte o texto digitado em nota (float 0-10) ou None se vazio/inválido."""
+    if valor is None:
+        return None
+    valor = str(valor).strip().replace(',', '.')
+    if valor == '':
+        return None
+    try:
+        nota = float(valor)
+    except ValueError:
+        return None
+    if nota != nota or nota < 0 or nota > 10:
+        return None
+    return nota
+
+
+def _decimal(valor):
+    """Normaliza para o formato gravado no banco (2 casas) para comparar sem ruído de float."""
+    if valor is None:
+        return None
+    try:
+        return Decimal(repr(float(valor))).quantize(CASAS)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _wrapper_c():
+    """``calcular_media_status`` da biblioteca C (uma chamada por aluno), se o wrapper estiver instalado."""
+    try:
+        from c.notas_avaliacao_wrapper import calcular_media_status
+    except Exception:
+        return None
+    return calcular_media_status
+
+
+def _como_array(valores):
+    """Converte para ``array('d')`` sem copiar quando já for um buffer de doubles.
+
+    ``None`` vira NaN, que representa nota ausente ao longo do cálculo em lote.
+    """
+    if isinstance(valores, array) and valores.typecode == 'd':
+        return valores
+    try:
+        visao = memoryview(valores)
+    except TypeError:
+        return array('d', (NAN if v is None else float(v) for v in valores))
+    if visao.format == 'd' and visao.ndim == 1 and visao.c_contiguous:
+        return visao
+    return array('d', (float(v) for v in visao.tolist()))
+
+
+def _status(media, corte):
+    return 'pendente' if media != media else ('aprovado' if media >= corte else 'reprovado')
+
+
+def _lote_python(p1, p2, corte):
+    medias = array('d', [(x + y) / 2.0 for x, y in zip(p1, p2)])
+    return medias, [_status(m, corte) for m in medias]
+
+
+def _lote_numpy(p1, p2, corte):
+    a = np.frombuffer(p1, dtype=np.float64)
+    b = np.frombuffer(p2, dtype=np.float64)
+    m = (a + b) / 2.0
+    status = np.where(
+        np.isnan(m), 'pendente', np.where(m >= corte, 'aprovado', 'reprovado')
+    ).tolist()
+    return array('d', m.tobytes()), status
+
+
+def _lote_c(p1, p2, corte):
+    # Uma chamada ctypes por aluno: a biblioteca C não expõe uma função de lote
+    calcular_media_status = _wrapper_c()
+    medias, status = array('d'), []
+    for x, y in zip(p1, p2):
+        media = (x + y) / 2.0
+        if media == media:
+            try:
+                res = calcular_media_status(x, y, corte)
+                media = res['media']
+                status.append(res['status'])
+            except Exception:
+                status.append(_status(media, corte))
+        else:
+            status.append('pendente')
+        medias.append(media)
+    return medias, status
+
+
+BACKENDS = {'c': _lote_c, 'numpy': _lote_numpy, 'python': _lote_python}
+
+
+def backend_padrao():
+    """NumPy se disponível, senão Python puro.
+
+    O backend ``'c'`` só é usado quando pedido explicitamente: a biblioteca C
+    não tem entrada para vetores, então ele ainda faz uma chamada ctypes por
+    aluno e não é mais rápido que os outros.
+    """
+    return 'numpy' if np is not None else 'python'
+
+
+def calcular_medias_lote(p1, p2, corte=MEDIA_APROVACAO, backend=None):
+    """Calcula média e status da turma inteira em uma única chamada.
+
+    ``p1`` e ``p2`` podem ser listas, ``array('d')`` ou arrays NumPy float64
+    (NaN/None = nota ausente); buffers de doubles são repassados sem cópia.
+    Retorna ``(medias, status)``: ``array('d')`` com NaN para pendentes e a
+    lista de status. ``backend`` (``'numpy'``, ``'python'`` ou ``'c'``, só
+    explícito) força a implementação; o padrão é ``backend_padrao()``. Todas fazem a
+    mesma conta em double (``(p1 + p2) / 2.0``), com resultado idêntico bit a
+    bit.
+    """
+    p1 = _como_array(p1)
+    p2 = _como_array(p2)
+    if len(p1) != len(p2):
+        raise ValueError('p1 e p2 devem ter o mesmo tamanho')
+
+    backend = backend or backend_padrao()
+    if backend not in BACKENDS:
+        raise ValueError(f'Backend desconhecido: {backend}')
+    if (backend == 'numpy' and np is None) or (backend == 'c' and _wrapper_c() is None):
+        raise ValueError(f'Backend indisponível: {backend}')
+    return BACKENDS[backend](p1, p2, corte)
+
+
+def calcular_medias(pares, corte=MEDIA_APROVACAO):
+    """Calcula média e status de vários pares (P1, P2) de uma vez.
+
+    Pares com alguma nota ausente resultam em ``(None, 'pendente')``.
+    """
+    p1 = array('d', (NAN if n1 is None else n1 for n1, _ in pares))
+    p2 = array('d', (NAN if n2 is None else n2 for _, n2 in pares))
+    medias, status = calcular_medias_lote(p1, p2, corte)
+    return [(None if m != m else m, st) for m, st in zip(medias, status)]
+
+
+def garantir_matriculas(modulo):
+    """Cria os ``AlunoModulo`` faltantes da turma do módulo com um único INSERT.
+
+    Em regime normal (todos já matriculados) custa apenas uma consulta.
+    """
+    faltantes = list(
+        Aluno.objects
+        .filter(turmas=modulo.id_turma_id)
+        .exclude(modulos__id_turma_disciplina=modulo)
+        .values_list('pk', flat=True)
+    )
+    if faltantes:
+        AlunoModulo.objects.bulk_create(
+            [AlunoModulo(id_aluno_id=pk, id_turma_disciplina=modulo) for pk in faltantes],
+            batch_size=LOTE,
+            ignore_conflicts=True,
+        )
+    return len(faltantes)
+
+
+def aplicar_notas(registros, entradas, corte=MEDIA_APROVACAO):
+    """Aplica ``entradas`` ({id_aluno: (n1, n2)}) nos registros, sem salvar.
+
+    Registros sem entrada ficam intactos. Devolve apenas os registros alterados.
+    """
+    alvos = [reg for reg in registros if reg.id_aluno_id in entradas]
+    resultados = calcular_medias([entradas[reg.id_aluno_id] for reg in alvos], corte)
+
+    alterados = []
+    for reg, (media, status) in zip(alvos, resultados):
+        n1, n2 = entradas[reg.id_aluno_id]
+        novo = (_decimal(n1), _decimal(n2), _decimal(media), status)
+        atual = (reg.nota_prova1, reg.nota_prova2, reg.media_final, reg.status)
+        if novo != atual:
+            reg.nota_prova1, reg.nota_prova2, reg.media_final, reg.status = novo
+            alterados.append(reg)
+    return alterados
+
+
+def lancar_notas(registros, entradas, corte=MEDIA_APROVACAO):
+    """Aplica as notas e grava somente os registros alterados em um único ``bulk_update``."""
+    alterados = aplicar_notas(registros, entradas, corte)
+    if alterados:
+        with transaction.atomic():
+            AlunoModulo.objects.bulk_update(alterados, CAMPOS_NOTAS, batch_size=LOTE)
+    return alterados
+
+
+# ==================== Importação de notas por CSV ====================
+
+def _linhas_texto(linhas):
+    """Decodifica as linhas (bytes) de um upload; cai para cp1252 (CSV do Excel em pt-BR)."""
+    for linha in linhas:
+        if isinstance(linha, bytes):
+            try:
+                linha = linha.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                linha = linha.decode('cp1252', errors='replace')
+        yield linha
+
+
+def _nota_csv(texto):
+    """``(nota, erro)``: célula vazia vira ``(None, None)``; fora de 0-10 ou não numérica é erro."""
+    texto = (texto or '').strip()
+    if not texto:
+        return None, None
+    nota = parse_nota(texto)
+    if nota is None:
+        return None, f'nota inválida "{texto}" (use 0 a 10)'
+    return nota, None
+
+
+def ler_notas_csv(linhas, matriculas):
+    """Lê ``matricula,p1,p2`` de um CSV linha a linha, sem carregar o arquivo.
+
+    ``linhas`` é qualquer iterável de linhas (o próprio upload serve);
+    ``matriculas`` mapeia matrícula -> id do aluno no módulo. O separador
+    pode ser ``,`` ou ``;`` (detectado na primeira linha) e uma linha de
+    cabeçalho é ignorada. Célula de nota vazia significa "manter a atual"
+    (``None`` na tupla). Devolve ``(entradas, erros)``: ``{id_aluno: (p1, p2)}``
+    e ``[(numero_da_linha, mensagem)]``.
+    """
+    textos = _linhas_texto(linhas)
+    primeira = next(textos, '')
+    separador = ';' if primeira.count(';') > primeira.count(',') else ','
+    leitor = csv.reader(chain([primeira], textos), delimiter=separador)
+
+    entradas, erros, vistas = {}, [], {}
+    for numero, campos in enumerate(leitor, 1):
+        if not campos or not any(c.strip() for c in campos):
+            continue
+        matricula = campos[0].strip()
+        if numero == 1 and matricula not in matriculas:
+            continue  # cabeçalho
+        if len(campos) < 3:
+            erros.append((numero, 'esperado matrícula, P1 e P2'))
+            continue
+        id_aluno = matriculas.get(matricula)
+        if id_aluno is None:
+            erros.append((numero, f'matrícula "{matricula}" não pertence a este módulo'))
+            continue
+        if matricula in vistas:
+            erros.append((numero, f'matrícula "{matricula}" repetida (linha {vistas[matricula]})'))
+            continue
+        vistas[matricula] = numero
+        n1, erro1 = _nota_csv(campos[1])
+        n2, erro2 = _nota_csv(campos[2])
+        if erro1 or erro2:
+            erros.append((numero, '; '.join(e for e in (erro1, erro2) if e)))
+            continue
+        entradas[id_aluno] = (n1, n2)
+    return entradas, erros
+
+
+def importar_notas_csv(registros, linhas, corte=MEDIA_APROVACAO):
+    """Importa um CSV de notas para os ``registros`` (``AlunoModulo`` com ``id_aluno`` carregado).
+
+    Tudo ou nada: se alguma linha tiver erro, nada é gravado. Notas em
+    branco mantêm o valor atual. Devolve ``(alterados, erros)``.
+    """
+    matriculas = {reg.id_aluno.matricula: reg.id_aluno_id for reg in registros}
+    entradas, erros = ler_notas_csv(linhas, matriculas)
+    if erros:
+        return [], erros
+
+    atuais = {reg.id_aluno_id: reg for reg in registros}
+    for id_aluno, (n1, n2) in entradas.items():
+        reg = atuais[id_aluno]
+        entradas[id_aluno] = (
+            float(reg.nota_prova1) if n1 is None and reg.nota_prova1 is not None else n1,
+            float(reg.nota_prova2) if n2 is None and reg.nota_prova2 is not None else n2,
+        )
+    return lancar_notas(registros, entradas, corte), []
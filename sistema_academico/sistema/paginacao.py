@@ -0,0 +1,139 @@
+"""Paginação por cursor (keyset/seek) para as listagens.
+
+Em vez de ``OFFSET``, cada página filtra a partir do último valor visto de uma
+coluna única e indexada (``WHERE campo > cursor ORDER BY campo LIMIT n``), então
+o custo de qualquer página é o mesmo, seja a primeira ou a milésima.
+
+``PaginatorEstimado`` (usado no admin) evita o ``COUNT(*)`` de tabelas grandes
+no PostgreSQL, trocando-o pela estimativa do planejador.
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+POR_PAGINA = 50
+MAX_POR_PAGINA = 200
+# Abaixo disso o COUNT(*) exato é barato o bastante
+LIMIAR_ESTIMATIVA = 100_000
+
+
+def codificar_cursor(valor):
+    texto = json.dumps(valor, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Decodifica o cursor da URL; cursores inválidos viram ``None`` (início da lista)."""
+    if not cursor:
+        return None
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        return json.loads(texto)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class PaginaKeyset:
+    """Uma página de resultados com os cursores para navegar adiante/para trás."""
+
+    def __init__(self, itens, campo, tem_proxima, tem_anterior):
+        self.itens = itens
+        self.tem_proxima = tem_proxima
+        self.tem_anterior = tem_anterior
+        self.proximo = codificar_cursor(_valor(itens[-1], campo)) if itens and tem_proxima else None
+        self.anterior = codificar_cursor(_valor(itens[0], campo)) if itens and tem_anterior else None
+
+    def __iter__(self):
+        return iter(self.itens)
+
+    def __len__(self):
+        return len(self.itens)
+
+
+def _valor(obj, campo):
+    valor = obj
+    for parte in campo.split('__'):
+        valor = getattr(valor, parte)
+    return valor
+
+
+def _por_pagina(params, padrao):
+    try:
+        return min(max(int(params.get('por_pagina', padrao)), 1), MAX_POR_PAGINA)
+    except (TypeError, ValueError):
+        return padrao
+
+
+def _cursor_valido(queryset, campo, valor):
+    """Valor do cursor convertido para o tipo de ``campo``; ``None`` se adulterado (volta ao início)."""
+    if valor is None or isinstance(valor, (bool, list, dict)):
+        return None
+    opts = queryset.model._meta
+    field = opts.pk if campo == 'pk' else opts.get_field(campo)
+    try:
+        return field.to_python(valor)
+    except (ValidationError, TypeError, ValueError):
+        return None
+
+
+def paginar(queryset, campo, params, por_pagina=POR_PAGINA):
+    """Pagina ``queryset`` por ``campo`` (coluna única e indexada).
+
+    ``params`` é o ``request.GET``: ``apos`` avança a partir de um cursor,
+    ``antes`` volta, e ``por_pagina`` limita o tamanho (até ``MAX_POR_PAGINA``).
+    Cursores que não batem com o tipo de ``campo`` são ignorados (primeira página).
+    Executa uma única consulta (``LIMIT n + 1`` para saber se há mais itens).
+    """
+    limite = _por_pagina(params, por_pagina)
+    apos = _cursor_valido(queryset, campo, decodificar_cursor(params.get('apos')))
+    antes = _cursor_valido(queryset, campo, decodificar_cursor(params.get('antes')))
+
+    if antes is not None:
+        itens = list(queryset.filter(**{f'{campo}__lt': antes}).order_by(f'-{campo}')[:limite + 1])
+        tem_anterior = len(itens) > limite
+        itens = itens[:limite][::-1]
+        return PaginaKeyset(itens, campo, tem_proxima=True, tem_anterior=tem_anterior)
+
+    if apos is not None:
+        queryset = queryset.filter(**{f'{campo}__gt': apos})
+    itens = list(queryset.order_by(campo)[:limite + 1])
+    tem_proxima = len(itens) > limite
+    return PaginaKeyset(itens[:limite], campo, tem_proxima=tem_proxima, tem_anterior=apos is not None)
+
+
+def contagem_estimada(queryset, limiar=LIMIAR_ESTIMATIVA):
+    """Número estimado de linhas (``pg_class.reltuples``) de um queryset sem filtros no PostgreSQL.
+
+    Devolve ``None`` quando a estimativa não se aplica (outro banco, queryset
+    filtrado, tabela nunca analisada ou menor que ``limiar``).
+    """
+    conexao = connections[queryset.db]
+    if conexao.vendor != 'postgresql' or queryset.query.where or queryset.query.distinct:
+        return None
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [conexao.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        linha = cursor.fetchone()
+    if linha is None or linha[0] < limiar:
+        return None
+    return linha[0]
+
+
+class PaginatorEstimado(Paginator):
+    """``Paginator`` que usa ``contagem_estimada`` quando possível e o ``COUNT(*)`` nos demais casos."""
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            estimada = contagem_estimada(self.object_list)
+            if estimada is not None:
+                return estimada
+        return super().count
@@ -0,0 +1,101 @@
+"""Perfis (papéis) do usuário logado: Aluno, Professor e/ou Coordenador.
+
+Os três perfis são resolvidos em uma única consulta (``select_related`` das
+relações reversas de ``User``) e guardados no cache por id de usuário, de modo
+que requisições seguintes não consultam o banco para saber o papel do usuário.
+O ``PerfilMiddleware`` expõe o resultado em ``request.perfil``; alterações nos
+perfis invalidam a entrada via sinais, depois do commit (antes disso uma
+requisição concorrente poderia recolocar no cache o estado antigo).
+
+Como o papel decide permissões, o cache precisa ser compartilhado entre os
+processos do servidor (``CACHE_URL``); com o cache local por processo, o padrão
+de ``PERFIS_CACHE_TIMEOUT`` é curto (ver ``checks.verificar_cache_perfis``).
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import Aluno, Coordenador, Professor
+
+PREFIXO = 'sistema:perfil:'
+# Papel -> (modelo, nome da relação reversa em User)
+PAPEIS = {
+    'aluno': (Aluno, 'perfil_aluno'),
+    'professor': (Professor, 'professor'),
+    'coordenador': (Coordenador, 'coordenador'),
+}
+
+
+class Perfil:
+    """Perfis de um usuário; cada atributo é a instância do modelo ou ``None``."""
+
+    def __init__(self, aluno=None, professor=None, coordenador=None):
+        self.aluno = aluno
+        self.professor = professor
+        self.coordenador = coordenador
+
+    @property
+    def papeis(self):
+        return [papel for papel in PAPEIS if getattr(self, papel) is not None]
+
+
+def _chave(user_id):
+    return f'{PREFIXO}{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'PERFIS_CACHE_TIMEOUT', 3600)
+
+
+def carregar_perfil(user_id):
+    """Resolve os perfis do usuário no banco (uma consulta) e grava no cache."""
+    relacoes = [relacao for _, relacao in PAPEIS.values()]
+    usuario = User.objects.select_related(*relacoes).filter(pk=user_id).first()
+    perfis = {}
+    for papel, (_, relacao) in PAPEIS.items():
+        instancia = getattr(usuario, relacao, None) if usuario else None
+        if instancia is not None:
+            # O User vem da própria requisição; não precisa ir para o cache
+            instancia._state.fields_cache.pop('usuario', None)
+        perfis[papel] = instancia
+    cache.set(_chave(user_id), perfis, _timeout())
+    return perfis
+
+
+def obter_perfil(user):
+    """``Perfil`` do usuário: do cache quando possível, senão do banco."""
+    if not user.is_authenticated:
+        return Perfil()
+    perfis = cache.get(_chave(user.pk))
+    if perfis is None:
+        perfis = carregar_perfil(user.pk)
+    for papel, instancia in perfis.items():
+        if instancia is not None:
+            # Liga a instância ao User da requisição (evita consultar o usuário de novo)
+            instancia.usuario = user
+    return Perfil(**perfis)
+
+
+def invalidar_perfil(user_id):
+    cache.delete(_chave(user_id))
+
+
+def _ao_alterar(sender, instance, raw=False, **kwargs):
+    if not raw:
+        user_id = instance.usuario_id
+        transaction.on_commit(lambda: invalidar_perfil(user_id))
+
+
+def _ao_logar(sender, request, user, **kwargs):
+    carregar_perfil(user.pk)
+
+
+def conectar_sinais():
+    for modelo, _ in PAPEIS.values():
+        post_save.connect(_ao_alterar, sender=modelo, dispatch_uid=f'perfis_save_{modelo.__name__}')
+        post_delete.connect(_ao_alterar, sender=modelo, dispatch_uid=f'perfis_delete_{modelo.__name__}')
+    user_logged_in.connect(_ao_logar, dispatch_uid='perfis_login')
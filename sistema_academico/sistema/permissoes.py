@@ -0,0 +1,57 @@
+"""Autorização das views de professor por módulo (TurmaDisciplina).
+
+A verificação é uma única consulta indexada (``exists()`` em
+``TurmaDisciplina`` por pk e professor) feita antes de qualquer consulta
+pesada da view. Não há cache: uma troca de professor no admin vale na
+requisição seguinte, em qualquer processo do servidor.
+"""
+
+from functools import wraps
+
+from django.contrib import messages
+from django.shortcuts import redirect
+
+from .models import TurmaDisciplina
+
+
+def professor_leciona(professor, modulo_id):
+    return professor is not None and TurmaDisciplina.objects.filter(
+        pk=modulo_id, id_professor_id=professor.pk
+    ).exists()
+
+
+def professor_no_escopo(professor, escopo, valor):
+    """Se ``professor`` leciona no escopo de notas (``modulo``, ``turma`` ou ``disciplina``) ``valor``.
+
+    Outros escopos (ex.: ``semestre``) são só da coordenação.
+    """
+    if professor is None:
+        return False
+    if escopo == 'modulo':
+        return professor_leciona(professor, valor)
+    campo = {'turma': 'id_turma_id', 'disciplina': 'id_disciplina_id'}.get(escopo)
+    if campo is None:
+        return False
+    return TurmaDisciplina.objects.filter(id_professor_id=professor.pk, **{campo: valor}).exists()
+
+
+def professor_do_modulo(mensagem='Você não tem permissão para acessar este módulo.'):
+    """Decorator para views ``view(request, modulo_id, ...)`` restritas ao professor do módulo.
+
+    Usuários sem perfil de professor voltam para a home; professores de outros
+    módulos voltam para a lista de turmas com ``mensagem``. O professor fica
+    disponível em ``request.perfil.professor``. Usar depois de ``login_required``.
+    """
+    def decorador(view):
+        @wraps(view)
+        def _view(request, modulo_id, *args, **kwargs):
+            professor = request.perfil.professor
+            if professor is None:
+                messages.error(request, 'Você não está cadastrado como professor.')
+                return redirect('home')
+            if not professor_leciona(professor, modulo_id):
+                messages.error(request, mensagem)
+                return redirect('professor_minhas_turmas')
+            return view(request, modulo_id, *args, **kwargs)
+        return _view
+    return decorador
@@ -1,3 +1,1408 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import math
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+import zipfile
+from array import array
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, reverse
+
+from .armazenamento import PREFIXO
+from .checks import verificar_cache_perfis, verificar_conexoes
+from .contadores import obter_contadores
+from .dados_sinteticos import gerar_cpf, gerar_dados
+from .estatisticas import (
+    PERCENTIS,
+    EstatisticasNotas,
+    calcular_estatisticas,
+    estatisticas_banco,
+    ler_notas_json,
+    ler_notas_texto,
+)
+from .forms import EntregaAtividadeForm
+from .matriculas import ler_matriculas, matricular_alunos
+from .models import (
+    Aluno,
+    AlunoAtividade,
+    ArquivoArmazenado,
+    AlunoModulo,
+    Atividade,
+    Aula,
+    Coordenador,
+    Disciplina,
+    Professor,
+    Turma,
+    TurmaDisciplina,
+)
+from .notas import (
+    calcular_medias,
+    calcular_medias_lote,
+    garantir_matriculas,
+    importar_notas_csv,
+    lancar_notas,
+    ler_notas_csv,
+    parse_nota,
+)
+from . import notas
+from .perfis import obter_perfil
+from .paginacao import PaginatorEstimado, codificar_cursor, contagem_estimada
+from .permissoes import professor_leciona
+from .transferencia import DestinoSQLite, TransferenciaErro, _valor_copy, niveis_de_tabelas, transferir
+
+
+# Os templates do projeto não fazem parte deste app; nos testes de views usamos
+# versões mínimas que acessam os mesmos atributos que as telas reais.
+TEMPLATES_TESTE = {
+    'sistema/lista_alunos.html': '{% for a in alunos %}{{ a.matricula }} {{ a.usuario.get_full_name }};{% endfor %}',
+    'sistema/lista_professores.html': '{% for p in professores %}{{ p.matricula }};{% endfor %}',
+    'sistema/lista_coordenadores.html': '{% for c in coordenadores %}{{ c.usuario.username }};{% endfor %}',
+    'sistema/lista_turmas.html': (
+        '{% for t in turmas %}{{ t.nome }} {{ t.id_coordenador.usuario.username }} '
+        '{{ t.qtd_alunos }} {{ t.qtd_modulos }} {{ t.media_turma }};{% endfor %}'
+    ),
+    'sistema/lista_disciplinas.html': '{% for d in disciplinas %}{{ d.nome }};{% endfor %}',
+    'sistema/home.html': '{{ total_alunos }}|{{ total_professores }}|{{ total_turmas }}|{{ total_disciplinas }}',
+    'sistema/aluno_atividades.html': (
+        '{% for a in atividades %}{{ a.descricao }} {{ a.id_turma_disciplina.id_turma.nome }} '
+        '{{ a.id_turma_disciplina.id_disciplina.nome }} {{ a.id_turma_disciplina.id_professor.usuario.username }} '
+        '{{ a.minha_entrega.nota }};{% endfor %}'
+    ),
+    'sistema/login.html': 'login',
+    'sistema/detalhe_turma.html': (
+        '{{ turma.nome }}{% for a in alunos %}{{ a.usuario.username }};{% endfor %}'
+        '{% for m in modulos %}{{ m.id_disciplina.nome }} {{ m.id_professor.usuario.username }};{% endfor %}'
+    ),
+    'sistema/professor_turmas.html': (
+        '{% for m in modulos %}{{ m.id_turma.nome }} {{ m.id_disciplina.nome }};{% endfor %}'
+    ),
+    'sistema/professor_criar_atividade.html': '{{ form }}{{ modulo.id_turma.nome }} {{ modulo.id_disciplina.nome }}',
+    'sistema/professor_atividades.html': (
+        '{{ modulo.id_turma.nome }} {{ modulo.id_disciplina.nome }}{% for a in atividades %}{{ a.descricao }}'
+        '{% for e in a.entregas.all %}{{ e.id_aluno.usuario.username }} {{ e.nota }};{% endfor %}{% endfor %}'
+    ),
+    'sistema/professor_corrigir.html': (
+        '{{ form }}{{ entrega.id_aluno.usuario.username }} {{ entrega.id_atividade.id_turma_disciplina.id_turma.nome }}'
+    ),
+    'sistema/professor_lancar_notas.html': (
+        '{{ modulo.id_turma.nome }} {{ modulo.id_disciplina.nome }}{% for r in registros %}'
+        '{{ r.id_aluno.usuario.username }} {{ r.id_aluno.matricula }} {{ r.media_final }} {{ r.risco }};{% endfor %}'
+    ),
+    'sistema/aluno_entregar.html': '{{ form }}{{ atividade.id_turma_disciplina.id_disciplina.nome }}',
+    'sistema/aluno_notas.html': (
+        '{% for r in registros %}{{ r.id_turma_disciplina.id_turma.nome }} '
+        '{{ r.id_turma_disciplina.id_disciplina.nome }} {{ r.media_final }} {{ r.risco }};{% endfor %}'
+    ),
+    'sistema/coordenador_criar_turma.html': '{{ form }}',
+    'sistema/coordenador_matricular_alunos.html': '{{ turma.nome }}',
+}
+
+
+def templates_teste(templates=TEMPLATES_TESTE):
+    return override_settings(TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+            'loaders': [('django.template.loaders.locmem.Loader', templates)],
+        },
+    }])
+
+
+def criar_modulo(qtd_alunos=3, prefixo='t'):
+    """Cria professor, turma com ``qtd_alunos`` alunos e um módulo (TurmaDisciplina)."""
+    prof_user = User.objects.create(username=f'{prefixo}_prof')
+    professor = Professor.objects.create(
+        usuario=prof_user, matricula=f'{prefixo}P1', data_de_contratacao=date(2020, 1, 1)
+    )
+    turma = Turma.objects.create(nome=f'Turma {prefixo}', semestre='2025.1', curso='ADS')
+    disciplina = Disciplina.objects.create(nome=f'Disciplina {prefixo}', carga_horaria=60)
+    alunos = []
+    for i in range(qtd_alunos):
+        user = User.objects.create(username=f'{prefixo}_aluno{i}')
+        alunos.append(Aluno.objects.create(
+            usuario=user, matricula=f'{prefixo}A{i:04d}', data_de_nascimento=date(2000, 1, 1)
+        ))
+    turma.alunos.add(*alunos)
+    modulo = TurmaDisciplina.objects.create(id_turma=turma, id_disciplina=disciplina, id_professor=professor)
+    return professor, turma, modulo, alunos
+
+
+class LancamentoNotasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, cls.alunos = criar_modulo(qtd_alunos=60)
+
+    def test_parse_nota(self):
+        self.assertEqual(parse_nota('7,5'), 7.5)
+        self.assertIsNone(parse_nota(''))
+        self.assertIsNone(parse_nota('11'))
+        self.assertIsNone(parse_nota('abc'))
+
+    def test_calcular_medias(self):
+        self.assertEqual(
+            calcular_medias([(8.0, 6.0), (5.0, 6.0), (7.0, None)]),
+            [(7.0, 'aprovado'), (5.5, 'reprovado'), (None, 'pendente')],
+        )
+
+    def test_calcular_medias_lote_identico_ao_escalar(self):
+        p1 = array('d', [0.1, 7.0, 6.99, float('nan'), 10.0])
+        p2 = array('d', [0.2, 7.0, 7.0, 8.0, 3.3])
+        medias, status = calcular_medias_lote(p1, p2)
+        for a, b, m, st in zip(p1, p2, medias, status):
+            if a != a:
+                self.assertNotEqual(m, m)
+                self.assertEqual(st, 'pendente')
+                continue
+            self.assertEqual(m.hex(), ((a + b) / 2.0).hex())
+            self.assertEqual(st, 'aprovado' if m >= 7.0 else 'reprovado')
+        with self.assertRaises(ValueError):
+            calcular_medias_lote([1.0], [])
+
+    def _comparar_backend(self, backend):
+        p1 = array('d', [0.1, 7.0, 6.99, float('nan'), 10.0, 0.0])
+        p2 = array('d', [0.2, 7.0, 7.0, 8.0, 3.3, float('nan')])
+        esperadas, esperados = calcular_medias_lote(p1, p2, backend='python')
+        medias, status = calcular_medias_lote(p1, p2, backend=backend)
+        self.assertEqual(status, esperados)
+        self.assertEqual([m.hex() for m in medias], [m.hex() for m in esperadas])
+
+    @skipUnless(notas.np is not None, 'NumPy não instalado')
+    def test_backend_numpy_igual_ao_python(self):
+        self._comparar_backend('numpy')
+
+    def test_backend_c_igual_ao_python(self):
+        def calcular_media_status(n1, n2, corte):
+            media = (n1 + n2) / 2.0
+            return {'media': media, 'status': 'aprovado' if media >= corte else 'reprovado'}
+
+        with mock.patch.object(notas, '_wrapper_c', return_value=calcular_media_status):
+            # Só explícito: nunca é o padrão, mesmo com a biblioteca instalada
+            self.assertIn(notas.backend_padrao(), ('numpy', 'python'))
+            self._comparar_backend('c')
+        with mock.patch.object(notas, '_wrapper_c', return_value=None):
+            with self.assertRaises(ValueError):
+                calcular_medias_lote([1.0], [2.0], backend='c')
+
+    def test_garantir_matriculas_insert_unico(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(garantir_matriculas(self.modulo), 60)
+        with self.assertNumQueries(1):
+            self.assertEqual(garantir_matriculas(self.modulo), 0)
+        self.assertEqual(AlunoModulo.objects.filter(id_turma_disciplina=self.modulo).count(), 60)
+
+    def test_lancar_notas_grava_somente_alterados(self):
+        garantir_matriculas(self.modulo)
+        registros = list(AlunoModulo.objects.filter(id_turma_disciplina=self.modulo))
+        entradas = {reg.id_aluno_id: (8.0, 7.0) for reg in registros}
+
+        # bulk_update único dentro de uma transação (SAVEPOINT + UPDATE + RELEASE)
+        with self.assertNumQueries(3):
+            self.assertEqual(len(lancar_notas(registros, entradas)), 60)
+
+        registros = list(AlunoModulo.objects.filter(id_turma_disciplina=self.modulo))
+        with self.assertNumQueries(0):
+            self.assertEqual(lancar_notas(registros, entradas), [])
+
+        entradas[self.alunos[0].pk] = (4.0, 5.0)
+        alterados = lancar_notas(registros, entradas)
+        self.assertEqual([r.id_aluno_id for r in alterados], [self.alunos[0].pk])
+
+        reg = AlunoModulo.objects.get(id_aluno=self.alunos[0], id_turma_disciplina=self.modulo)
+        self.assertEqual(reg.media_final, Decimal('4.50'))
+        self.assertEqual(reg.status, 'reprovado')
+
+
+def _em_blocos(texto, tamanho=3):
+    dados = texto.encode('utf-8')
+    return [dados[i:i + tamanho] for i in range(0, len(dados), tamanho)]
+
+
+class EstatisticasStreamTests(SimpleTestCase):
+    def test_acumulador(self):
+        acc = EstatisticasNotas()
+        for nota in [7.5, 8.0, 5.0, 10.0]:
+            acc.adicionar(nota)
+        dados = acc.como_dict()
+        self.assertEqual(dados['quantidade'], 4)
+        self.assertAlmostEqual(dados['media'], 7.625)
+        self.assertAlmostEqual(dados['variancia'], 3.171875)
+        self.assertEqual((dados['minimo'], dados['maximo']), (5.0, 10.0))
+        self.assertEqual(dados['percentis'], {'p25': 5.0, 'p50': 7.5, 'p75': 8.0, 'p90': 10.0})
+
+    def test_acumulador_memoria_limitada(self):
+        acc = EstatisticasNotas(max_baldes=64)
+        for i in range(10000):
+            acc.adicionar(i / 100)
+        self.assertLessEqual(len(acc._baldes), 64)
+        self.assertAlmostEqual(acc.percentil(50), 50.0, delta=acc.largura)
+
+    def test_compactacao_sem_vies(self):
+        # Mesmos valores com e sem compactação: a diferença fica dentro de meio balde
+        exato, compacto = EstatisticasNotas(), EstatisticasNotas(max_baldes=16)
+        for i in range(1001):
+            exato.adicionar(i / 100)
+            compacto.adicionar(i / 100)
+        for p in PERCENTIS:
+            self.assertAlmostEqual(compacto.percentil(p), exato.percentil(p), delta=compacto.largura / 2)
+        self.assertEqual(sum(compacto._baldes.values()), 1001)
+
+    def test_leitor_json_limita_buffer(self):
+        truncado = '{"notas": [1, "' + 'x' * 5000
+        with mock.patch('sistema.fluxo_json.MAX_VALOR_JSON', 1000):
+            leitor = ler_notas_json(_em_blocos(truncado, 100))
+            self.assertEqual(next(leitor), 1.0)
+            with self.assertRaisesRegex(ValueError, 'maior que o limite'):
+                next(leitor)
+
+    def test_leitor_json_em_blocos(self):
+        corpo = '{"turma": {"nome": "A", "x": [1, 2]}, "notas": [7.5, null, "8,25", 10, 0.5]}'
+        self.assertEqual(list(ler_notas_json(_em_blocos(corpo))), [7.5, 8.25, 10.0, 0.5])
+        self.assertEqual(list(ler_notas_json(_em_blocos('[75, 100]'))), [75.0, 100.0])
+
+    def test_leitor_json_com_numeros_partidos_entre_blocos(self):
+        rnd = random.Random(7)
+        valores = ['8.25', '1e0', '7.5E-1', '-0.5', '10', '0', '3.125e+0', 'null', '9.99', '100e-2']
+        corpo = '{"notas": [' + ', '.join(rnd.choice(valores) for _ in range(2000)) + ']}'
+        dados, blocos, i = corpo.encode('utf-8'), [], 0
+        while i < len(dados):
+            tamanho = rnd.randint(1, 3)
+            blocos.append(dados[i:i + tamanho])
+            i += tamanho
+        esperadas = [n for n in json.loads(corpo)['notas'] if n is not None]
+        resultado = calcular_estatisticas(ler_notas_json(blocos))
+        self.assertEqual(resultado['quantidade'], len(esperadas))
+        self.assertAlmostEqual(resultado['media'], statistics.fmean(esperadas))
+
+    def test_leitor_texto(self):
+        corpo = 'nota\n7.5\n8\n\n9.25\n'
+        self.assertEqual(list(ler_notas_texto(_em_blocos(corpo))), [7.5, 8.0, 9.25])
+        self.assertEqual(list(ler_notas_texto(_em_blocos('7,5;8,0\n6;5'))), [7.5, 8.0, 6.0, 5.0])
+
+
+class ApiEstatisticasTests(SimpleTestCase):
+    url = reverse('api_estatisticas_notas')
+
+    def test_json(self):
+        resp = self.client.post(self.url, '{"notas": [7.5, 8.0, 5.0]}', content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        dados = resp.json()
+        self.assertEqual(dados['quantidade'], 3)
+        self.assertAlmostEqual(dados['media'], 6.8333333, places=5)
+        self.assertEqual((dados['minimo'], dados['maximo']), (5.0, 8.0))
+        self.assertIn('desvio_padrao', dados)
+
+    def test_csv(self):
+        resp = self.client.post(self.url, 'nota\n7\n9\n', content_type='text/csv')
+        self.assertEqual(resp.json()['media'], 8.0)
+
+    def test_erros(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        for corpo in ['{"notas": [1,', '{"outra": 1}', '{"notas": 3}', '{"notas": ["a"]}', '{"notas": [[1]]}']:
+            with self.subTest(corpo=corpo):
+                resp = self.client.post(self.url, corpo, content_type='application/json')
+                self.assertEqual(resp.status_code, 400)
+
+
+class EstatisticasBancoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, cls.alunos = criar_modulo(qtd_alunos=4)
+        garantir_matriculas(cls.modulo)
+        registros = list(AlunoModulo.objects.filter(id_turma_disciplina=cls.modulo))
+        notas = [(8.0, 10.0), (5.0, 6.0), (7.0, 7.0)]
+        lancar_notas(registros, dict(zip([a.pk for a in cls.alunos], notas)))
+
+    def test_uma_consulta_por_escopo(self):
+        for escopo, valor in [
+            ('modulo', self.modulo.pk),
+            ('turma', self.turma.pk),
+            ('disciplina', self.modulo.id_disciplina_id),
+            ('semestre', '2025.1'),
+        ]:
+            with self.subTest(escopo=escopo), self.assertNumQueries(1):
+                dados = estatisticas_banco(escopo, valor)
+            self.assertEqual(dados['quantidade'], 3)
+            self.assertEqual(dados['sem_nota'], 1)
+            self.assertAlmostEqual(dados['media'], 7.1666667, places=5)
+            self.assertEqual((dados['minimo'], dados['maximo']), (5.5, 9.0))
+            self.assertAlmostEqual(dados['taxa_aprovacao'], 2 / 3)
+            self.assertEqual(dados['histograma']['5-6'], 1)
+            self.assertEqual(dados['histograma']['9-10'], 1)
+            self.assertAlmostEqual(dados['desvio_padrao'], statistics.pstdev([9.0, 5.5, 7.0]))
+
+    def test_api(self):
+        self.client.force_login(self.professor.usuario)
+        url = reverse('api_estatisticas_escopo', args=['turma', self.turma.pk])
+        self.assertEqual(self.client.get(url).json()['quantidade'], 3)
+        self.assertEqual(self.client.get(url, {'fonte': 'atividades'}).json()['quantidade'], 0)
+        url = reverse('api_estatisticas_escopo', args=['curso', 'x'])
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+    def test_api_restrita_a_coordenacao_e_professor_do_escopo(self):
+        outro, outra_turma, _, _ = criar_modulo(qtd_alunos=1, prefixo='est')
+        self.client.force_login(self.alunos[0].usuario)
+        for escopo, valor in [('modulo', self.modulo.pk), ('turma', self.turma.pk), ('semestre', '2025.1')]:
+            with self.subTest(escopo=escopo):
+                resp = self.client.get(reverse('api_estatisticas_escopo', args=[escopo, valor]))
+                self.assertEqual(resp.status_code, 403)
+
+        self.client.force_login(outro.usuario)
+        for escopo, valor in [('turma', self.turma.pk), ('semestre', '2025.1')]:
+            resp = self.client.get(reverse('api_estatisticas_escopo', args=[escopo, valor]))
+            self.assertEqual(resp.status_code, 403)
+        self.assertEqual(
+            self.client.get(reverse('api_estatisticas_escopo', args=['turma', outra_turma.pk])).status_code, 200
+        )
+
+        coordenador = Coordenador.objects.create(usuario=User.objects.create(username='est_coord'),
+                                                 data_de_contratacao=date(2020, 1, 1))
+        self.client.force_login(coordenador.usuario)
+        resp = self.client.get(reverse('api_estatisticas_escopo', args=['semestre', '2025.1']))
+        self.assertEqual(resp.json()['quantidade'], 3)
+
+
+@templates_teste()
+class AlunoAtividadesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, cls.alunos = criar_modulo(qtd_alunos=5)
+        cls.aluno = cls.alunos[0]
+
+    def _criar_atividades(self, qtd):
+        for i in range(qtd):
+            atividade = Atividade.objects.create(
+                data=date(2025, 3, 1 + i % 28), descricao=f'Atividade {i}', id_turma_disciplina=self.modulo
+            )
+            for aluno in self.alunos:
+                AlunoAtividade.objects.create(id_aluno=aluno, id_atividade=atividade, nota=Decimal('8.00'))
+
+    def _consultas(self):
+        self.client.force_login(self.aluno.usuario)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('aluno_minhas_atividades'))
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx), resp
+
+    def test_consultas_constantes(self):
+        self._criar_atividades(3)
+        poucas, _ = self._consultas()
+        self._criar_atividades(30)
+        muitas, resp = self._consultas()
+        self.assertEqual(poucas, muitas)
+        self.assertEqual(resp.content.decode().count('8,00;'), 20)
+        self.assertEqual(resp.context['page_obj'].paginator.count, 33)
+
+
+@templates_teste()
+class ContadoresHomeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        criar_modulo(qtd_alunos=3)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_home_sem_consultas_com_cache_quente(self):
+        with self.assertNumQueries(4):
+            self.assertEqual(self.client.get(reverse('home')).content, b'3|1|1|1')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('home')).content, b'3|1|1|1')
+
+    def test_sinais_ajustam_contadores(self):
+        obter_contadores()
+        with self.captureOnCommitCallbacks(execute=True):
+            Disciplina.objects.create(nome='Nova', carga_horaria=40)
+            Turma.objects.create(nome='Outra', semestre='2025.2', curso='ADS')
+        with self.captureOnCommitCallbacks(execute=True):
+            Aluno.objects.first().delete()
+        with self.assertNumQueries(0):
+            totais = obter_contadores()
+        self.assertEqual(totais, {
+            'total_alunos': 2, 'total_professores': 1, 'total_turmas': 2, 'total_disciplinas': 2,
+        })
+
+    def test_reconciliar(self):
+        obter_contadores()
+        Disciplina.objects.bulk_create([Disciplina(nome='Em massa', carga_horaria=10)])
+        self.assertEqual(obter_contadores()['total_disciplinas'], 1)
+        call_command('reconciliar_contadores', stdout=StringIO())
+        self.assertEqual(obter_contadores()['total_disciplinas'], 2)
+
+
+@templates_teste()
+class ListasKeysetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, cls.alunos = criar_modulo(qtd_alunos=25)
+        outra = Turma.objects.create(nome='Noturno', semestre='2025.2', curso='Direito')
+        outra.alunos.add(*cls.alunos[:5])
+
+    def setUp(self):
+        self.client.force_login(self.professor.usuario)
+
+    def _json(self, nome, **params):
+        resp = self.client.get(reverse(nome), {'formato': 'json', **params})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_percorre_todas_as_paginas(self):
+        vistas, cursor = [], None
+        while True:
+            params = {'por_pagina': 10, **({'apos': cursor} if cursor else {})}
+            dados = self._json('lista_alunos', **params)
+            vistas += [a['matricula'] for a in dados['resultados']]
+            cursor = dados['proximo']
+            if not cursor:
+                break
+        self.assertEqual(vistas, sorted(a.matricula for a in self.alunos))
+
+        anterior = self._json('lista_alunos', por_pagina=10, antes=dados['anterior'])
+        self.assertEqual(anterior['resultados'][0]['matricula'], 'tA0010')
+        self.assertIsNotNone(anterior['proximo'])
+
+    def test_consultas_independem_da_pagina(self):
+        primeira = self._json('lista_alunos', por_pagina=5)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('lista_alunos'), {'por_pagina': 5})
+        with self.assertNumQueries(3):
+            self.client.get(reverse('lista_alunos'), {'por_pagina': 5, 'apos': primeira['proximo']})
+
+    def test_cursor_adulterado_volta_ao_inicio(self):
+        primeira = self._json('lista_turmas')['resultados']
+        for valor in ['abc', [1], {'x': 1}, True]:
+            cursor = codificar_cursor(valor)
+            with self.subTest(cursor=valor):
+                self.assertEqual(self._json('lista_turmas', apos=cursor)['resultados'], primeira)
+                self.assertEqual(self._json('lista_turmas', antes=cursor)['resultados'], primeira)
+        self.assertEqual(self._json('lista_alunos', apos=codificar_cursor(5))['resultados'][0]['matricula'], 'tA0000')
+
+    def test_busca_e_filtros(self):
+        self.assertEqual(len(self._json('lista_alunos', q='tA002')['resultados']), 5)
+        self.assertEqual(len(self._json('lista_alunos', curso='Direito')['resultados']), 5)
+        self.assertEqual(len(self._json('lista_alunos', curso='ADS', semestre='2025.1')['resultados']), 25)
+        self.assertEqual([t['nome'] for t in self._json('lista_turmas', semestre='2025.2')['resultados']], ['Noturno'])
+        self.assertEqual(len(self._json('lista_professores', q='tP1')['resultados']), 1)
+        self.assertEqual(self._json('lista_disciplinas', q='disc')['resultados'][0]['nome'], 'Disciplina t')
+        self.assertEqual(self._json('lista_coordenadores')['resultados'], [])
+
+    def test_html(self):
+        resp = self.client.get(reverse('lista_turmas'))
+        self.assertContains(resp, 'Turma t')
+        self.assertIn('pagina', resp.context)
+
+
+class ListaTurmasAnotadaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, cls.alunos = criar_modulo(qtd_alunos=6)
+        outra = Disciplina.objects.create(nome='Outra', carga_horaria=20)
+        TurmaDisciplina.objects.create(id_turma=cls.turma, id_disciplina=outra, id_professor=cls.professor)
+        garantir_matriculas(cls.modulo)
+        registros = list(AlunoModulo.objects.filter(id_turma_disciplina=cls.modulo))
+        lancar_notas(registros, {cls.alunos[0].pk: (8.0, 8.0), cls.alunos[1].pk: (5.0, 5.0)})
+        Turma.objects.create(nome='Vazia', semestre='2025.2', curso='ADS')
+
+    def test_contagens_anotadas_sem_carregar_alunos(self):
+        self.client.force_login(self.professor.usuario)
+        with self.assertNumQueries(3):
+            dados = self.client.get(reverse('lista_turmas'), {'formato': 'json'}).json()['resultados']
+        self.assertEqual(
+            [(t['nome'], t['qtd_alunos'], t['qtd_modulos'], t['media_turma']) for t in dados],
+            [('Turma t', 6, 2, 6.5), ('Vazia', 0, 0, None)],
+        )
+
+
+def _env_int(nome, padrao):
+    return int(os.environ.get(nome, padrao))
+
+
+def _percentil(amostras, p):
+    ordenadas = sorted(amostras)
+    return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)]
+
+
+@templates_teste()
+class RotasBenchmarkTests(TestCase):
+    """Acessa todas as rotas nomeadas com cada perfil e limita o número de consultas.
+
+    O volume de dados e as repetições são configuráveis por variáveis de
+    ambiente (BENCHMARK_TURMAS, BENCHMARK_ALUNOS, BENCHMARK_MODULOS,
+    BENCHMARK_ATIVIDADES, BENCHMARK_REPETICOES). Com BENCHMARK_RELATORIO=<arquivo>
+    grava um JSON com consultas e latências p50/p95 por rota e perfil, para
+    comparar entre versões:
+
+        BENCHMARK_RELATORIO=bench.json python manage.py test sistema.tests.RotasBenchmarkTests
+    """
+
+    # Máximo de consultas por requisição (inclui sessão e usuário e, nas respostas
+    # em fluxo, as do conteúdo), igual para qualquer volume de dados. Toda rota
+    # nomeada precisa de um limite aqui.
+    LIMITES = {
+        'login': 2,
+        'logout': 4,
+        'home': 4,
+        'lista_alunos': 3,
+        'lista_professores': 3,
+        'lista_coordenadores': 3,
+        'lista_turmas': 3,
+        'detalhe_turma': 9,
+        'lista_disciplinas': 3,
+        'professor_minhas_turmas': 3,
+        'professor_criar_atividade': 4,
+        'professor_ver_atividades': 8,
+        'professor_corrigir_entrega': 4,
+        'professor_baixar_entregas_modulo': 5,
+        'professor_baixar_entregas_atividade': 6,
+        'professor_lancar_notas': 6,
+        'professor_importar_notas': 3,
+        'aluno_minhas_atividades': 5,
+        'aluno_entregar_atividade': 5,
+        'aluno_minhas_notas': 3,
+        'baixar_arquivo_entrega': 4,
+        'api_estatisticas_notas': 0,
+        'api_estatisticas_escopo': 4,
+        'api_saude_banco': 3,
+        'exportar_notas': 3,
+        'coordenador_criar_turma': 4,
+        'coordenador_matricular_alunos': 4,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dados = gerar_dados(
+            turmas=_env_int('BENCHMARK_TURMAS', 3),
+            alunos_por_turma=_env_int('BENCHMARK_ALUNOS', 20),
+            modulos_por_turma=_env_int('BENCHMARK_MODULOS', 3),
+            atividades_por_modulo=_env_int('BENCHMARK_ATIVIDADES', 5),
+        )
+
+    def _argumentos(self):
+        d = self.dados
+        return {
+            'turma_id': d['turma'].pk,
+            'modulo_id': d['modulo'].pk,
+            'entrega_id': d['entrega'].pk,
+            'atividade_id': d['atividade'].pk,
+            'fonte': 'modulo',
+            'escopo': 'turma',
+            'valor': d['turma'].pk,
+        }
+
+    def _rotas(self):
+        for padrao in get_resolver().url_patterns:
+            if isinstance(padrao, URLPattern) and padrao.name:
+                yield padrao.name, list(padrao.pattern.converters)
+
+    def _perfis(self):
+        return {
+            'anonimo': None,
+            'aluno': self.dados['aluno'].usuario,
+            'professor': self.dados['professor'].usuario,
+            'coordenador': self.dados['coordenador'].usuario,
+        }
+
+    def test_consultas_por_rota_e_perfil(self):
+        repeticoes = _env_int('BENCHMARK_REPETICOES', 3)
+        argumentos = self._argumentos()
+        relatorio = {}
+
+        for nome, parametros in self._rotas():
+            self.assertIn(nome, self.LIMITES, f'Rota sem limite de consultas: {nome}')
+            url = reverse(nome, kwargs={p: argumentos[p] for p in parametros})
+            for papel, usuario in self._perfis().items():
+                consultas, tempos = [], []
+                for _ in range(repeticoes):
+                    if not tempos:
+                        cache.clear()
+                    self.client.logout()
+                    if usuario is not None:
+                        self.client.force_login(usuario)
+                    with CaptureQueriesContext(connection) as ctx:
+                        inicio = time.perf_counter()
+                        resp = self.client.get(url)
+                        if resp.streaming:
+                            # Exportações geram as linhas (e consultam) ao serem consumidas
+                            b''.join(resp.streaming_content)
+                        tempos.append(time.perf_counter() - inicio)
+                    consultas.append(len(ctx))
+                with self.subTest(rota=nome, papel=papel):
+                    self.assertLess(resp.status_code, 500)
+                    self.assertLessEqual(max(consultas), self.LIMITES[nome])
+                relatorio.setdefault(nome, {})[papel] = {
+                    'status': resp.status_code,
+                    'consultas': max(consultas),
+                    'p50_ms': round(_percentil(tempos, 50) * 1000, 3),
+                    'p95_ms': round(_percentil(tempos, 95) * 1000, 3),
+                }
+
+        destino = os.environ.get('BENCHMARK_RELATORIO')
+        if destino:
+            Path(destino).write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+class SeedAcademicoTests(TestCase):
+    def test_cpf_valido(self):
+        self.assertEqual(gerar_cpf(111444777), '111.444.777-35')
+        self.assertRegex(gerar_cpf(1), r'^\d{3}\.\d{3}\.\d{3}-\d{2}$')
+
+    def test_comando(self):
+        saida = StringIO()
+        call_command(
+            'seed_academico', '--turmas=2', '--alunos-por-turma=5', '--modulos-por-turma=2',
+            '--atividades-por-modulo=2', '--aulas-por-modulo=3', '--taxa-entrega=1', '--lote=7', stdout=saida,
+        )
+        self.assertEqual(Aluno.objects.count(), 10)
+        self.assertEqual(AlunoModulo.objects.count(), 20)
+        self.assertEqual(AlunoAtividade.objects.count(), 40)
+        self.assertEqual(Aula.objects.count(), 12)
+        self.assertEqual(Turma.objects.get(nome='seed Turma 1').alunos.count(), 5)
+        self.assertIn('sistema_alunoatividade', saida.getvalue())
+        for aluno in Aluno.objects.all():
+            aluno.full_clean()
+
+    def test_deterministico(self):
+        gerar_dados(prefixo='a', seed=7)
+        notas_a = list(AlunoModulo.objects.order_by('pk').values_list('nota_prova1', flat=True))
+        AlunoModulo.objects.all().delete()
+        gerar_dados(prefixo='b', seed=7)
+        notas_b = list(AlunoModulo.objects.order_by('pk').values_list('nota_prova1', flat=True))
+        self.assertEqual(notas_a, notas_b)
+
+    def test_prefixos_diferentes_sem_colisao_de_cpf(self):
+        gerar_dados(prefixo='x1', turmas=1, alunos_por_turma=3)
+        gerar_dados(prefixo='x2', turmas=1, alunos_por_turma=3)
+        cpfs = list(Aluno.objects.values_list('cpf', flat=True)) + list(Professor.objects.values_list('cpf', flat=True))
+        self.assertEqual(len(cpfs), len(set(cpfs)))
+
+    def test_sem_professores(self):
+        with self.assertRaisesMessage(CommandError, 'ao menos um professor'):
+            call_command('seed_academico', '--professores=0', '--turmas=1', stdout=StringIO())
+        self.assertFalse(Aluno.objects.exists())
+
+
+class IndicesCompostosTests(TestCase):
+    """Confere via EXPLAIN que as consultas quentes usam os índices compostos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dados = gerar_dados(turmas=3, alunos_por_turma=10, modulos_por_turma=2, atividades_por_modulo=4,
+                                aulas_por_modulo=4)
+
+    def _plano(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Tabelas pequenas favorecem seq scan; força o planner a considerar índices
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_planos_usam_indices(self):
+        modulo = self.dados['modulo']
+        atividade = self.dados['atividade']
+        casos = {
+            'atividade_modulo_data_idx': Atividade.objects.filter(id_turma_disciplina=modulo).order_by('-data'),
+            'aula_modulo_data_idx': Aula.objects.filter(id_turma_disciplina=modulo).order_by('data'),
+            'entrega_atividade_nota_idx': AlunoAtividade.objects.filter(id_atividade=atividade, nota__gte=7),
+            'turma_semestre_curso_idx': Turma.objects.filter(semestre='2024.1', curso='ADS'),
+            'alunomodulo_modulo_status_idx': AlunoModulo.objects.filter(id_turma_disciplina=modulo, status='aprovado'),
+        }
+        for indice, queryset in casos.items():
+            with self.subTest(indice=indice):
+                self.assertIn(indice, self._plano(queryset))
+
+
+@templates_teste()
+class PerfilCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, cls.alunos = criar_modulo(qtd_alunos=2)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_perfil_uma_consulta_e_depois_cache(self):
+        usuario = self.professor.usuario
+        with self.assertNumQueries(1):
+            perfil = obter_perfil(usuario)
+        self.assertEqual(perfil.papeis, ['professor'])
+        with self.assertNumQueries(0):
+            perfil = obter_perfil(usuario)
+            self.assertEqual(perfil.professor.pk, self.professor.pk)
+            self.assertIs(perfil.professor.usuario, usuario)
+            self.assertIsNone(perfil.aluno)
+
+    def test_invalidacao_por_sinal_apos_commit(self):
+        usuario = self.alunos[0].usuario
+        self.assertIsNone(obter_perfil(usuario).coordenador)
+        with self.captureOnCommitCallbacks(execute=True):
+            Coordenador.objects.create(usuario=usuario, data_de_contratacao=date(2024, 1, 1))
+            # Ainda não commitado: o cache não é limpo
+            self.assertIsNone(obter_perfil(usuario).coordenador)
+        self.assertEqual(obter_perfil(usuario).papeis, ['aluno', 'coordenador'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Aluno.objects.filter(pk=usuario.pk).get().delete()
+        self.assertEqual(obter_perfil(usuario).papeis, ['coordenador'])
+
+    def test_aviso_de_cache_local(self):
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=local, PERFIS_CACHE_TIMEOUT=3600):
+            self.assertEqual([p.id for p in verificar_cache_perfis(None)], ['sistema.W002'])
+        with override_settings(CACHES=local, PERFIS_CACHE_TIMEOUT=30):
+            self.assertEqual(verificar_cache_perfis(None), [])
+
+    def test_login_pre_carrega_perfil(self):
+        self.client.force_login(self.professor.usuario)
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(obter_perfil(self.professor.usuario).professor)
+
+    def test_view_com_cache_quente_nao_consulta_perfil(self):
+        self.client.force_login(self.professor.usuario)
+        cache.clear()
+        url = reverse('professor_minhas_turmas')
+        with CaptureQueriesContext(connection) as fria:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as quente:
+            self.client.get(url)
+        self.assertEqual(len(quente), len(fria) - 1)
+        self.assertFalse(any('sistema_professor' in q['sql'] and 'auth_user' in q['sql'] for q in quente))
+
+
+@templates_teste()
+class PermissaoModuloTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, cls.alunos = criar_modulo(qtd_alunos=2)
+        cls.outro, _, cls.outro_modulo, _ = criar_modulo(qtd_alunos=1, prefixo='o')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rejeita_antes_de_consultar_o_modulo(self):
+        self.client.force_login(self.outro.usuario)
+        url = reverse('professor_lancar_notas', args=[self.modulo.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertRedirects(resp, reverse('professor_minhas_turmas'), fetch_redirect_response=False)
+        # Só a verificação de permissão toca o módulo
+        self.assertEqual(sum('sistema_turmadisciplina' in q['sql'] for q in ctx), 1)
+        self.assertFalse(AlunoModulo.objects.exists())
+
+    def test_aluno_vai_para_home(self):
+        self.client.force_login(self.alunos[0].usuario)
+        resp = self.client.get(reverse('professor_ver_atividades', args=[self.modulo.pk]))
+        self.assertRedirects(resp, reverse('home'), fetch_redirect_response=False)
+
+    def test_troca_de_professor_vale_na_hora(self):
+        self.assertTrue(professor_leciona(self.outro, self.outro_modulo.pk))
+        self.assertFalse(professor_leciona(self.outro, self.modulo.pk))
+        TurmaDisciplina.objects.filter(pk=self.modulo.pk).update(id_professor=self.outro)
+        self.assertTrue(professor_leciona(self.outro, self.modulo.pk))
+        self.assertFalse(professor_leciona(self.professor, self.modulo.pk))
+        self.assertFalse(professor_leciona(None, self.modulo.pk))
+
+
+@templates_teste()
+class ExportacaoNotasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, cls.alunos = criar_modulo(qtd_alunos=3)
+        garantir_matriculas(cls.modulo)
+        AlunoModulo.objects.filter(id_aluno=cls.alunos[0]).update(
+            nota_prova1=Decimal('8.00'), nota_prova2=Decimal('6.00'), media_final=Decimal('7.00'), status='aprovado')
+        cls.outro, _, cls.outro_modulo, _ = criar_modulo(qtd_alunos=1, prefixo='o')
+        cls.coordenador = Coordenador.objects.create(
+            usuario=User.objects.create(username='coord_exp'), cpf='999.999.999-99', data_de_contratacao=date(2024, 1, 1))
+
+    def _url(self, escopo, valor, fonte='modulo'):
+        return reverse('exportar_notas', args=[fonte, escopo, valor])
+
+    def test_csv_do_modulo_pelo_professor(self):
+        self.client.force_login(self.professor.usuario)
+        resp = self.client.get(self._url('modulo', self.modulo.pk))
+        self.assertTrue(resp.streaming)
+        self.assertIn('attachment', resp['Content-Disposition'])
+        linhas = b''.join(resp.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(linhas[0].split(',')[:4], ['Turma', 'Semestre', 'Disciplina', 'Matrícula'])
+        self.assertEqual(len(linhas), 4)
+        self.assertTrue(linhas[1].endswith('8.00,6.00,7.00,aprovado'))
+
+    def test_xlsx_do_semestre_pelo_coordenador(self):
+        self.client.force_login(self.coordenador.usuario)
+        resp = self.client.get(self._url('semestre', '2025.1'), {'formato': 'xlsx'})
+        conteudo = b''.join(resp.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(conteudo)) as zf:
+            self.assertIsNone(zf.testzip())
+            planilha = zf.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        # Cabeçalho + 3 alunos matriculados (o outro módulo ainda não tem AlunoModulo)
+        self.assertEqual(planilha.count('<row>'), 4)
+        self.assertIn('<v>8.00</v>', planilha)
+
+    def test_texto_com_formula_escapado(self):
+        usuario = self.alunos[0].usuario
+        usuario.first_name, usuario.last_name = '=HYPERLINK("http://x")', '@SUM(1)'
+        usuario.save()
+        self.client.force_login(self.coordenador.usuario)
+        resp = self.client.get(self._url('modulo', self.modulo.pk))
+        linha = next(csv.reader(b''.join(resp.streaming_content).decode('utf-8-sig').splitlines()[1:]))
+        self.assertEqual(linha[4:], ['\'=HYPERLINK("http://x")', "'@SUM(1)", '8.00', '6.00', '7.00', 'aprovado'])
+
+        resp = self.client.get(self._url('modulo', self.modulo.pk), {'formato': 'xlsx'})
+        with zipfile.ZipFile(io.BytesIO(b''.join(resp.streaming_content))) as zf:
+            planilha = zf.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertIn('<t xml:space="preserve">\'@SUM(1)</t>', planilha)
+        self.assertIn('<v>8.00</v>', planilha)
+
+    def test_nome_do_arquivo_normalizado(self):
+        self.client.force_login(self.coordenador.usuario)
+        resp = self.client.get(self._url('semestre', '2025.1"; x=y'))
+        self.assertEqual(resp['Content-Disposition'], 'attachment; filename="notas_modulo_semestre_20251-xy.csv"')
+
+    def test_professor_nao_exporta_modulo_alheio_nem_turma(self):
+        self.client.force_login(self.outro.usuario)
+        for url in (self._url('modulo', self.modulo.pk), self._url('turma', self.turma.pk)):
+            resp = self.client.get(url)
+            self.assertRedirects(resp, reverse('professor_minhas_turmas'), fetch_redirect_response=False)
+
+    def test_aluno_e_formato_invalido(self):
+        self.client.force_login(self.alunos[0].usuario)
+        resp = self.client.get(self._url('modulo', self.modulo.pk))
+        self.assertRedirects(resp, reverse('home'), fetch_redirect_response=False)
+        self.client.force_login(self.coordenador.usuario)
+        self.assertEqual(self.client.get(self._url('modulo', self.modulo.pk), {'formato': 'pdf'}).status_code, 400)
+        self.assertEqual(self.client.get(self._url('modulo', 'abc')).status_code, 400)
+
+
+@templates_teste()
+class ImportacaoNotasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, cls.alunos = criar_modulo(qtd_alunos=3)
+        garantir_matriculas(cls.modulo)
+
+    def _registros(self):
+        return list(AlunoModulo.objects.filter(id_turma_disciplina=self.modulo)
+                    .select_related('id_aluno').order_by('id_aluno__matricula'))
+
+    def test_ler_csv_com_cabecalho_e_ponto_e_virgula(self):
+        matriculas = {'tA0000': 1, 'tA0001': 2}
+        entradas, erros = ler_notas_csv(
+            ['\ufeffmatricula;p1;p2\n'.encode('utf-8'), b'tA0000;7,5;8\n', b'tA0001;;10\n'], matriculas)
+        self.assertEqual(erros, [])
+        self.assertEqual(entradas, {1: (7.5, 8.0), 2: (None, 10.0)})
+
+    def test_erros_por_linha(self):
+        matriculas = {'tA0000': 1}
+        _, erros = ler_notas_csv(
+            ['tA0000,11,5', 'xZ9,5,5', 'tA0000,5,5', 'tA0000'], matriculas)
+        self.assertEqual([linha for linha, _ in erros], [1, 2, 3, 4])
+        self.assertIn('nota inválida', erros[0][1])
+        self.assertIn('não pertence', erros[1][1])
+
+    def test_importacao_mantem_notas_em_branco_e_grava_em_lote(self):
+        registros = self._registros()
+        lancar_notas(registros, {registros[0].id_aluno_id: (4.0, 6.0)})
+        registros = self._registros()
+        csv_notas = 'matricula,p1,p2\ntA0000,,9\ntA0001,7,7\n'.splitlines(keepends=True)
+        # SAVEPOINT + UPDATE + RELEASE
+        with self.assertNumQueries(3):
+            alterados, erros = importar_notas_csv(registros, csv_notas)
+        self.assertEqual((len(alterados), erros), (2, []))
+        primeiro, segundo, terceiro = self._registros()
+        self.assertEqual((primeiro.nota_prova1, primeiro.nota_prova2, primeiro.status), (Decimal('4.00'), Decimal('9.00'), 'reprovado'))
+        self.assertEqual((segundo.media_final, segundo.status), (Decimal('7.00'), 'aprovado'))
+        self.assertIsNone(terceiro.nota_prova1)
+
+    def test_view_tudo_ou_nada(self):
+        self.client.force_login(self.professor.usuario)
+        url = reverse('professor_importar_notas', args=[self.modulo.pk])
+        arquivo = SimpleUploadedFile('notas.csv', b'tA0000,8,8\ntA0001,8,12\n', content_type='text/csv')
+        resp = self.client.post(url, {'arquivo': arquivo})
+        self.assertRedirects(resp, reverse('professor_lancar_notas', args=[self.modulo.pk]), fetch_redirect_response=False)
+        self.assertFalse(AlunoModulo.objects.filter(nota_prova1__isnull=False).exists())
+
+        arquivo = SimpleUploadedFile('notas.csv', b'tA0000,8,8\ntA0001,8,10\n', content_type='text/csv')
+        self.client.post(url, {'arquivo': arquivo})
+        self.assertEqual(AlunoModulo.objects.filter(status='aprovado').count(), 2)
+
+
+@templates_teste()
+class MatriculaEmVolumeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, _ = criar_modulo(qtd_alunos=0)
+        cls.segundo_modulo = TurmaDisciplina.objects.create(
+            id_turma=cls.turma, id_disciplina=Disciplina.objects.create(nome='Outra', carga_horaria=40),
+            id_professor=cls.professor, data_inicio=date(2025, 3, 1), data_fim=date(2025, 7, 1))
+        _, outra_turma, _, cls.alunos = criar_modulo(qtd_alunos=30, prefixo='m')
+        cls.coordenador = Coordenador.objects.create(
+            usuario=User.objects.create(username='coord_mat'), cpf='888.888.888-88', data_de_contratacao=date(2024, 1, 1))
+
+    def test_ler_matriculas(self):
+        linhas = ['\ufeffmatricula;nome\n', b'mA0001;Fulano\n', '\n', '"mA0002",x']
+        self.assertEqual(list(ler_matriculas(linhas)), ['mA0001', 'mA0002'])
+
+    def test_consultas_constantes_e_idempotente(self):
+        matriculas = [a.matricula for a in self.alunos] + ['inexistente']
+        # SAVEPOINT, alunos, já matriculados, INSERT ligação, módulos, INSERT AlunoModulo, RELEASE
+        with self.assertNumQueries(7):
+            resumo = matricular_alunos(self.turma, matriculas)
+        self.assertEqual(resumo, {'matriculados': 30, 'ja_matriculados': 0, 'nao_encontradas': ['inexistente'], 'modulos': 60})
+        self.assertEqual(self.turma.alunos.count(), 30)
+        self.assertEqual(AlunoModulo.objects.filter(id_turma_disciplina__id_turma=self.turma).count(), 60)
+
+        resumo = matricular_alunos(self.turma.pk, matriculas[:5])
+        self.assertEqual((resumo['matriculados'], resumo['ja_matriculados']), (0, 5))
+        self.assertEqual(garantir_matriculas(self.modulo), 0)
+
+    def test_view_do_coordenador(self):
+        url = reverse('coordenador_matricular_alunos', args=[self.turma.pk])
+        self.client.force_login(self.professor.usuario)
+        self.assertRedirects(self.client.post(url, {'matriculas': 'mA0000'}), reverse('lista_turmas'),
+                             fetch_redirect_response=False)
+        self.assertFalse(self.turma.alunos.exists())
+
+        self.client.force_login(self.coordenador.usuario)
+        arquivo = SimpleUploadedFile('alunos.csv', b'matricula\nmA0000\nmA0001\nzz\n', content_type='text/csv')
+        resp = self.client.post(url, {'arquivo': arquivo})
+        self.assertRedirects(resp, reverse('detalhe_turma', args=[self.turma.pk]), fetch_redirect_response=False)
+        self.assertEqual(self.turma.alunos.count(), 2)
+
+    def test_comando(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        caminho = Path(pasta.name) / 'matriculas.txt'
+        caminho.write_text('\n'.join(a.matricula for a in self.alunos[:10]), encoding='utf-8')
+        saida = StringIO()
+        call_command('matricular_alunos', self.turma.pk, str(caminho), stdout=saida)
+        self.assertIn('10 alunos matriculados', saida.getvalue())
+
+
+class MigracaoUsuariosTests(TestCase):
+    """migrar_usuarios.py (raiz do projeto) sobre uma tabela sistema_usuario criada no teste."""
+
+    def setUp(self):
+        import migrar_usuarios
+        self.script = migrar_usuarios
+        User.objects.create(id=1, username='ana')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE sistema_usuario (id integer PRIMARY KEY, nome varchar(200), '
+                'email varchar(254), criado_em datetime)')
+            cursor.executemany(
+                'INSERT INTO sistema_usuario VALUES (%s, %s, %s, NULL)',
+                [(1, 'Ana Antiga', 'ana@x.com'), (2, 'Ana Souza', 'ana@y.com'),
+                 (3, 'Bruno', 'bruno@x.com'), (4, 'Carla Lima Reis', '')])
+
+    def _migrar(self, **kwargs):
+        with mock.patch('sys.stdout', StringIO()) as saida:
+            self.script.migrar_usuarios(lote=2, processos=1, **kwargs)
+        return saida.getvalue()
+
+    def test_migra_em_lotes_com_senha_padrao(self):
+        saida = self._migrar()
+        self.assertIn('3 usuários migrados', saida)
+        self.assertIn('1 já existiam', saida)
+        usuarios = {u.pk: u for u in User.objects.filter(pk__in=[2, 3, 4])}
+        self.assertEqual(usuarios[2].username, 'ana1')
+        self.assertEqual((usuarios[4].username, usuarios[4].first_name, usuarios[4].last_name),
+                         ('usuario4', 'Carla', 'Lima Reis'))
+        for usuario in usuarios.values():
+            self.assertNotEqual(usuario.password, self.script.SENHA_PADRAO)
+            self.assertTrue(usuario.check_password(self.script.SENHA_PADRAO))
+        self.assertEqual(User.objects.get(pk=1).username, 'ana')
+
+    def test_sem_senha_cria_senha_inutilizavel(self):
+        self._migrar(sem_senha=True)
+        self.assertEqual(User.objects.count(), 4)
+        self.assertFalse(any(u.has_usable_password() for u in User.objects.filter(pk__gt=1)))
+
+    def test_dry_run_nao_grava(self):
+        with CaptureQueriesContext(connection) as ctx:
+            saida = self._migrar(dry_run=True)
+        self.assertIn('3 usuários seriam migrados', saida)
+        self.assertEqual(User.objects.count(), 1)
+        self.assertFalse(any(q['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')) for q in ctx))
+
+
+class TransferenciaBancoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dados = gerar_dados(turmas=2, alunos_por_turma=15, prefixo='tr')
+
+    def _copia_do_banco(self, pasta, nome):
+        """Arquivo SQLite com o esquema e os dados do banco de teste (que vive em memória)."""
+        caminho = Path(pasta) / nome
+        destino = sqlite3.connect(caminho)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'")
+            for (sql,) in cursor.fetchall():
+                destino.execute(sql)
+            for tabela in (t for nivel in niveis_de_tabelas() for t in nivel):
+                cursor.execute(f'SELECT * FROM "{tabela.nome}"')
+                linhas = cursor.fetchall()
+                if linhas:
+                    destino.executemany(
+                        f'INSERT INTO "{tabela.nome}" VALUES ({", ".join("?" * len(linhas[0]))})', linhas)
+        destino.commit()
+        destino.close()
+        return caminho
+
+    def test_niveis_respeitam_chaves_estrangeiras(self):
+        posicao = {t.nome: i for i, nivel in enumerate(niveis_de_tabelas()) for t in nivel}
+        self.assertLess(posicao['auth_user'], posicao['sistema_aluno'])
+        self.assertLess(posicao['sistema_turma'], posicao['sistema_turma_alunos'])
+        self.assertLess(posicao['sistema_atividade'], posicao['sistema_alunoatividade'])
+
+    def test_valor_copy(self):
+        self.assertEqual(_valor_copy(None), '\\N')
+        self.assertEqual(_valor_copy('a\tb\\c\n'), 'a\\tb\\\\c\\n')
+        self.assertEqual(_valor_copy(True), 't')
+        self.assertEqual(_valor_copy(Decimal('7.50')), '7.50')
+
+    @skipUnless(connection.vendor == 'sqlite', 'usa a API de backup do SQLite')
+    def test_sqlite_para_sqlite(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        origem = self._copia_do_banco(pasta.name, 'origem.sqlite3')
+        destino = self._copia_do_banco(pasta.name, 'destino.sqlite3')
+
+        with self.assertRaises(TransferenciaErro):
+            transferir(origem, DestinoSQLite(destino))
+
+        resultado = transferir(origem, DestinoSQLite(destino), limpar=True, lote=7)
+        self.assertEqual(resultado['sistema_aluno'], 30)
+        self.assertEqual(resultado['sistema_alunomodulo'], AlunoModulo.objects.count())
+        consulta = 'SELECT * FROM sistema_alunoatividade ORDER BY id'
+        with sqlite3.connect(origem) as a, sqlite3.connect(destino) as b:
+            self.assertEqual(a.execute(consulta).fetchall(), b.execute(consulta).fetchall())
+
+
+POSTGRES_TESTE = {
+    'ENGINE': 'django.db.backends.postgresql', 'NAME': 'x', 'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True,
+}
+
+
+class ConexoesBancoTests(TestCase):
+    def _ids(self, **config):
+        with override_settings(DATABASES={'default': {**POSTGRES_TESTE, **config}}):
+            return [p.id for p in verificar_conexoes(None)]
+
+    def test_verificacoes_de_inicializacao(self):
+        self.assertEqual(self._ids(), [])
+        self.assertEqual(self._ids(CONN_MAX_AGE=0), ['sistema.W001'])
+        ids = self._ids(OPTIONS={'pool': {'max_size': 4}})
+        self.assertIn('sistema.E002', ids)
+
+    def test_metricas_somente_para_equipe(self):
+        url = reverse('api_saude_banco')
+        usuario = User.objects.create(username='monitor')
+        self.client.force_login(usuario)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        usuario.is_staff = True
+        usuario.save()
+        dados = self.client.get(url).json()
+        self.assertEqual(dados['banco'], connection.vendor)
+        self.assertIsNone(dados['pool'])
+        self.assertGreaterEqual(dados['latencia_ms'], 0)
+
+
+@templates_teste()
+class ArmazenamentoEntregasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.professor, cls.turma, cls.modulo, cls.alunos = criar_modulo(qtd_alunos=3, prefixo='arq')
+        cls.atividades = [
+            Atividade.objects.create(data=date(2025, 3, 1), descricao=f'Trabalho {i}', id_turma_disciplina=cls.modulo)
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.media = Path(pasta.name)
+        configuracao = override_settings(MEDIA_ROOT=pasta.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def _entregar(self, aluno, atividade, conteudo, nome='trabalho.pdf'):
+        entrega = AlunoAtividade(id_aluno=aluno, id_atividade=atividade)
+        entrega.arquivo.save(nome, ContentFile(conteudo))
+        return entrega
+
+    def test_conteudo_igual_gravado_uma_vez(self):
+        a = self._entregar(self.alunos[0], self.atividades[0], b'mesmo conteudo', 'a.pdf')
+        b = self._entregar(self.alunos[1], self.atividades[0], b'mesmo conteudo', 'copia.PDF')
+        c = self._entregar(self.alunos[2], self.atividades[0], b'outro conteudo')
+        self.assertEqual(a.arquivo.name, b.arquivo.name)
+        self.assertTrue(a.arquivo.name.startswith(PREFIXO + '/'))
+        self.assertNotEqual(a.arquivo.name, c.arquivo.name)
+        self.assertEqual(len([p for p in self.media.rglob('*') if p.is_file()]), 2)
+        self.assertEqual(ArquivoArmazenado.objects.get(nome=a.arquivo.name).referencias, 2)
+
+        a.delete()
+        self.assertEqual(ArquivoArmazenado.objects.get(nome=b.arquivo.name).referencias, 1)
+
+        # Troca de arquivo move a referência
+        b.arquivo.save('novo.pdf', ContentFile(b'outro conteudo'))
+        self.assertEqual(ArquivoArmazenado.objects.get(nome=c.arquivo.name).referencias, 2)
+        self.assertEqual(ArquivoArmazenado.objects.get(nome=a.arquivo.name).referencias, 0)
+
+    def test_limpeza_de_orfaos(self):
+        mantido = self._entregar(self.alunos[0], self.atividades[0], b'mantido')
+        orfao = self._entregar(self.alunos[1], self.atividades[0], b'orfao')
+        nome_orfao = orfao.arquivo.name
+        orfao.delete()
+        # Referência desviada por um update em massa, corrigida com --reconciliar
+        ArquivoArmazenado.objects.filter(nome=mantido.arquivo.name).update(referencias=0)
+
+        call_command('limpar_arquivos_orfaos', '--carencia', '1', stdout=StringIO())
+        self.assertTrue(ArquivoArmazenado.objects.filter(nome=nome_orfao).exists())
+
+        call_command('limpar_arquivos_orfaos', '--carencia', '0', '--reconciliar', stdout=StringIO())
+        self.assertFalse(ArquivoArmazenado.objects.filter(nome=nome_orfao).exists())
+        self.assertFalse((self.media / nome_orfao).exists())
+        self.assertEqual(ArquivoArmazenado.objects.get(nome=mantido.arquivo.name).referencias, 1)
+        self.assertTrue((self.media / mantido.arquivo.name).exists())
+
+    def test_upload_recusado_durante_a_leitura(self):
+        self.client.force_login(self.alunos[0].usuario)
+        url = reverse('aluno_entregar_atividade', args=[self.atividades[1].pk])
+
+        resp = self.client.post(url, {'arquivo': SimpleUploadedFile('virus.exe', b'MZ' * 10)})
+        self.assertContains(resp, 'Tipo de arquivo não permitido')
+
+        with override_settings(UPLOAD_TAMANHO_MAXIMO=1024):
+            resp = self.client.post(url, {'arquivo': SimpleUploadedFile('grande.pdf', b'x' * 4096)})
+        self.assertContains(resp, 'maior que o limite')
+        self.assertFalse(AlunoAtividade.objects.filter(id_atividade=self.atividades[1]).exists())
+        self.assertFalse(any(p.is_file() for p in self.media.rglob('*')))
+
+        resp = self.client.post(url, {'arquivo': SimpleUploadedFile('ok.pdf', b'%PDF-1.4')})
+        self.assertRedirects(resp, reverse('aluno_minhas_atividades'), fetch_redirect_response=False)
+        entrega = AlunoAtividade.objects.get(id_atividade=self.atividades[1])
+        self.assertTrue(entrega.arquivo.name.startswith(PREFIXO + '/'))
+
+    def test_handler_so_na_view_de_entrega(self):
+        url = reverse('aluno_entregar_atividade', args=[self.atividades[1].pk])
+        cliente = Client(enforce_csrf_checks=True)
+        cliente.force_login(self.alunos[0].usuario)
+        resp = cliente.post(url, {'arquivo': SimpleUploadedFile('ok.pdf', b'%PDF-1.4')})
+        self.assertEqual(resp.status_code, 403)
+
+        # Outros uploads (importação de notas) não passam pelos limites das entregas
+        garantir_matriculas(self.modulo)
+        self.client.force_login(self.professor.usuario)
+        with override_settings(UPLOAD_EXTENSOES={'.pdf'}):
+            self.client.post(reverse('professor_importar_notas', args=[self.modulo.pk]),
+                             {'arquivo': SimpleUploadedFile('notas.csv', b'arqA0000,8,8\n')})
+        self.assertEqual(AlunoModulo.objects.get(id_aluno=self.alunos[0]).status, 'aprovado')
+
+    def test_salvar_sem_trocar_arquivo_nao_consulta(self):
+        self._entregar(self.alunos[0], self.atividades[0], b'conteudo')
+        entrega = AlunoAtividade.objects.get(id_aluno=self.alunos[0])
+        entrega.nota = Decimal('9.00')
+        with CaptureQueriesContext(connection) as ctx:
+            entrega.save()
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(ArquivoArmazenado.objects.get(nome=entrega.arquivo.name).referencias, 1)
+
+    def test_envio_perdedor_registra_arquivo_para_limpeza(self):
+        aluno, atividade = self.alunos[0], self.atividades[1]
+        validar = EntregaAtividadeForm.is_valid
+
+        def outro_envio_vence(form):
+            AlunoAtividade.objects.create(id_aluno=aluno, id_atividade=atividade, resposta_texto='primeiro')
+            return validar(form)
+
+        self.client.force_login(aluno.usuario)
+        with mock.patch.object(EntregaAtividadeForm, 'is_valid', outro_envio_vence):
+            resp = self.client.post(reverse('aluno_entregar_atividade', args=[atividade.pk]),
+                                    {'arquivo': SimpleUploadedFile('tarde.pdf', b'%PDF tarde')})
+        self.assertRedirects(resp, reverse('aluno_minhas_atividades'), fetch_redirect_response=False)
+        descartado = ArquivoArmazenado.objects.get()
+        self.assertEqual(descartado.referencias, 0)
+
+        call_command('limpar_arquivos_orfaos', '--carencia', '0', stdout=StringIO())
+        self.assertFalse(any(p.is_file() for p in self.media.rglob('*')))
+
+    def test_zip_das_entregas_com_manifesto(self):
+        atividade, outra = self.atividades
+        self._entregar(self.alunos[0], atividade, b'%PDF conteudo', 'Meu Trabalho.pdf')
+        self._entregar(self.alunos[1], atividade, b'texto simples', 'resposta.txt')
+        AlunoAtividade.objects.create(id_aluno=self.alunos[2], id_atividade=atividade, resposta_texto='só texto')
+        self._entregar(self.alunos[0], outra, b'%PDF outra')
+
+        self.client.force_login(self.professor.usuario)
+        resp = self.client.get(reverse('professor_baixar_entregas_atividade', args=[atividade.pk]))
+        self.assertEqual(resp['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(b''.join(resp.streaming_content))) as zf:
+            self.assertEqual(zf.namelist(), ['arqA0000.pdf', 'arqA0001.txt', 'entregas.csv'])
+            self.assertEqual(zf.read('arqA0000.pdf'), b'%PDF conteudo')
+            self.assertEqual(zf.getinfo('arqA0000.pdf').compress_type, zipfile.ZIP_STORED)
+            manifesto = list(csv.reader(io.StringIO(zf.read('entregas.csv').decode('utf-8-sig'))))
+        self.assertEqual(len(manifesto), 4)
+        self.assertEqual(manifesto[1][7], 'arqA0000.pdf')
+        self.assertEqual((manifesto[3][2], manifesto[3][7], manifesto[3][8]), ('arqA0002', '', 'só texto'))
+
+        resp = self.client.get(reverse('professor_baixar_entregas_modulo', args=[self.modulo.pk]))
+        with zipfile.ZipFile(io.BytesIO(b''.join(resp.streaming_content))) as zf:
+            self.assertIn(f'atividade_{outra.pk}/arqA0000.pdf', zf.namelist())
+            self.assertEqual(len(zf.namelist()), 4)
+
+        self.client.force_login(self.alunos[0].usuario)
+        resp = self.client.get(reverse('professor_baixar_entregas_atividade', args=[atividade.pk]))
+        self.assertRedirects(resp, reverse('home'), fetch_redirect_response=False)
+
+    def test_arquivo_servido_com_permissao_range_e_etag(self):
+        entrega = self._entregar(self.alunos[0], self.atividades[0], b'0123456789', 'trabalho.txt')
+        url = entrega.get_arquivo_url()
+
+        self.client.force_login(self.alunos[1].usuario)
+        self.assertRedirects(self.client.get(url), reverse('home'), fetch_redirect_response=False)
+
+        self.client.force_login(self.alunos[0].usuario)
+        resp = self.client.get(url)
+        self.assertEqual(b''.join(resp.streaming_content), b'0123456789')
+        self.assertIn('arqA0000_atividade', resp['Content-Disposition'])
+        etag = resp['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        resp = self.client.get(url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(resp.streaming_content), b'2345')
+        resp = self.client.get(url, HTTP_RANGE='bytes=-3', HTTP_IF_RANGE=etag)
+        self.assertEqual(b''.join(resp.streaming_content), b'789')
+        resp = self.client.get(url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"outro"')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=20-').status_code, 416)
+
+        self.client.force_login(self.professor.usuario)
+        with override_settings(ARQUIVOS_ENVIO='x-accel-redirect'):
+            resp = self.client.get(url)
+        self.assertEqual(resp['X-Accel-Redirect'], '/protegido/' + entrega.arquivo.name)
+        self.assertEqual(resp.content, b'')
+
+
+@templates_teste()
+class EntregaConcorrenteTests(TransactionTestCase):
+    """Envios simultâneos da mesma entrega (prazo final): um vence, os demais recebem aviso."""
+
+    ENVIOS = 8
+
+    def setUp(self):
+        self.professor, self.turma, self.modulo, self.alunos = criar_modulo(qtd_alunos=2, prefixo='conc')
+        self.atividade = Atividade.objects.create(
+            data=date(2025, 3, 1), descricao='Prova final', id_turma_disciplina=self.modulo
+        )
+        self.url = reverse('aluno_entregar_atividade', args=[self.atividade.pk])
+
+    def _cliente(self, aluno):
+        cliente = Client()
+        cliente.force_login(aluno.usuario)
+        return cliente
+
+    # O SQLite de teste em memória não aceita conexões paralelas (uma por thread)
+    @skipUnlessDBFeature('test_db_allows_multiple_connections')
+    def test_um_envio_vence(self):
+        clientes = [self._cliente(self.alunos[0]) for _ in range(self.ENVIOS)]
+        largada = threading.Barrier(self.ENVIOS)
+        status, erros = [], []
+
+        def enviar(cliente, i):
+            try:
+                largada.wait()
+                status.append(cliente.post(self.url, {'resposta_texto': f'resposta {i}'}).status_code)
+            except Exception as erro:  # noqa: BLE001 (reportado na thread principal)
+                erros.append(erro)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=enviar, args=(c, i)) for i, c in enumerate(clientes)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erros, [])
+        self.assertEqual(status, [302] * self.ENVIOS)
+        self.assertEqual(AlunoAtividade.objects.filter(id_atividade=self.atividade).count(), 1)
+
+    def test_consultas_por_envio(self):
+        cliente = self._cliente(self.alunos[1])
+        cliente.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = cliente.post(self.url, {'resposta_texto': 'ok'})
+        self.assertEqual(resp.status_code, 302)
+        # sessão, usuário, autorização e o INSERT (entre savepoints) + mensagem na sessão
+        self.assertLessEqual(len(ctx), 7)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = cliente.post(self.url, {'resposta_texto': 'de novo'})
+        self.assertRedirects(resp, reverse('aluno_minhas_atividades'), fetch_redirect_response=False)
+        self.assertEqual(AlunoAtividade.objects.get(id_aluno=self.alunos[1]).resposta_texto, 'ok')
+
+
+class AdminConsultasTests(TestCase):
+    """Changelists e autocomplete do admin com o mesmo número de consultas para qualquer volume."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin_consultas', is_staff=True, is_superuser=True)
+
+    def _modelos(self):
+        return [m for m in admin.site._registry if m._meta.app_label == 'sistema']
+
+    def _consultas(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200, url)
+        return len(ctx)
+
+    def _medir(self):
+        self.client.force_login(self.admin)
+        medidas = {}
+        for modelo in self._modelos():
+            opts = modelo._meta
+            medidas[opts.model_name] = self._consultas(reverse(f'admin:sistema_{opts.model_name}_changelist'))
+        autocomplete = reverse('admin:autocomplete')
+        for modelo, campo in [('alunoatividade', 'id_atividade'), ('alunoatividade', 'id_aluno'), ('aula', 'id_turma_disciplina')]:
+            medidas[f'{modelo}.{campo}'] = self._consultas(
+                f'{autocomplete}?app_label=sistema&model_name={modelo}&field_name={campo}'
+            )
+        return medidas
+
+    def test_consultas_constantes(self):
+        gerar_dados(turmas=1, alunos_por_turma=3, modulos_por_turma=2, atividades_por_modulo=2,
+                    aulas_por_modulo=2, prefixo='adm1')
+        poucos = self._medir()
+        gerar_dados(turmas=3, alunos_por_turma=10, modulos_por_turma=3, atividades_por_modulo=4,
+                    aulas_por_modulo=4, prefixo='adm2')
+        self.assertEqual(self._medir(), poucos)
+
+    def test_contagem_exata_fora_do_postgresql(self):
+        gerar_dados(turmas=1, alunos_por_turma=3, modulos_por_turma=1, atividades_por_modulo=1, prefixo='adm3')
+        self.assertIsNone(contagem_estimada(Aluno.objects.all(), limiar=0))
+        self.assertEqual(PaginatorEstimado(Aluno.objects.order_by('pk'), 2).count, Aluno.objects.count())
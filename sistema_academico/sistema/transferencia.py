@@ -0,0 +1,264 @@
+"""Cópia tabela a tabela do banco SQLite para o PostgreSQL.
+
+Substitui o ciclo ``dumpdata`` + ``loaddata`` (um JSON único com o banco
+inteiro, carregado registro a registro pelo ORM): cada tabela é lida em lotes
+ordenados por pk e gravada com ``COPY ... FROM STDIN`` (``copy_expert`` do
+psycopg2). As tabelas são agrupadas em níveis pela dependência de chaves
+estrangeiras; as do mesmo nível não dependem umas das outras e são copiadas em
+paralelo, cada uma com suas próprias conexões. Ao final as sequências do
+PostgreSQL são ajustadas para o maior id copiado.
+
+O destino também pode ser outro arquivo SQLite (``DestinoSQLite``), o que
+permite testar a transferência sem um servidor PostgreSQL.
+
+O esquema do destino deve existir antes (``manage.py migrate``).
+"""
+
+import io
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.db.models.fields import AutoFieldMixin
+
+LOTE = 5000
+
+
+class TransferenciaErro(Exception):
+    """Problema que impede a transferência (destino não vazio, contagens divergentes...)."""
+
+
+def _q(nome):
+    return '"%s"' % nome.replace('"', '""')
+
+
+class Tabela:
+    def __init__(self, modelo):
+        opts = modelo._meta
+        self.nome = opts.db_table
+        self.colunas = [f.column for f in opts.local_concrete_fields]
+        self.pk = opts.pk.column
+        self.sequencial = isinstance(opts.pk, AutoFieldMixin)
+        self.dependencias = {
+            f.related_model._meta.db_table
+            for f in opts.local_concrete_fields
+            if f.is_relation and f.related_model is not None
+        } - {self.nome}
+
+    def __repr__(self):
+        return f'<Tabela {self.nome}>'
+
+
+def niveis_de_tabelas(modelos=None):
+    """Agrupa as tabelas em níveis: cada uma só referencia tabelas de níveis anteriores.
+
+    Tabelas em ciclo de FKs (não há no projeto) vão juntas para o último nível.
+    """
+    if modelos is None:
+        modelos = [
+            m for m in apps.get_models(include_auto_created=True)
+            if m._meta.managed and not m._meta.proxy
+        ]
+    tabelas = {t.nome: t for t in map(Tabela, modelos)}
+    pendentes = dict(tabelas)
+    niveis, prontas = [], set()
+    while pendentes:
+        nivel = [t for t in pendentes.values() if (t.dependencias & tabelas.keys()) <= prontas]
+        if not nivel:
+            nivel = list(pendentes.values())
+        nivel.sort(key=lambda t: t.nome)
+        niveis.append(nivel)
+        for t in nivel:
+            prontas.add(t.nome)
+            del pendentes[t.nome]
+    return niveis
+
+
+def ler_lotes(conexao, tabela, lote=LOTE):
+    """Lotes de linhas da tabela na ordem da pk (keyset: cada lote é uma consulta limitada)."""
+    colunas = ', '.join(map(_q, tabela.colunas))
+    indice_pk = tabela.colunas.index(tabela.pk)
+    ultimo = None
+    while True:
+        if ultimo is None:
+            linhas = conexao.execute(
+                f'SELECT {colunas} FROM {_q(tabela.nome)} ORDER BY {_q(tabela.pk)} LIMIT ?', [lote]
+            ).fetchall()
+        else:
+            linhas = conexao.execute(
+                f'SELECT {colunas} FROM {_q(tabela.nome)} WHERE {_q(tabela.pk)} > ? '
+                f'ORDER BY {_q(tabela.pk)} LIMIT ?', [ultimo, lote]
+            ).fetchall()
+        if not linhas:
+            return
+        yield linhas
+        ultimo = linhas[-1][indice_pk]
+
+
+def _valor_copy(valor):
+    """Valor no formato texto do COPY (``\\N`` = NULL; barra, tab e quebras escapadas)."""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    if isinstance(valor, bytes):
+        return '\\\\x' + valor.hex()
+    texto = str(valor)
+    if isinstance(valor, str):
+        texto = (texto.replace('\\', '\\\\').replace('\t', '\\t')
+                 .replace('\n', '\\n').replace('\r', '\\r'))
+    return texto
+
+
+def linhas_copy(linhas):
+    buffer = io.StringIO()
+    for linha in linhas:
+        buffer.write('\t'.join(map(_valor_copy, linha)))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+class DestinoPostgres:
+    """Destino PostgreSQL via psycopg2, com escrita por ``COPY``."""
+
+    paralelo = True
+
+    def __init__(self, **parametros):
+        self.parametros = parametros
+
+    def conectar(self):
+        import psycopg2
+
+        conexao = psycopg2.connect(**self.parametros)
+        with conexao.cursor() as cursor:
+            # O SQLite guarda datas/horas em UTC sem fuso
+            cursor.execute("SET TIME ZONE 'UTC'")
+        return conexao
+
+    def contar(self, conexao, tabela):
+        with conexao.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {_q(tabela.nome)}')
+            return cursor.fetchone()[0]
+
+    def gravar(self, conexao, tabela, linhas):
+        colunas = ', '.join(map(_q, tabela.colunas))
+        with conexao.cursor() as cursor:
+            cursor.copy_expert(f'COPY {_q(tabela.nome)} ({colunas}) FROM STDIN', linhas_copy(linhas))
+
+    def limpar(self, conexao, tabelas):
+        if tabelas:
+            with conexao.cursor() as cursor:
+                cursor.execute(f'TRUNCATE {", ".join(_q(t.nome) for t in tabelas)} CASCADE')
+
+    def resetar_sequencias(self, conexao, tabelas):
+        with conexao.cursor() as cursor:
+            for tabela in tabelas:
+                if tabela.sequencial:
+                    cursor.execute(
+                        f'SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX({_q(tabela.pk)}), 1), '
+                        f'MAX({_q(tabela.pk)}) IS NOT NULL) FROM {_q(tabela.nome)}',
+                        [_q(tabela.nome), tabela.pk],
+                    )
+
+
+class DestinoSQLite:
+    """Destino SQLite (modo de teste). Escreve em série: o SQLite aceita um escritor por vez."""
+
+    paralelo = False
+
+    def __init__(self, caminho):
+        self.caminho = str(caminho)
+
+    def conectar(self):
+        return sqlite3.connect(self.caminho, check_same_thread=False)
+
+    def contar(self, conexao, tabela):
+        return conexao.execute(f'SELECT COUNT(*) FROM {_q(tabela.nome)}').fetchone()[0]
+
+    def gravar(self, conexao, tabela, linhas):
+        colunas = ', '.join(map(_q, tabela.colunas))
+        marcadores = ', '.join('?' * len(tabela.colunas))
+        conexao.executemany(f'INSERT INTO {_q(tabela.nome)} ({colunas}) VALUES ({marcadores})', linhas)
+
+    def limpar(self, conexao, tabelas):
+        conexao.execute('PRAGMA foreign_keys = OFF')
+        for tabela in tabelas:
+            conexao.execute(f'DELETE FROM {_q(tabela.nome)}')
+
+    def resetar_sequencias(self, conexao, tabelas):
+        # O SQLite atualiza sqlite_sequence sozinho ao inserir ids explícitos
+        pass
+
+
+def _conectar_origem(caminho):
+    return sqlite3.connect(f'file:{caminho}?mode=ro', uri=True, check_same_thread=False)
+
+
+def copiar_tabela(origem, destino, tabela, lote=LOTE):
+    """Copia uma tabela em uma transação do destino e confere a contagem. Devolve (linhas, segundos)."""
+    inicio = time.perf_counter()
+    fonte = _conectar_origem(origem)
+    conexao = destino.conectar()
+    try:
+        total = 0
+        for linhas in ler_lotes(fonte, tabela, lote):
+            destino.gravar(conexao, tabela, linhas)
+            total += len(linhas)
+        copiadas = destino.contar(conexao, tabela)
+        if copiadas != total:
+            raise TransferenciaErro(f'{tabela.nome}: {total} linhas lidas, {copiadas} no destino')
+        conexao.commit()
+    except BaseException:
+        conexao.rollback()
+        raise
+    finally:
+        conexao.close()
+        fonte.close()
+    return total, time.perf_counter() - inicio
+
+
+def transferir(origem, destino, limpar=False, lote=LOTE, processos=4, progresso=None):
+    """Copia todas as tabelas dos modelos de ``origem`` (arquivo SQLite) para ``destino``.
+
+    Sem ``limpar``, exige que as tabelas do destino estejam vazias (o
+    ``migrate`` já cria tipos de conteúdo e permissões: use ``limpar`` para
+    substituí-los pelos da origem). ``progresso(tabela, linhas, segundos)`` é
+    chamado ao fim de cada tabela. Devolve ``{tabela: linhas}``.
+    """
+    niveis = niveis_de_tabelas()
+    todas = [t for nivel in niveis for t in nivel]
+
+    conexao = destino.conectar()
+    try:
+        if limpar:
+            destino.limpar(conexao, todas[::-1])
+            conexao.commit()
+        else:
+            ocupadas = [t.nome for t in todas if destino.contar(conexao, t)]
+            if ocupadas:
+                raise TransferenciaErro(
+                    f'Tabelas do destino não estão vazias: {", ".join(ocupadas)}. Use a opção de limpar.'
+                )
+    finally:
+        conexao.close()
+
+    resultado = {}
+    trabalhadores = max(1, processos) if destino.paralelo else 1
+    with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+        for nivel in niveis:
+            futuros = {executor.submit(copiar_tabela, origem, destino, t, lote): t for t in nivel}
+            for futuro, tabela in futuros.items():
+                linhas, segundos = futuro.result()
+                resultado[tabela.nome] = linhas
+                if progresso:
+                    progresso(tabela.nome, linhas, segundos)
+
+    conexao = destino.conectar()
+    try:
+        destino.resetar_sequencias(conexao, todas)
+        conexao.commit()
+    finally:
+        conexao.close()
+    return resultado
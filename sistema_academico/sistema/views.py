@@ -1,11 +1,19 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db.models import Avg, Count, Exists, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db import IntegrityError, connection, transaction
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponseBadRequest
-from django.views.decorators.csrf import csrf_exempt
+from django.utils.text import slugify
+from django.http import Http404, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 import json
+import os
+import time
 from .models import (
     Aluno,
     AlunoAtividade,
@@ -18,23 +26,40 @@ from .models import (
     TurmaDisciplina,
 )
 from .forms import AtividadeForm, EntregaAtividadeForm, CorrecaoForm, TurmaForm
+from .estatisticas import (
+    BLOCO,
+    ESCOPOS,
+    NotaInvalida,
+    calcular_estatisticas,
+    estatisticas_banco,
+    ler_notas_json,
+    ler_notas_texto,
+)
+from .armazenamento import UploadVerificadoHandler, registrar_descartado, servir_arquivo
+from .checks import estatisticas_conexao
+from .contadores import obter_contadores
+from .exportacao import FORMATOS, entregas_em_zip, linhas_exportacao
+from .matriculas import ler_matriculas, matricular_alunos
+from .notas import MAX_ERROS_IMPORTACAO, garantir_matriculas, importar_notas_csv, lancar_notas, parse_nota
+from .paginacao import paginar
+from .permissoes import professor_do_modulo, professor_leciona, professor_no_escopo
+
+ATIVIDADES_POR_PAGINA = 20
 
 # Views de Autenticação
 
 def _get_professor(request):
-    try:
-        return Professor.objects.get(usuario=request.user)
-    except Professor.DoesNotExist:
+    professor = request.perfil.professor
+    if professor is None:
         messages.error(request, 'Você não está cadastrado como professor.')
-        return None
+    return professor
 
 
 def _get_aluno(request):
-    try:
-        return Aluno.objects.get(usuario=request.user)
-    except Aluno.DoesNotExist:
+    aluno = request.perfil.aluno
+    if aluno is None:
         messages.error(request, 'Você não está cadastrado como aluno.')
-        return None
+    return aluno
 
 # Views de Autenticação
 
@@ -72,43 +97,144 @@ def logout_view(request):
 # Views Públicas (Dashboard)
 
 def home(request):
-    """Página inicial com estatísticas gerais do sistema"""
-    context = {
-        'total_alunos': Aluno.objects.count(),
-        'total_professores': Professor.objects.count(),
-        'total_turmas': Turma.objects.count(),
-        'total_disciplinas': Disciplina.objects.count(),
-    }
+    """Página inicial com estatísticas gerais do sistema (contadores em cache)"""
+    context = obter_contadores()
     return render(request, 'sistema/home.html', context)
 
 # Views Protegidas (requerem login)
 
+def _nome_usuario(usuario):
+    return usuario.get_full_name() or usuario.username
+
+
+def _busca_usuario(q, *campos):
+    """Filtro de busca textual por nome/username do usuário e campos extras."""
+    filtro = Q(usuario__first_name__icontains=q) | Q(usuario__last_name__icontains=q) | Q(usuario__username__icontains=q)
+    for campo in campos:
+        filtro |= Q(**{f'{campo}__icontains': q})
+    return filtro
+
+
+def _responder_lista(request, pagina, template, nome, serializar):
+    """Renderiza a página da listagem ou, com ?formato=json, devolve a versão JSON."""
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({
+            'resultados': [serializar(obj) for obj in pagina],
+            'proximo': pagina.proximo,
+            'anterior': pagina.anterior,
+        })
+    return render(request, template, {
+        nome: pagina.itens,
+        'pagina': pagina,
+        'q': request.GET.get('q', ''),
+    })
+
+
 @login_required
 def lista_alunos(request):
-    """Lista todos os alunos cadastrados"""
-    alunos = Aluno.objects.select_related('usuario').all()
-    return render(request, 'sistema/lista_alunos.html', {'alunos': alunos})
+    """Lista os alunos cadastrados (paginação por matrícula).
+    Filtros: ?q= (nome/matrícula/CPF), ?curso=, ?semestre= (das turmas do aluno).
+    """
+    alunos = Aluno.objects.select_related('usuario')
+    q = request.GET.get('q', '').strip()
+    if q:
+        alunos = alunos.filter(_busca_usuario(q, 'matricula', 'cpf'))
+    filtro_turma = {
+        f'turma__{campo}': request.GET[campo]
+        for campo in ('curso', 'semestre') if request.GET.get(campo)
+    }
+    if filtro_turma:
+        alunos = alunos.filter(pk__in=Turma.alunos.through.objects.filter(**filtro_turma).values('aluno_id'))
+
+    pagina = paginar(alunos, 'matricula', request.GET)
+    return _responder_lista(request, pagina, 'sistema/lista_alunos.html', 'alunos', lambda a: {
+        'id': a.pk,
+        'nome': _nome_usuario(a.usuario),
+        'matricula': a.matricula,
+        'email': a.usuario.email,
+    })
 
 
 @login_required
 def lista_professores(request):
-    """Lista todos os professores cadastrados"""
-    professores = Professor.objects.select_related('usuario').all()
-    return render(request, 'sistema/lista_professores.html', {'professores': professores})
+    """Lista os professores cadastrados (paginação por matrícula). Filtros: ?q=, ?titulacao="""
+    professores = Professor.objects.select_related('usuario')
+    q = request.GET.get('q', '').strip()
+    if q:
+        professores = professores.filter(_busca_usuario(q, 'matricula'))
+    if request.GET.get('titulacao'):
+        professores = professores.filter(titulacao=request.GET['titulacao'])
+
+    pagina = paginar(professores, 'matricula', request.GET)
+    return _responder_lista(request, pagina, 'sistema/lista_professores.html', 'professores', lambda p: {
+        'id': p.pk,
+        'nome': _nome_usuario(p.usuario),
+        'matricula': p.matricula,
+        'titulacao': p.titulacao,
+        'email': p.usuario.email,
+    })
 
 
 @login_required
 def lista_coordenadores(request):
-    """Lista todos os coordenadores cadastrados"""
-    coordenadores = Coordenador.objects.select_related('usuario').all()
-    return render(request, 'sistema/lista_coordenadores.html', {'coordenadores': coordenadores})
+    """Lista os coordenadores cadastrados (paginação por id). Filtro: ?q="""
+    coordenadores = Coordenador.objects.select_related('usuario')
+    q = request.GET.get('q', '').strip()
+    if q:
+        coordenadores = coordenadores.filter(_busca_usuario(q))
+
+    pagina = paginar(coordenadores, 'pk', request.GET)
+    return _responder_lista(request, pagina, 'sistema/lista_coordenadores.html', 'coordenadores', lambda c: {
+        'id': c.pk,
+        'nome': _nome_usuario(c.usuario),
+        'email': c.usuario.email,
+        'telefone': c.telefone,
+    })
+
+
+def _agregado_por_turma(manager, caminho_turma, agregado, padrao=0):
+    """Subconsulta correlacionada que agrega as linhas de ``manager`` de cada turma."""
+    sub = (
+        manager.filter(**{caminho_turma: OuterRef('pk')})
+        .order_by()
+        .values(caminho_turma)
+        .annotate(valor=agregado)
+        .values('valor')
+    )
+    if isinstance(agregado, Count):
+        return Coalesce(Subquery(sub), padrao)
+    return Subquery(sub)
 
 
 @login_required
 def lista_turmas(request):
-    """Lista todas as turmas com coordenadores"""
-    turmas = Turma.objects.select_related('id_coordenador__usuario').prefetch_related('alunos').all()
-    return render(request, 'sistema/lista_turmas.html', {'turmas': turmas})
+    """Lista as turmas com coordenadores (paginação por id). Filtros: ?q=, ?curso=, ?semestre=
+    Número de alunos, de módulos e a média final da turma vêm anotados em SQL
+    (subconsultas por turma), sem carregar os alunos; eles só são lidos em detalhe_turma.
+    """
+    turmas = Turma.objects.select_related('id_coordenador__usuario').annotate(
+        qtd_alunos=_agregado_por_turma(Turma.alunos.through.objects, 'turma', Count('pk')),
+        qtd_modulos=_agregado_por_turma(TurmaDisciplina.objects, 'id_turma', Count('pk')),
+        media_turma=_agregado_por_turma(AlunoModulo.objects, 'id_turma_disciplina__id_turma', Avg('media_final')),
+    )
+    q = request.GET.get('q', '').strip()
+    if q:
+        turmas = turmas.filter(Q(nome__icontains=q) | Q(curso__icontains=q))
+    for campo in ('curso', 'semestre'):
+        if request.GET.get(campo):
+            turmas = turmas.filter(**{campo: request.GET[campo]})
+
+    pagina = paginar(turmas, 'pk', request.GET)
+    return _responder_lista(request, pagina, 'sistema/lista_turmas.html', 'turmas', lambda t: {
+        'id': t.pk,
+        'nome': t.nome,
+        'curso': t.curso,
+        'semestre': t.semestre,
+        'coordenador': _nome_usuario(t.id_coordenador.usuario) if t.id_coordenador else None,
+        'qtd_alunos': t.qtd_alunos,
+        'qtd_modulos': t.qtd_modulos,
+        'media_turma': float(t.media_turma) if t.media_turma is not None else None,
+    })
 
 
 @login_required
@@ -126,9 +252,18 @@ def detalhe_turma(request, turma_id):
 
 @login_required
 def lista_disciplinas(request):
-    """Lista todas as disciplinas"""
+    """Lista as disciplinas (paginação por nome). Filtro: ?q="""
     disciplinas = Disciplina.objects.all()
-    return render(request, 'sistema/lista_disciplinas.html', {'disciplinas': disciplinas})
+    q = request.GET.get('q', '').strip()
+    if q:
+        disciplinas = disciplinas.filter(nome__icontains=q)
+
+    pagina = paginar(disciplinas, 'nome', request.GET)
+    return _responder_lista(request, pagina, 'sistema/lista_disciplinas.html', 'disciplinas', lambda d: {
+        'id': d.pk,
+        'nome': d.nome,
+        'carga_horaria': d.carga_horaria,
+    })
 
 
 # ==================== VIEWS PARA PROFESSORES ====================
@@ -150,18 +285,10 @@ def professor_minhas_turmas(request):
 
 
 @login_required
+@professor_do_modulo('Você não tem permissão para criar atividades neste módulo.')
 def professor_criar_atividade(request, modulo_id):
     """Professor cria uma atividade para um módulo (turma+disciplina)"""
-    professor = _get_professor(request)
-    if not professor:
-        return redirect('home')
-    
-    modulo = get_object_or_404(TurmaDisciplina, pk=modulo_id)
-    
-    # Verificar se o professor leciona este módulo
-    if modulo.id_professor != professor:
-        messages.error(request, 'Você não tem permissão para criar atividades neste módulo.')
-        return redirect('professor_minhas_turmas')
+    modulo = get_object_or_404(TurmaDisciplina.objects.select_related('id_turma', 'id_disciplina'), pk=modulo_id)
     
     if request.method == 'POST':
         form = AtividadeForm(request.POST)
@@ -181,18 +308,10 @@ def professor_criar_atividade(request, modulo_id):
 
 
 @login_required
+@professor_do_modulo('Você não tem permissão para ver estas atividades.')
 def professor_ver_atividades(request, modulo_id):
     """Professor vê todas as atividades de um módulo e suas entregas"""
-    professor = _get_professor(request)
-    if not professor:
-        return redirect('home')
-    
-    modulo = get_object_or_404(TurmaDisciplina, pk=modulo_id)
-    
-    # Verificar permissão
-    if modulo.id_professor != professor:
-        messages.error(request, 'Você não tem permissão para ver estas atividades.')
-        return redirect('professor_minhas_turmas')
+    modulo = get_object_or_404(TurmaDisciplina.objects.select_related('id_turma', 'id_disciplina'), pk=modulo_id)
     
     atividades = Atividade.objects.filter(id_turma_disciplina=modulo).prefetch_related('entregas__id_aluno__usuario')
     
@@ -202,6 +321,62 @@ def professor_ver_atividades(request, modulo_id):
     })
 
 
+def _resposta_zip(partes, nome):
+    response = StreamingHttpResponse(partes, content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{nome}"'
+    return response
+
+
+@login_required
+@professor_do_modulo('Você não tem permissão para baixar as entregas deste módulo.')
+def professor_baixar_entregas_modulo(request, modulo_id):
+    """ZIP (gerado em fluxo) com as entregas de todas as atividades do módulo e o manifesto CSV."""
+    entregas = AlunoAtividade.objects.filter(id_atividade__id_turma_disciplina_id=modulo_id)
+    storage = AlunoAtividade._meta.get_field('arquivo').storage
+    return _resposta_zip(entregas_em_zip(entregas, storage, por_atividade=False), f'entregas_modulo_{modulo_id}.zip')
+
+
+@login_required
+def professor_baixar_entregas_atividade(request, atividade_id):
+    """ZIP (gerado em fluxo) com as entregas de uma atividade e o manifesto CSV."""
+    professor = _get_professor(request)
+    if not professor:
+        return redirect('home')
+    modulo_id = get_object_or_404(
+        Atividade.objects.values_list('id_turma_disciplina_id', flat=True), pk=atividade_id
+    )
+    if not professor_leciona(professor, modulo_id):
+        messages.error(request, 'Você não tem permissão para baixar as entregas desta atividade.')
+        return redirect('professor_minhas_turmas')
+    entregas = AlunoAtividade.objects.filter(id_atividade_id=atividade_id)
+    storage = AlunoAtividade._meta.get_field('arquivo').storage
+    return _resposta_zip(entregas_em_zip(entregas, storage), f'entregas_atividade_{atividade_id}.zip')
+
+
+@login_required
+def baixar_arquivo_entrega(request, entrega_id):
+    """Arquivo de uma entrega, só para o aluno que entregou e o professor do módulo.
+    Suporta Range/ETag ou delega o envio ao servidor web (settings.ARQUIVOS_ENVIO).
+    """
+    entrega = get_object_or_404(AlunoAtividade.objects.values(
+        'arquivo', 'id_aluno_id', 'id_aluno__matricula', 'id_atividade_id', 'id_atividade__id_turma_disciplina_id',
+    ), pk=entrega_id)
+    aluno = request.perfil.aluno
+    if not ((aluno is not None and aluno.pk == entrega['id_aluno_id'])
+            or professor_leciona(request.perfil.professor, entrega['id_atividade__id_turma_disciplina_id'])):
+        messages.error(request, 'Você não tem permissão para acessar este arquivo.')
+        return redirect('home')
+
+    storage = AlunoAtividade._meta.get_field('arquivo').storage
+    nome = entrega['arquivo']
+    if not nome or not storage.exists(nome):
+        raise Http404('Entrega sem arquivo.')
+    extensao = os.path.splitext(nome)[1].lower()
+    return servir_arquivo(
+        request, storage, nome, f"{entrega['id_aluno__matricula']}_atividade{entrega['id_atividade_id']}{extensao}"
+    )
+
+
 @login_required
 def professor_corrigir_entrega(request, entrega_id):
     """Professor corrige (dá nota) a uma entrega de atividade"""
@@ -210,14 +385,13 @@ def professor_corrigir_entrega(request, entrega_id):
         return redirect('home')
     
     entrega = get_object_or_404(AlunoAtividade.objects.select_related(
-        'id_atividade__id_turma_disciplina__id_professor',
         'id_atividade__id_turma_disciplina__id_turma',
         'id_atividade__id_turma_disciplina__id_disciplina',
         'id_aluno__usuario'
     ), pk=entrega_id)
     
     # Verificar se o professor leciona o módulo desta atividade
-    if entrega.id_atividade.id_turma_disciplina.id_professor != professor:
+    if not professor_leciona(professor, entrega.id_atividade.id_turma_disciplina_id):
         messages.error(request, 'Você não tem permissão para corrigir esta entrega.')
         return redirect('professor_minhas_turmas')
     
@@ -245,68 +419,98 @@ def aluno_minhas_atividades(request):
     if not aluno:
         return redirect('home')
     
-    # Turmas em que o aluno está matriculado
-    turmas = aluno.turmas.all()
-    
-    # Atividades de todos os módulos dessas turmas
+    # Atividades de todos os módulos das turmas do aluno, mais recentes primeiro.
+    # O prefetch traz apenas a entrega do próprio aluno: custo constante de
+    # consultas, independente do número de atividades ou de colegas.
     atividades = Atividade.objects.filter(
-        id_turma_disciplina__id_turma__in=turmas
+        id_turma_disciplina__id_turma__alunos=aluno
     ).select_related(
         'id_turma_disciplina__id_turma',
         'id_turma_disciplina__id_disciplina',
         'id_turma_disciplina__id_professor__usuario'
-    ).prefetch_related('entregas').order_by('-data')
-    
+    ).prefetch_related(
+        Prefetch('entregas', queryset=AlunoAtividade.objects.filter(id_aluno=aluno), to_attr='minhas_entregas')
+    ).order_by('-data', '-id')
+
+    pagina = Paginator(atividades, ATIVIDADES_POR_PAGINA).get_page(request.GET.get('pagina'))
+
     # Adicionar info se o aluno já entregou cada atividade
-    for atividade in atividades:
-        atividade.minha_entrega = atividade.entregas.filter(id_aluno=aluno).first()
+    for atividade in pagina:
+        atividade.minha_entrega = atividade.minhas_entregas[0] if atividade.minhas_entregas else None
     
     return render(request, 'sistema/aluno_atividades.html', {
         'aluno': aluno,
-        'atividades': atividades
+        'atividades': pagina,
+        'page_obj': pagina,
     })
 
 
+@csrf_exempt
 @login_required
 def aluno_entregar_atividade(request, atividade_id):
-    """Aluno faz a entrega de uma atividade"""
+    """Aluno faz a entrega de uma atividade.
+    O upload passa pelo ``UploadVerificadoHandler`` (SHA-256 e limites durante
+    a leitura); como o handler precisa ser instalado antes de o corpo ser lido,
+    a verificação CSRF fica na view interna, depois dele.
+    """
+    if request.method == 'POST':
+        request.upload_handlers.insert(0, UploadVerificadoHandler(request))
+    return _aluno_entregar_atividade(request, atividade_id)
+
+
+@csrf_protect
+def _aluno_entregar_atividade(request, atividade_id):
+    """Matrícula na turma e entrega anterior saem de uma única consulta; a
+    unicidade (aluno, atividade) fica a cargo do banco, então dois envios
+    simultâneos resultam em uma entrega e um aviso, nunca em erro 500.
+    """
     aluno = _get_aluno(request)
     if not aluno:
         return redirect('home')
-    
-    atividade = get_object_or_404(Atividade.objects.select_related(
+
+    atividade = Atividade.objects.select_related(
         'id_turma_disciplina__id_turma',
         'id_turma_disciplina__id_disciplina'
-    ), pk=atividade_id)
-    
+    ).annotate(
+        matriculado=Exists(Turma.alunos.through.objects.filter(
+            turma_id=OuterRef('id_turma_disciplina__id_turma_id'), aluno_id=aluno.pk,
+        )),
+        ja_entregue=Exists(AlunoAtividade.objects.filter(id_atividade=OuterRef('pk'), id_aluno=aluno)),
+    ).filter(pk=atividade_id).first()
+    if atividade is None:
+        raise Http404('Atividade não encontrada.')
+
     # Verificar se o aluno está matriculado na turma
-    if not aluno.turmas.filter(id=atividade.id_turma_disciplina.id_turma.id).exists():
+    if not atividade.matriculado:
         messages.error(request, 'Você não está matriculado nesta turma.')
         return redirect('aluno_minhas_atividades')
-    
-    # Verificar se já entregou
-    entrega_existente = AlunoAtividade.objects.filter(
-        id_aluno=aluno,
-        id_atividade=atividade
-    ).first()
-    
-    if entrega_existente:
+
+    if atividade.ja_entregue:
         messages.warning(request, 'Você já entregou esta atividade.')
         return redirect('aluno_minhas_atividades')
-    
+
     if request.method == 'POST':
-        form = EntregaAtividadeForm(request.POST, request.FILES)
+        form = EntregaAtividadeForm(request.POST, request.FILES, erros_upload=getattr(request, 'erros_upload', ()))
         if form.is_valid():
             entrega = form.save(commit=False)
             entrega.id_aluno = aluno
             entrega.id_atividade = atividade
             entrega.data_entrega = timezone.now()
-            entrega.save()
+            try:
+                with transaction.atomic():
+                    entrega.save(force_insert=True)
+            except IntegrityError:
+                # Outro envio do mesmo aluno venceu a corrida; o arquivo já
+                # gravado fica registrado sem referência para a limpeza de órfãos
+                if entrega.arquivo:
+                    registrar_descartado(entrega.arquivo.name)
+                messages.warning(request, 'Você já entregou esta atividade.')
+                return redirect('aluno_minhas_atividades')
             messages.success(request, 'Atividade entregue com sucesso!')
             return redirect('aluno_minhas_atividades')
     else:
         form = EntregaAtividadeForm()
-    
+
     return render(request, 'sistema/aluno_entregar.html', {
         'form': form,
         'atividade': atividade
@@ -366,117 +570,139 @@ def aluno_minhas_notas(request):
     })
 
 
-# ==================== API: Estatísticas via C ====================
+# ==================== API: Estatísticas de notas ====================
+
+TIPOS_TEXTO = ('text/csv', 'text/plain', 'application/x-ndjson')
+
 
 @csrf_exempt
 def api_estatisticas_notas(request):
-    """Endpoint API que calcula estatísticas de uma lista de notas usando a DLL C.
-    POST JSON: { "notas": [7.5, 8.0, 5.0] }
-    Resposta: { "media": 7.5, "minimo": 5.0, "maximo": 8.0, "quantidade": 3 }
+    """Endpoint API que calcula estatísticas de uma lista de notas em uma única passada.
+    POST JSON: { "notas": [7.5, 8.0, 5.0] } (ou apenas o array)
+    POST text/csv, text/plain ou application/x-ndjson: notas separadas por linha/vírgula
+    Resposta: { "media": 6.83, "minimo": 5.0, "maximo": 8.0, "quantidade": 3,
+                "variancia": ..., "desvio_padrao": ..., "percentis": {"p25": ..., ...} }
+    O corpo é lido em blocos, sem montar a lista de notas em memória.
     """
     if request.method != 'POST':
         return HttpResponseBadRequest('Use POST com JSON {"notas": [...]}')
 
+    blocos = iter(lambda: request.read(BLOCO), b'')
+    if request.content_type in TIPOS_TEXTO:
+        notas = ler_notas_texto(blocos)
+    else:
+        notas = ler_notas_json(blocos)
+
     try:
-        payload = json.loads(request.body.decode('utf-8'))
-    except Exception:
+        dados = calcular_estatisticas(notas)
+    except (json.JSONDecodeError, UnicodeDecodeError):
         return HttpResponseBadRequest('JSON inválido')
-
-    notas = payload.get('notas')
-    if not isinstance(notas, list):
+    except KeyError:
         return HttpResponseBadRequest('Campo "notas" deve ser uma lista')
+    except NotaInvalida:
+        return HttpResponseBadRequest('A lista "notas" deve conter números')
+    return JsonResponse(dados)
+
 
-    # Sanitiza/filtra valores não numéricos
+@login_required
+def api_estatisticas_escopo(request, escopo, valor):
+    """Estatísticas das notas gravadas, agregadas no banco.
+    GET /api/estatisticas/<modulo|turma|disciplina|semestre>/<id ou semestre>/?fonte=modulo|atividades
+    fonte=modulo (padrão) usa a média final de AlunoModulo; atividades usa as notas das entregas.
+    Coordenadores consultam qualquer escopo; professores, apenas módulos, turmas e disciplinas
+    em que lecionam (em turmas pequenas os agregados revelariam notas individuais).
+    """
+    fonte = request.GET.get('fonte', 'modulo')
+    if escopo not in ESCOPOS:
+        return HttpResponseBadRequest('Escopo ou fonte inválidos')
     try:
-        notas_float = [float(x) for x in notas if x is not None]
-    except (TypeError, ValueError):
-        return HttpResponseBadRequest('A lista "notas" deve conter números')
+        valor = ESCOPOS[escopo][1](valor)
+    except ValueError:
+        return HttpResponseBadRequest('Identificador inválido')
+    if request.perfil.coordenador is None and not professor_no_escopo(request.perfil.professor, escopo, valor):
+        return JsonResponse({'erro': 'Sem permissão para as estatísticas deste escopo.'}, status=403)
+    try:
+        dados = estatisticas_banco(escopo, valor, fonte)
+    except KeyError:
+        return HttpResponseBadRequest('Escopo ou fonte inválidos')
+    except ValueError:
+        return HttpResponseBadRequest('Identificador inválido')
+    return JsonResponse(dados)
+
+
+@staff_member_required
+def api_saude_banco(request):
+    """Métricas da conexão com o banco para monitoramento (somente equipe).
+    GET /api/saude/banco/ -> configuração de reaproveitamento, estatísticas do pool
+    (tamanho, disponíveis, espera) e a latência de um SELECT 1.
+    """
+    dados = estatisticas_conexao(connection)
+    inicio = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    dados['latencia_ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+    return JsonResponse(dados)
+
+
+# ==================== Exportação de notas (CSV/XLSX) ====================
 
-    # Chama wrapper C
+@login_required
+def exportar_notas(request, fonte, escopo, valor):
+    """Exporta as notas de um escopo em CSV ou XLSX, gerado em fluxo.
+    GET /exportar/<modulo|atividades>/<modulo|turma|disciplina|semestre>/<id ou semestre>/?formato=csv|xlsx
+    Coordenadores exportam qualquer escopo; professores, apenas os próprios módulos.
+    """
+    if request.perfil.coordenador is None:
+        professor = request.perfil.professor
+        if professor is None:
+            messages.error(request, 'Apenas coordenadores e professores podem exportar notas.')
+            return redirect('home')
+        if escopo != 'modulo' or not valor.isdigit() or not professor_leciona(professor, int(valor)):
+            messages.error(request, 'Você só pode exportar as notas dos seus módulos.')
+            return redirect('professor_minhas_turmas')
+
+    formato = request.GET.get('formato', 'csv')
+    if formato not in FORMATOS:
+        return HttpResponseBadRequest('Formato inválido')
     try:
-        from c.notas_basico_wrapper import calcular_stats
-        dados = calcular_stats(notas_float)
-        dados['quantidade'] = len(notas_float)
-        return JsonResponse(dados)
-    except FileNotFoundError as e:
-        return JsonResponse({'erro': str(e)}, status=500)
-    except Exception as e:
-        return JsonResponse({'erro': f'Falha ao calcular estatísticas: {e}'}, status=500)
+        cabecalho, linhas = linhas_exportacao(fonte, escopo, valor)
+    except KeyError:
+        return HttpResponseBadRequest('Escopo ou fonte inválidos')
+    except ValueError:
+        return HttpResponseBadRequest('Identificador inválido')
+
+    gerar, content_type = FORMATOS[formato]
+    response = StreamingHttpResponse(gerar(cabecalho, linhas), content_type=content_type)
+    # valor vem livre da URL (semestre): só entra no nome do arquivo normalizado
+    response['Content-Disposition'] = f'attachment; filename="notas_{fonte}_{escopo}_{slugify(valor)}.{formato}"'
+    return response
 
 
 # ==================== PROFESSOR: Lançar notas (duas provas) ====================
 
 @login_required
+@professor_do_modulo('Você não tem permissão para lançar notas neste módulo.')
 def professor_lancar_notas(request, modulo_id):
     """Tela para o professor lançar p1/p2 por aluno do módulo e calcular média/status via C."""
-    professor = _get_professor(request)
-    if not professor:
-        return redirect('home')
-
     modulo = get_object_or_404(TurmaDisciplina.objects.select_related('id_turma', 'id_disciplina', 'id_professor__usuario'), pk=modulo_id)
 
-    if modulo.id_professor != professor:
-        messages.error(request, 'Você não tem permissão para lançar notas neste módulo.')
-        return redirect('professor_minhas_turmas')
+    # Garante registros AlunoModulo para cada aluno da turma (INSERT único só dos faltantes)
+    garantir_matriculas(modulo)
 
-    # Garante registros AlunoModulo para cada aluno da turma
-    alunos = modulo.id_turma.alunos.select_related('usuario').all()
-    for aluno in alunos:
-        AlunoModulo.objects.get_or_create(id_aluno=aluno, id_turma_disciplina=modulo)
-
-    registros = AlunoModulo.objects.filter(id_turma_disciplina=modulo).select_related('id_aluno__usuario')
+    registros = list(AlunoModulo.objects.filter(id_turma_disciplina=modulo).select_related('id_aluno__usuario'))
 
     if request.method == 'POST':
-        alteracoes = 0
-        for reg in registros:
-            s1 = request.POST.get(f'nota1_{reg.id_aluno_id}', '').strip()
-            s2 = request.POST.get(f'nota2_{reg.id_aluno_id}', '').strip()
-
-            def parse_nota(s):
-                if s == '':
-                    return None
-                try:
-                    v = float(s)
-                    if v < 0 or v > 10:
-                        raise ValueError('Fora da faixa 0-10')
-                    return v
-                except Exception:
-                    return None
-
-            n1 = parse_nota(s1)
-            n2 = parse_nota(s2)
-
-            mudou = False
-            if (n1 is None) != (reg.nota_prova1 is None) or (n1 is not None and float(reg.nota_prova1 or 0) != n1):
-                reg.nota_prova1 = n1
-                mudou = True
-            if (n2 is None) != (reg.nota_prova2 is None) or (n2 is not None and float(reg.nota_prova2 or 0) != n2):
-                reg.nota_prova2 = n2
-                mudou = True
-
-            # Se ambas as notas presentes, calcular via C
-            if n1 is not None and n2 is not None:
-                try:
-                    from c.notas_avaliacao_wrapper import calcular_media_status
-                    res = calcular_media_status(n1, n2, 7.0)
-                    reg.media_final = res['media']
-                    reg.status = res['status']
-                except Exception:
-                    # Fallback Python
-                    media = (n1 + n2) / 2.0
-                    reg.media_final = media
-                    reg.status = 'aprovado' if media >= 7.0 else 'reprovado'
-                mudou = True
-            else:
-                reg.media_final = None
-                reg.status = 'pendente'
-                mudou = True
-
-            if mudou:
-                reg.save()
-                alteracoes += 1
-
-        messages.success(request, f'Notas atualizadas. Registros alterados: {alteracoes}.')
+        entradas = {
+            reg.id_aluno_id: (
+                parse_nota(request.POST.get(f'nota1_{reg.id_aluno_id}', '')),
+                parse_nota(request.POST.get(f'nota2_{reg.id_aluno_id}', '')),
+            )
+            for reg in registros
+        }
+        alterados = lancar_notas(registros, entradas)
+
+        messages.success(request, f'Notas atualizadas. Registros alterados: {len(alterados)}.')
         return redirect('professor_lancar_notas', modulo_id=modulo.id)
 
     # Anexa classificação de risco para feedback rápido ao professor
@@ -503,12 +729,39 @@ def professor_lancar_notas(request, modulo_id):
     })
 
 
+@login_required
+@professor_do_modulo('Você não tem permissão para lançar notas neste módulo.')
+def professor_importar_notas(request, modulo_id):
+    """Importa P1/P2 do módulo a partir de um CSV (matricula,p1,p2) enviado no campo "arquivo".
+    O arquivo é lido linha a linha e gravado em uma única transação; com qualquer erro, nada é salvo.
+    """
+    if request.method != 'POST' or 'arquivo' not in request.FILES:
+        if request.method == 'POST':
+            messages.error(request, 'Selecione um arquivo CSV.')
+        return redirect('professor_lancar_notas', modulo_id=modulo_id)
+
+    modulo = get_object_or_404(TurmaDisciplina, pk=modulo_id)
+    garantir_matriculas(modulo)
+    registros = list(AlunoModulo.objects.filter(id_turma_disciplina=modulo).select_related('id_aluno'))
+
+    alterados, erros = importar_notas_csv(registros, request.FILES['arquivo'])
+    if erros:
+        for linha, mensagem in erros[:MAX_ERROS_IMPORTACAO]:
+            messages.error(request, f'Linha {linha}: {mensagem}')
+        if len(erros) > MAX_ERROS_IMPORTACAO:
+            messages.error(request, f'... e mais {len(erros) - MAX_ERROS_IMPORTACAO} erros.')
+        messages.warning(request, 'Nenhuma nota foi importada. Corrija o arquivo e envie novamente.')
+    else:
+        messages.success(request, f'Notas importadas. Registros alterados: {len(alterados)}.')
+    return redirect('professor_lancar_notas', modulo_id=modulo_id)
+
+
 # ==================== VIEWS PARA COORDENADORES ====================
 
 @login_required
 def coordenador_criar_turma(request):
     """Coordenador cria uma nova turma"""
-    if not hasattr(request.user, 'coordenador'):
+    if request.perfil.coordenador is None:
         messages.error(request, 'Apenas coordenadores podem cadastrar turmas.')
         return redirect('lista_turmas')
     
@@ -523,3 +776,37 @@ def coordenador_criar_turma(request):
     
     return render(request, 'sistema/coordenador_criar_turma.html', {'form': form})
 
+
+MAX_NAO_ENCONTRADAS = 20
+
+
+@login_required
+def coordenador_matricular_alunos(request, turma_id):
+    """Coordenador matricula alunos em volume: lista de matrículas colada no campo
+    "matriculas" (uma por linha) ou arquivo CSV/texto no campo "arquivo".
+    """
+    if request.perfil.coordenador is None:
+        messages.error(request, 'Apenas coordenadores podem matricular alunos.')
+        return redirect('lista_turmas')
+
+    turma = get_object_or_404(Turma, pk=turma_id)
+    if request.method == 'POST':
+        if 'arquivo' in request.FILES:
+            linhas = request.FILES['arquivo']
+        else:
+            linhas = request.POST.get('matriculas', '').splitlines()
+        resumo = matricular_alunos(turma, ler_matriculas(linhas))
+
+        messages.success(
+            request,
+            f'{resumo["matriculados"]} alunos matriculados ({resumo["ja_matriculados"]} já estavam na turma).',
+        )
+        nao_encontradas = resumo['nao_encontradas']
+        if nao_encontradas:
+            lista = ', '.join(nao_encontradas[:MAX_NAO_ENCONTRADAS])
+            if len(nao_encontradas) > MAX_NAO_ENCONTRADAS:
+                lista += f' e mais {len(nao_encontradas) - MAX_NAO_ENCONTRADAS}'
+            messages.warning(request, f'Matrículas não encontradas: {lista}.')
+        return redirect('detalhe_turma', turma_id=turma.id)
+
+    return render(request, 'sistema/coordenador_matricular_alunos.html', {'turma': turma})
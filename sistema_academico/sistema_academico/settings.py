@@ -54,6 +54,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'sistema.middleware.PerfilMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -97,9 +98,39 @@ else:
             'PASSWORD': env('DATABASE_PASSWORD'),
             'HOST': env('DATABASE_HOST', default='localhost'),
             'PORT': env('DATABASE_PORT', default='5432'),
+            # Reaproveita a conexão entre requisições (segundos; 0 = uma conexão por requisição)
+            'CONN_MAX_AGE': env.int('DATABASE_CONN_MAX_AGE', default=60),
+            # Testa a conexão reaproveitada antes de usá-la (evita erro após queda do servidor)
+            'CONN_HEALTH_CHECKS': env.bool('DATABASE_CONN_HEALTH_CHECKS', default=True),
         }
     }
-   
+    # Pool nativo do Django 5.1+ (requer psycopg 3: pip install "psycopg[binary,pool]").
+    # Com o pool ativo as conexões não são persistentes (CONN_MAX_AGE precisa ser 0).
+    if env.bool('DATABASE_POOL', default=False):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': env.int('DATABASE_POOL_MIN_SIZE', default=2),
+                'max_size': env.int('DATABASE_POOL_MAX_SIZE', default=10),
+                'timeout': env.float('DATABASE_POOL_TIMEOUT', default=10.0),
+            },
+        }
+
+
+# Cache (local-memory por padrão; ex.: CACHE_URL=filecache:///var/tmp/sistema_cache
+# para compartilhar entre processos do servidor sem serviço externo)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Validade (s) dos contadores da home; o comando reconciliar_contadores os recalcula
+CONTADORES_CACHE_TIMEOUT = env.int('CONTADORES_CACHE_TIMEOUT', default=300)
+
+# Validade (s) dos perfis (aluno/professor/coordenador) do usuário em cache.
+# Os perfis decidem permissões: com o cache local (por processo) a invalidação
+# não chega aos outros workers, então a validade padrão é curta.
+CACHE_LOCAL = CACHES['default']['BACKEND'].endswith('LocMemCache')
+PERFIS_CACHE_TIMEOUT = env.int('PERFIS_CACHE_TIMEOUT', default=30 if CACHE_LOCAL else 3600)
 
 
 # Password validation
@@ -145,6 +176,21 @@ STATICFILES_DIRS = [
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Limites das entregas de atividades, aplicados durante a leitura do upload pela
+# view de entrega (ver sistema/armazenamento.py)
+UPLOAD_TAMANHO_MAXIMO = env.int('UPLOAD_TAMANHO_MAXIMO', default=20 * 1024 * 1024)
+UPLOAD_EXTENSOES = set(env.list('UPLOAD_EXTENSOES', default=[
+    '.pdf', '.doc', '.docx', '.odt', '.txt', '.rtf', '.ppt', '.pptx', '.xls', '.xlsx', '.csv',
+    '.zip', '.png', '.jpg', '.jpeg', '.gif', '.mp3', '.mp4',
+]))
+
+# Envio dos arquivos de entregas (sempre pela view com permissão):
+# '' = o próprio Django envia (com Range/ETag); 'x-accel-redirect' (nginx, com
+# uma location "internal" em ARQUIVOS_ENVIO_PREFIXO apontando para MEDIA_ROOT)
+# ou 'x-sendfile' (Apache mod_xsendfile) delegam a transferência ao servidor.
+ARQUIVOS_ENVIO = env('ARQUIVOS_ENVIO', default='')
+ARQUIVOS_ENVIO_PREFIXO = env('ARQUIVOS_ENVIO_PREFIXO', default='/protegido/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -16,8 +16,6 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from django.conf import settings
-from django.conf.urls.static import static
 from sistema import views
 
 urlpatterns = [
@@ -39,18 +37,26 @@ urlpatterns = [
     path('professor/turmas/', views.professor_minhas_turmas, name='professor_minhas_turmas'),
     path('professor/modulo/<int:modulo_id>/criar-atividade/', views.professor_criar_atividade, name='professor_criar_atividade'),
     path('professor/modulo/<int:modulo_id>/atividades/', views.professor_ver_atividades, name='professor_ver_atividades'),
+    path('professor/modulo/<int:modulo_id>/entregas.zip', views.professor_baixar_entregas_modulo, name='professor_baixar_entregas_modulo'),
+    path('professor/atividade/<int:atividade_id>/entregas.zip', views.professor_baixar_entregas_atividade, name='professor_baixar_entregas_atividade'),
     path('professor/entrega/<int:entrega_id>/corrigir/', views.professor_corrigir_entrega, name='professor_corrigir_entrega'),
     path('professor/modulo/<int:modulo_id>/lancar-notas/', views.professor_lancar_notas, name='professor_lancar_notas'),
+    path('professor/modulo/<int:modulo_id>/importar-notas/', views.professor_importar_notas, name='professor_importar_notas'),
     
     # Aluno
     path('aluno/atividades/', views.aluno_minhas_atividades, name='aluno_minhas_atividades'),
     path('aluno/atividade/<int:atividade_id>/entregar/', views.aluno_entregar_atividade, name='aluno_entregar_atividade'),
     path('aluno/notas/', views.aluno_minhas_notas, name='aluno_minhas_notas'),
+    path('entrega/<int:entrega_id>/arquivo/', views.baixar_arquivo_entrega, name='baixar_arquivo_entrega'),
 
     # API
     path('api/estatisticas/', views.api_estatisticas_notas, name='api_estatisticas_notas'),
+    path('api/estatisticas/<slug:escopo>/<str:valor>/', views.api_estatisticas_escopo, name='api_estatisticas_escopo'),
+    path('api/saude/banco/', views.api_saude_banco, name='api_saude_banco'),
+    path('exportar/<slug:fonte>/<slug:escopo>/<str:valor>/', views.exportar_notas, name='exportar_notas'),
     path('coordenador/turma/cadastrar/', views.coordenador_criar_turma, name='coordenador_criar_turma'),
+    path('coordenador/turma/<int:turma_id>/matricular/', views.coordenador_matricular_alunos, name='coordenador_matricular_alunos'),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# MEDIA_ROOT só guarda entregas: são servidas por baixar_arquivo_entrega, com
+# verificação de permissão, e nunca diretamente (nem em DEBUG).
\ No newline at end of file